@@ -10,6 +10,151 @@ class Settings(BaseSettings):
     AUTH_PASSWORD: str = "admin"
     JWT_SECRET: str = "dev-secret-change-me"
 
+    # Query result cache (process-wide, shared across conversations)
+    QUERY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    QUERY_CACHE_TTL_SECONDS: float = 300.0
+    # How often to poll target table modification counters for invalidation
+    DATA_VERSION_CHECK_SECONDS: float = 5.0
+
+    # Stream query results through a server-side cursor instead of buffering them
+    QUERY_STREAMING: bool = True
+    QUERY_STREAM_BATCH_SIZE: int = 200
+
+    # Pre-flight EXPLAIN guard and per-query timeout for target queries
+    QUERY_COST_CHECK: bool = True
+    QUERY_MAX_COST: float = 1_000_000.0
+    QUERY_MAX_PLAN_ROWS: int = 1_000_000
+    QUERY_STATEMENT_TIMEOUT_MS: int = 15_000
+
+    # How often to re-check the target schema fingerprint for the catalog cache
+    CATALOG_CHECK_SECONDS: float = 30.0
+
+    # sample_data: tables with at least this many estimated rows use TABLESAMPLE
+    SAMPLE_TABLESAMPLE_MIN_ROWS: int = 10_000
+    SAMPLE_TABLESAMPLE_METHOD: str = "SYSTEM"  # or "BERNOULLI"
+    SAMPLE_RESERVOIR_SIZE: int = 50
+    SAMPLE_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    SAMPLE_CACHE_TTL_SECONDS: float = 900.0
+
+    # Max tool calls running against the target database at once, across all
+    # pipelines; keep it at or below the analytic pool size
+    TARGET_TOOL_CONCURRENCY: int = 4
+
+    # Target database pools: analytic queries and catalog/metadata/sample queries
+    # are sized independently so slow analytics cannot starve schema lookups
+    TARGET_QUERY_POOL_SIZE: int = 5
+    TARGET_QUERY_MAX_OVERFLOW: int = 5
+    TARGET_QUERY_STATEMENT_CACHE_SIZE: int = 100
+    TARGET_CATALOG_POOL_SIZE: int = 2
+    TARGET_CATALOG_MAX_OVERFLOW: int = 2
+    TARGET_CATALOG_STATEMENT_CACHE_SIZE: int = 256
+    # Background ping of the target pools, replacing a ping on every checkout
+    TARGET_LIVENESS_INTERVAL_SECONDS: float = 30.0
+
+    # Answer simple single-table SELECTs from in-memory snapshots of small tables
+    ANALYTICS_ENABLED: bool = False
+    ANALYTICS_MAX_ROWS: int = 50_000
+
+    # profile_table: column statistics computed once per table and data version;
+    # larger tables are profiled from a block sample of this many rows
+    PROFILE_MAX_ROWS: int = 100_000
+    PROFILE_TOP_K: int = 5
+    PROFILE_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    PROFILE_CACHE_TTL_SECONDS: float = 3600.0
+    # Add column profiles of the conversation's known tables to the plan prompt
+    PROFILE_IN_PLAN_PROMPT: bool = False
+    PROFILE_PROMPT_MAX_TABLES: int = 5
+
+    # Value dictionary: distinct values of low-cardinality text columns, fuzzily
+    # matched against the question and added to the plan and explore prompts
+    VALUE_HINTS_IN_PROMPTS: bool = False
+    VALUE_DICTIONARY_MAX_DISTINCT: int = 100
+    VALUE_DICTIONARY_SCAN_MAX_ROWS: int = 100_000
+    VALUE_MATCH_THRESHOLD: float = 0.8
+    VALUE_HINTS_MAX: int = 10
+
+    # Describe, sample and profile the tables a question likely needs (from the
+    # conversation's schema context or table/column names in the question)
+    # while the plan step runs; explore starts with those tool results
+    SCHEMA_PREFETCH: bool = False
+    SCHEMA_PREFETCH_MAX_TABLES: int = 3
+    # How long explore waits for prefetch calls still running when it starts;
+    # unfinished calls are cancelled and explore makes them itself if needed
+    SCHEMA_PREFETCH_WAIT_SECONDS: float = 0.05
+
+    # Application-lifetime HTTP connection pool to the LLM proxy. HTTP/2 is only
+    # negotiated when the optional h2 package is installed.
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 120.0
+    LLM_HTTP2: bool = True
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 600.0
+    # Open a connection to the proxy at startup so the first question skips DNS/TLS setup
+    LLM_WARM_UP: bool = True
+
+    # Process-wide LLM scheduler: concurrent calls to the proxy and per-minute
+    # request/token budgets (0 = unlimited). Queued calls are served answer >
+    # plan > explore > background, round-robin across conversations.
+    LLM_MAX_CONCURRENT_REQUESTS: int = 8
+    LLM_REQUESTS_PER_MINUTE: int = 0
+    LLM_TOKENS_PER_MINUTE: int = 0
+    # Completion tokens reserved per call when it does not set max_tokens
+    LLM_EXPECTED_COMPLETION_TOKENS: int = 1000
+
+    # Model per LLM call. Routing is opt-in: LLM_MODEL_ROUTES maps a step
+    # ("plan") or a step and call route ("explore:summary",
+    # "answer:skip_explore", "answer:<answer type>") to a model the proxy
+    # serves, e.g. {"plan": "openai/claude-haiku-4-5"}; unrouted calls use
+    # LLM_MODEL. Retries after a validation error switch to
+    # LLM_ESCALATION_MODEL ("" = keep the routed model).
+    # A litellm_proxy/ prefix (unlike openai/) forwards cache_control markers
+    # to the proxy for LLM_PROMPT_CACHING.
+    LLM_MODEL: str = "openai/claude-sonnet-4-5"
+    LLM_MODEL_ROUTES: dict[str, str] = {}
+    LLM_ESCALATION_MODEL: str = ""
+
+    # Mark stable prompt prefixes (system prompt, tool definitions, the growing
+    # explore transcript) with cache_control so the provider can cache them
+    LLM_PROMPT_CACHING: bool = True
+
+    # How chat_json asks for JSON: "json_schema" (response_format), "tool" (forced
+    # tool call), "prompt" (schema in the system prompt), or "auto" (json_schema
+    # when litellm knows the model supports it, otherwise tool)
+    LLM_STRUCTURED_OUTPUT: str = "auto"
+
+    # Exact-match LLM response cache: "off", "cache" (memory + disk, per-step
+    # TTLs; 0 disables a step), "record" (always call the LLM, save every
+    # response) or "replay" (serve saved responses only, for benchmarks)
+    LLM_CACHE_MODE: str = "off"
+    LLM_CACHE_DIR: str = ".llm_cache"
+    LLM_CACHE_MAX_ENTRIES: int = 1000
+    LLM_CACHE_TTL_SECONDS: dict[str, float] = {"plan": 3600.0, "explore": 600.0, "answer": 600.0}
+    LLM_CACHE_DEFAULT_TTL_SECONDS: float = 600.0
+
+    # Reuse the plan made for a near-duplicate first question (same target schema)
+    PLAN_CACHE_ENABLED: bool = False
+    PLAN_CACHE_THRESHOLD: float = 0.8
+    PLAN_CACHE_MAX_ENTRIES: int = 500
+
+    # Token budgets (estimated locally) per prompt section; 0 leaves a section
+    # unbounded. Oversized sections are compacted: old history summarized, data
+    # rows sampled, schema lists cut, older tool results shortened. "plan" is
+    # the plan (and value hints) explore receives in its first user message.
+    PROMPT_TOKEN_BUDGETS: dict[str, int] = {
+        "system": 6000,
+        "plan": 4000,
+        "schema": 3000,
+        "history": 6000,
+        "raw_data": 8000,
+        "tool_result": 4000,
+        "tool_results": 24000,
+    }
+
+    # Stream the answer step's completion, sending text deltas, table rows and
+    # chart points over SSE as they are generated
+    ANSWER_STREAMING: bool = False
+
     model_config = {"env_file": ".env"}
 
 
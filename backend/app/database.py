@@ -1,11 +1,73 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, async_sessionmaker, create_async_engine
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # App database — read-write, stores conversations, messages, pipeline state
 app_engine = create_async_engine(settings.DATABASE_APP_URL, echo=False, pool_pre_ping=True, pool_recycle=300)
 AppSession = async_sessionmaker(app_engine, expire_on_commit=False)
 
-# Target database — read-only, the SaaS dataset the agent queries
-target_engine = create_async_engine(settings.DATABASE_TARGET_URL, echo=False, pool_pre_ping=True, pool_recycle=300)
+# Target database — read-only, the SaaS dataset the agent queries.
+# Liveness is checked in the background (check_target_liveness) rather than
+# with a pre-ping round trip on every checkout.
+
+# Analytic pool — ad-hoc queries written by the LLM
+target_engine = create_async_engine(
+    settings.DATABASE_TARGET_URL,
+    echo=False,
+    pool_size=settings.TARGET_QUERY_POOL_SIZE,
+    max_overflow=settings.TARGET_QUERY_MAX_OVERFLOW,
+    pool_recycle=300,
+    connect_args={"prepared_statement_cache_size": settings.TARGET_QUERY_STATEMENT_CACHE_SIZE},
+)
 TargetSession = async_sessionmaker(target_engine, expire_on_commit=False)
+
+# Catalog pool — fixed-text metadata, statistics and sample queries, which
+# asyncpg prepares once per connection and then reuses from its statement cache
+target_catalog_engine = create_async_engine(
+    settings.DATABASE_TARGET_URL,
+    echo=False,
+    pool_size=settings.TARGET_CATALOG_POOL_SIZE,
+    max_overflow=settings.TARGET_CATALOG_MAX_OVERFLOW,
+    pool_recycle=300,
+    connect_args={"prepared_statement_cache_size": settings.TARGET_CATALOG_STATEMENT_CACHE_SIZE},
+)
+
+# Bounds concurrent tool calls against the target database so parallel
+# explore iterations cannot exhaust its connection pool
+target_tool_slots = asyncio.Semaphore(settings.TARGET_TOOL_CONCURRENCY)
+
+
+async def begin_guarded(conn: AsyncConnection) -> None:
+    """Start a read-only transaction with a statement timeout scoped to it."""
+    await conn.execution_options(postgresql_readonly=True)
+    await conn.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": str(settings.QUERY_STATEMENT_TIMEOUT_MS)},
+    )
+
+
+async def ping_engine(engine: AsyncEngine) -> bool:
+    """Run SELECT 1 on a pooled connection; drop every pooled connection if it fails."""
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True
+    except (SQLAlchemyError, OSError):
+        logger.warning("Target database ping failed; discarding pooled connections", exc_info=True)
+        await engine.dispose()
+        return False
+
+
+async def check_target_liveness(interval: float) -> None:
+    """Periodically ping the target pools. Runs until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        for engine in (target_engine, target_catalog_engine):
+            await ping_engine(engine)
@@ -1,15 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-import httpx
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import settings
+from app.database import check_target_liveness
 from app.routers import auth, conversations, pipeline_runs
+from app.services.llm import llm_scheduler, llm_transport, model_usage, prompt_cache_stats
+from app.services.llm_cache import llm_cache
 
-app = FastAPI(title="Genesis Data Agent", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    liveness = asyncio.create_task(check_target_liveness(settings.TARGET_LIVENESS_INTERVAL_SECONDS))
+    warm_up = asyncio.create_task(llm_transport.warm_up()) if settings.LLM_WARM_UP else None
+    yield
+    liveness.cancel()
+    if warm_up is not None:
+        warm_up.cancel()
+    await llm_transport.close()
+
+
+app = FastAPI(title="Genesis Data Agent", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,18 +49,25 @@ async def health():
 async def llm_health():
     """Check if the LiteLLM proxy is reachable and accepting requests."""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.get(
-                f"{settings.LITELLM_PROXY_URL}health",
-                headers={"Authorization": f"Bearer {settings.LITELLM_API_KEY}"},
-            )
-            if resp.status_code < 500:
-                return {"status": "ok"}
-            return {"status": "unavailable", "detail": "LLM service returned an error"}
+        resp = await llm_transport.probe()
+        if resp.status_code < 500:
+            return {"status": "ok"}
+        return {"status": "unavailable", "detail": "LLM service returned an error"}
     except Exception:
         return {"status": "unavailable", "detail": "Cannot reach LLM service"}
 
 
+@app.get("/api/llm-stats")
+async def llm_stats():
+    """Scheduler queues and waits, response and prompt cache hits, and models used per step."""
+    return {
+        "scheduler": llm_scheduler.stats(),
+        "cache": llm_cache.stats(),
+        "prompt_cache": prompt_cache_stats.stats(),
+        "models": model_usage.stats(),
+    }
+
+
 # Serve frontend static files in production
 STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
 if STATIC_DIR.is_dir():
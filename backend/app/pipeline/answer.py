@@ -1,8 +1,27 @@
 from typing import Any
 
+from app.config import settings
 from app.pipeline.base import PipelineStep
 from app.schemas.api import AnswerOutput
+from app.services import events
+from app.services.json_stream import Path
 from app.services.llm import LLMClient
+from app.services.token_budget import budget, compact_history, count_tokens, render_rows, truncate_text
+
+
+def _stream_event(kind: str, path: Path, value: Any) -> dict | None:
+    """Map a JSON stream event on AnswerOutput to an SSE payload, or None to skip it."""
+    if kind == "delta" and path == ("text_answer",):
+        return {"text_delta": value}
+    if kind != "value":
+        return None
+    if path == ("table_data", "columns"):
+        return {"table_columns": value}
+    if len(path) == 3 and path[:2] == ("table_data", "rows"):
+        return {"table_row": value}
+    if len(path) == 3 and path[:2] == ("chart_data", "data"):
+        return {"chart_point": value}
+    return None
 
 
 class AnswerStep(PipelineStep):
@@ -39,15 +58,24 @@ class AnswerStep(PipelineStep):
                 " Include table_data with columns and rows representing the dataset."
             )
 
-        system_content = f"{self.system_prompt}\n\nFormat instructions: {format_instructions}"
+        system_content = truncate_text(
+            f"{self.system_prompt}\n\nFormat instructions: {format_instructions}", budget("system")
+        )
 
+        # Kept out of the system prompt so that stays a stable cached prefix
+        error_note = ""
         if input_data.get("_last_error"):
-            system_content += (
+            error_note = (
                 f"\n\nYour previous response had a validation error: {input_data['_last_error']}"
                 "\nPlease correct your output."
             )
 
         if exploration:
+            # Notes get up to a quarter of the raw data budget; rows are sampled into the rest
+            data_budget = budget("raw_data")
+            notes = truncate_text(exploration.get("exploration_notes", ""), data_budget // 4)
+            rows_budget = data_budget - count_tokens(notes) if data_budget else 0
+            raw_data = render_rows(exploration.get("raw_data", ""), rows_budget)
             messages = [
                 {"role": "system", "content": system_content},
                 {
@@ -55,8 +83,8 @@ class AnswerStep(PipelineStep):
                     "content": (
                         f"Question: {question}\n\n"
                         f"Plan: {plan}\n\n"
-                        f"Exploration notes: {exploration.get('exploration_notes', '')}\n\n"
-                        f"Raw data: {exploration.get('raw_data', '')}"
+                        f"Exploration notes: {notes}\n\n"
+                        f"Raw data: {raw_data}{error_note}"
                     ),
                 },
             ]
@@ -71,10 +99,26 @@ class AnswerStep(PipelineStep):
                     ),
                 },
             ]
-            messages.extend(history)
+            messages.extend(await compact_history(history, budget("history")))
             messages.append({
                 "role": "user",
-                "content": f"Question: {question}\n\nPlan: {plan}",
+                "content": f"Question: {question}\n\nPlan: {plan}{error_note}",
             })
 
-        return await llm_client.chat_json(messages, AnswerOutput)
+        # Answers from conversation history alone can go to a lighter model
+        route = answer_type if exploration else "skip_explore"
+        conversation_id = input_data.get("conversation_id")
+        if not (settings.ANSWER_STREAMING and conversation_id):
+            return await llm_client.chat_json(messages, AnswerOutput, route=route)
+
+        if input_data.get("_last_error"):
+            # Tell the client to discard what the failed attempt streamed
+            await events.emit(conversation_id, {"step": self.name, "status": "streaming", "reset": True})
+
+        async def forward(event: tuple[str, Path, Any]) -> None:
+            kind, path, value = event
+            payload = _stream_event(kind, path, value)
+            if payload is not None:
+                await events.emit(conversation_id, {"step": self.name, "status": "streaming", **payload})
+
+        return await llm_client.chat_json_stream(messages, AnswerOutput, forward, route=route)
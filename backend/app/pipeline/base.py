@@ -3,7 +3,7 @@ from typing import Any
 
 from pydantic import BaseModel, ValidationError
 
-from app.services.llm import LLMClient
+from app.services.llm import LLMClient, current_step, escalated
 
 
 class PipelineStep(ABC):
@@ -21,17 +21,25 @@ class PipelineStep(ABC):
         ...
 
     async def execute_with_retry(self, input_data: Any, llm_client: LLMClient) -> BaseModel:
-        """Execute with retry on validation errors."""
+        """Execute with retry on validation errors, escalating retries to the stronger model."""
         last_error: Exception | None = None
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                return await self.execute(input_data, llm_client)
-            except (ValidationError, ValueError) as exc:
-                last_error = exc
-                if attempt == self.max_retries:
-                    break
-                # Append error context so next attempt can correct
-                input_data = {**input_data, "_last_error": str(exc)}
+        token = current_step.set(self.name)
+        escalation = escalated.set(False)
+        try:
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    return await self.execute(input_data, llm_client)
+                except (ValidationError, ValueError) as exc:
+                    last_error = exc
+                    if attempt == self.max_retries:
+                        break
+                    # Append error context so next attempt can correct
+                    input_data = {**input_data, "_last_error": str(exc)}
+                    # Retry on the stronger model (LLM_ESCALATION_MODEL)
+                    escalated.set(True)
+        finally:
+            escalated.reset(escalation)
+            current_step.reset(token)
         raise last_error  # type: ignore[misc]
 
     def validate_output(self, raw: dict) -> BaseModel:
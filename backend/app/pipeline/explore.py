@@ -1,20 +1,85 @@
+import asyncio
 import json
 from typing import Any
 
+from app.database import target_tool_slots
 from app.pipeline.base import PipelineStep
+from app.pipeline.explore_output import RecordedCall, build_explore_output, fallback_notes
+from app.pipeline.prefetch import PrefetchedCall
 from app.schemas.api import ExploreOutput, PlanOutput
 from app.services.llm import LLMClient
+from app.services.token_budget import budget, compact_tool_messages, fit_columnar, truncate_text
 from app.tools.base import Tool
+from app.tools.result_format import ColumnarResult, render_tool_result
+from app.tools.value_dictionary import format_value_hints
 
 MAX_ITERATIONS = 20
 
 
+def _render_result(result: Any) -> str:
+    """Render a tool result for the LLM within the per-result token budget."""
+    if isinstance(result, ColumnarResult):
+        return fit_columnar(result, budget("tool_result"))
+    return truncate_text(render_tool_result(result), budget("tool_result"))
+
+
+def _rendered(result: Any) -> tuple[Any, str]:
+    """The result and its tool message content; a result that cannot be rendered becomes an error."""
+    try:
+        return result, _render_result(result)
+    except Exception as e:
+        error = {"error": f"Could not render the tool result: {e}"}
+        return error, render_tool_result(error)
+
+
+def _relevant_calls(prefetched: list[PrefetchedCall], tables: list[str]) -> list[PrefetchedCall]:
+    """Prefetched calls that touch the plan's tables (all of them if it names none)."""
+    wanted = set(tables)
+    return [call for call in prefetched if not wanted or wanted & set(call.tables)]
+
+
+def _arguments(tc: Any) -> dict:
+    try:
+        arguments = json.loads(tc.function.arguments)
+    except (TypeError, ValueError):
+        return {}
+    return arguments if isinstance(arguments, dict) else {}
+
+
+def _seed_messages(calls: list[PrefetchedCall]) -> list[dict]:
+    """Replay prefetched tool calls as if the LLM had made them."""
+    if not calls:
+        return []
+    ids = [f"prefetch_{i}" for i in range(len(calls))]
+    contents = [_rendered(call.result)[1] for call in calls]
+    return [
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": call_id,
+                    "type": "function",
+                    "function": {"name": call.tool, "arguments": json.dumps(call.arguments)},
+                }
+                for call_id, call in zip(ids, calls)
+            ],
+        },
+        *(
+            {"role": "tool", "tool_call_id": call_id, "content": content}
+            for call_id, content in zip(ids, contents)
+        ),
+    ]
+
+
 class ExploreStep(PipelineStep):
     """Step 2: Execute the plan by calling tools in an agentic loop.
 
     This is the agentic tool-call loop step. The LLM calls tools iteratively
-    (list_tables, show_schema, sample_data, query) until it determines it has
-    enough data to answer the user's question.
+    (list_tables, show_schema, describe_tables, profile_table, sample_data,
+    query) until it determines it has enough data to answer the user's question.
+    The output is assembled from the recorded tool calls; only the exploration
+    notes are written by the LLM.
     """
 
     name = "explore"
@@ -22,9 +87,28 @@ class ExploreStep(PipelineStep):
     system_prompt = (
         "You are a data exploration agent. Execute the plan by calling the available "
         "tools. You may call tools multiple times. Gather all data needed to answer "
-        "the user's question."
+        "the user's question. Use describe_tables to inspect all the tables you need "
+        "in a single call, and profile_table to learn value ranges, distinct counts "
+        "and common values instead of querying for them. When you have enough data, "
+        "reply without calling tools: a few sentences on what the data shows and any "
+        "caveats. Your queries and their results are passed on automatically."
     )
 
+    async def _run_tool_call(self, tc: Any, tool_map: dict[str, Tool]) -> tuple[Any, str]:
+        """Run and render one tool call, turning any failure into an error result for the LLM."""
+        return _rendered(await self._execute_tool_call(tc, tool_map))
+
+    async def _execute_tool_call(self, tc: Any, tool_map: dict[str, Tool]) -> Any:
+        tool = tool_map.get(tc.function.name)
+        if tool is None:
+            return {"error": f"Unknown tool: {tc.function.name}"}
+        try:
+            params = json.loads(tc.function.arguments)
+            async with target_tool_slots:
+                return await tool.execute(params)
+        except Exception as e:
+            return {"error": str(e)}
+
     async def execute(
         self, input_data: dict[str, Any], llm_client: LLMClient
     ) -> ExploreOutput:
@@ -46,31 +130,50 @@ class ExploreStep(PipelineStep):
 
         plan_obj = PlanOutput.model_validate(plan) if isinstance(plan, dict) else plan
 
-        system_content = (
-            f"{self.system_prompt}\n\n"
+        # The system prompt is identical for every question (a cached prefix
+        # with the tool definitions); the plan goes in the first user message
+        plan_content = (
             f"Plan reasoning: {plan_obj.reasoning}\n"
             f"Query strategy: {plan_obj.query_strategy}\n"
             f"Tables to explore: {', '.join(plan_obj.tables_to_explore)}"
         )
 
+        if input_data.get("value_hints"):
+            plan_content += "\n\n" + format_value_hints(input_data["value_hints"])
+
+        plan_content = truncate_text(plan_content, budget("plan"))
+
         if input_data.get("_last_error"):
-            system_content += (
+            plan_content += (
                 f"\n\nYour previous response had a validation error: {input_data['_last_error']}"
                 "\nPlease correct your output."
             )
 
-        messages: list[dict] = [{"role": "system", "content": system_content}]
+        messages: list[dict] = [{"role": "system", "content": self.system_prompt}]
         messages.append(
-            {"role": "user", "content": "Execute the plan. Call tools to gather the data needed."}
+            {
+                "role": "user",
+                "content": (
+                    f"{plan_content}\n\n"
+                    "Execute the plan. Call tools to gather the data needed."
+                ),
+            }
         )
+        # Schema lookups fetched while the plan was being made
+        seeded = _relevant_calls(input_data.get("prefetched") or [], plan_obj.tables_to_explore)
+        messages.extend(_seed_messages(seeded))
+        calls: list[RecordedCall] = list(seeded)
+        notes = ""
 
         for _ in range(MAX_ITERATIONS):
+            # Older results are shortened once all of them exceed the budget
+            compact_tool_messages(messages, budget("tool_results"))
             response = await llm_client.chat(messages, tools=tool_defs)
             assistant_msg = response.choices[0].message
 
             if not assistant_msg.tool_calls:
-                # LLM is done exploring — append its final message
-                messages.append({"role": "assistant", "content": assistant_msg.content or ""})
+                # LLM is done exploring; its final message is the exploration notes
+                notes = assistant_msg.content or ""
                 break
 
             # Append the assistant message with tool calls
@@ -92,35 +195,31 @@ class ExploreStep(PipelineStep):
                 }
             )
 
-            # Execute each tool call and append results
-            for tc in assistant_msg.tool_calls:
-                tool = tool_map.get(tc.function.name)
-                if tool is None:
-                    result = {"error": f"Unknown tool: {tc.function.name}"}
-                else:
-                    try:
-                        params = json.loads(tc.function.arguments)
-                        result = await tool.execute(params)
-                    except Exception as e:
-                        result = {"error": str(e)}
-
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tc.id,
-                        "content": json.dumps(result, default=str),
-                    }
-                )
-
-        # Ask the LLM to summarize the exploration
-        messages.append(
-            {
-                "role": "user",
-                "content": (
-                    "Summarize the data exploration you just performed. "
-                    "Include all queries executed, the raw data gathered, "
-                    "exploration notes, and the schema context discovered."
-                ),
-            }
-        )
-        return await llm_client.chat_json(messages, ExploreOutput, tools=tool_defs)
+            # Execute the tool calls concurrently and append results in call order
+            results = await asyncio.gather(
+                *(self._run_tool_call(tc, tool_map) for tc in assistant_msg.tool_calls)
+            )
+            for tc, (result, content) in zip(assistant_msg.tool_calls, results):
+                calls.append(RecordedCall(tc.function.name, _arguments(tc), result))
+                messages.append({"role": "tool", "tool_call_id": tc.id, "content": content})
+
+        if not notes.strip():
+            # The loop ran out of iterations (or ended silently); ask only for the notes
+            compact_tool_messages(messages, budget("tool_results"))
+            messages.append(
+                {
+                    "role": "user",
+                    "content": (
+                        "Stop calling tools. In a few sentences, note what the data "
+                        "gathered above shows and any caveats."
+                    ),
+                }
+            )
+            # Tools stay in the request to keep its prompt-cache prefix, but may not be called
+            response = await llm_client.chat(
+                messages, tools=tool_defs, tool_choice="none", route="summary"
+            )
+            notes = response.choices[0].message.content or fallback_notes(calls)
+
+        # Queries, raw data and schema context come straight from the recorded calls
+        return build_explore_output(calls, notes, input_data.get("schema_context"))
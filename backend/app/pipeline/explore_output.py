@@ -0,0 +1,114 @@
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from app.schemas.api import ExploreOutput, QueryExecuted
+from app.tools.result_format import ColumnarResult
+
+# Single-row results with at most this many columns are quoted in query summaries
+_INLINE_COLUMNS = 5
+
+
+@dataclass
+class RecordedCall:
+    """A tool call made during exploration, with its result."""
+
+    tool: str
+    arguments: dict
+    result: Any
+
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, dict) and "error" in result
+
+
+def _rows(result: ColumnarResult) -> list[dict]:
+    return [dict(zip(result.columns, row)) for row in result.rows]
+
+
+def _data(result: Any) -> Any:
+    return _rows(result) if isinstance(result, ColumnarResult) else result
+
+
+def summarize_result(result: Any) -> str:
+    """One-line description of a query result for ``queries_executed``."""
+    if _is_error(result):
+        return f"Error: {result['error']}"
+    if not isinstance(result, ColumnarResult):
+        return json.dumps(result, default=str)[:200]
+    if result.row_count == 1 and len(result.columns) <= _INLINE_COLUMNS:
+        return "1 row: " + ", ".join(f"{key}={value}" for key, value in _rows(result)[0].items())
+    summary = f"{result.row_count} rows"
+    if result.truncated:
+        summary += " (truncated)"
+    return f"{summary}; columns: {', '.join(result.columns)}"
+
+
+def fallback_notes(calls: list[RecordedCall]) -> str:
+    """Plain notes listing what the calls found, for when the LLM wrote none."""
+    queries = [call for call in calls if call.tool == "query"]
+    if not queries:
+        return f"Exploration made {len(calls)} tool calls but ran no queries."
+    lines = [f"{call.arguments.get('sql', '')} -> {summarize_result(call.result)}" for call in queries]
+    return "Queries run (no notes were written):\n" + "\n".join(lines)
+
+
+def _add_columns(schema: dict[str, list[str]], table: str, columns: list[str]) -> None:
+    known = schema.setdefault(table, [])
+    known.extend(column for column in columns if column not in known)
+
+
+def add_schema(schema: dict[str, list[str]], call: RecordedCall) -> None:
+    """Add the table columns a schema, sample or profile call revealed to ``schema``."""
+    result = call.result
+    if isinstance(result, ColumnarResult):
+        if result.table is not None:
+            _add_columns(schema, result.table, result.columns)
+    elif not isinstance(result, dict) or _is_error(result):
+        return
+    elif call.tool == "describe_tables":
+        for table in result.get("tables", []):
+            _add_columns(schema, table["table"], [column["name"] for column in table["columns"]])
+    elif call.tool == "show_schema":
+        _add_columns(schema, result["table"], [column["column_name"] for column in result["columns"]])
+    elif call.tool == "profile_table":
+        _add_columns(schema, result["table"], list(result["columns"]))
+
+
+def build_explore_output(
+    calls: list[RecordedCall], notes: str, schema_context: dict | None = None
+) -> ExploreOutput:
+    """Assemble the explore step's output from the tool calls it made.
+
+    Every ``query`` call is listed with a summary of its result. Raw data is
+    the rows of the successful queries (a list of rows for one query, a list
+    of {"sql", "rows"} for several) or, when no query succeeded, the last
+    successful tool result. The schema context extends ``schema_context``
+    with the columns of every table that was described, sampled or profiled.
+    """
+    queries = []
+    query_results = []
+    schema = {table: list(columns) for table, columns in (schema_context or {}).items()}
+    for call in calls:
+        if call.tool == "query":
+            sql = str(call.arguments.get("sql", ""))
+            queries.append(QueryExecuted(sql=sql, result_summary=summarize_result(call.result)))
+            if isinstance(call.result, ColumnarResult):
+                query_results.append((sql, call.result))
+        else:
+            add_schema(schema, call)
+
+    if len(query_results) == 1:
+        raw_data: Any = _rows(query_results[0][1])
+    elif query_results:
+        raw_data = [{"sql": sql, "rows": _rows(result)} for sql, result in query_results]
+    else:
+        successful = [call.result for call in calls if not _is_error(call.result)]
+        raw_data = _data(successful[-1]) if successful else []
+
+    return ExploreOutput(
+        queries_executed=queries,
+        raw_data=raw_data,
+        exploration_notes=notes,
+        schema_context=schema,
+    )
@@ -1,8 +1,14 @@
+import asyncio
 import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import datetime
 
+from pydantic import BaseModel
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import AppSession
 from app.services import events
 from app.models.app import Conversation, PipelineRun
@@ -11,15 +17,45 @@ from app.pipeline.answer import AnswerStep
 from app.pipeline.base import PipelineStep
 from app.pipeline.explore import ExploreStep
 from app.pipeline.plan import PlanStep
+from app.pipeline.prefetch import PrefetchedCall, prefetch_schema
 from app.schemas.api import AnswerOutput
 from app.services.llm import LLMClient
-from app.tools import ListTablesTool, QueryTool, SampleDataTool, ShowSchemaTool
+from app.tools import (
+    DescribeTablesTool,
+    ListTablesTool,
+    ProfileTableTool,
+    QueryTool,
+    SampleDataTool,
+    ShowSchemaTool,
+)
+from app.tools.profile_table import profiles_for_prompt
+from app.tools.value_dictionary import value_hints_for_prompt
+
+
+@dataclass
+class StepCheckpoint:
+    """A completed step's persisted input and output, reused when a run is retried."""
+
+    input_json: dict | None
+    output_json: dict
+    models: dict | None = None
+
+
+def step_checkpoints(steps: Iterable[PipelineStepModel]) -> dict[str, StepCheckpoint]:
+    """Checkpoints of the steps that completed before the first failed or unfinished one."""
+    checkpoints = {}
+    for step in sorted(steps, key=lambda s: s.step_order):
+        if step.status != "completed" or step.output_json is None:
+            break
+        checkpoints[step.step_name] = StepCheckpoint(step.input_json, step.output_json, step.models)
+    return checkpoints
 
 
 class Pipeline:
     """Orchestrates the multi-step pipeline: plan → explore → answer.
 
     For each step:
+    - Reuse the output of a checkpoint from the run being retried, if any
     - Load input from prior step output or initial context
     - Execute step with retry logic
     - Persist step input/output to pipeline_steps table
@@ -36,17 +72,62 @@ class Pipeline:
         user_question: str,
         conversation_history: list[dict] | None = None,
         schema_context: dict | None = None,
+        checkpoints: dict[str, StepCheckpoint] | None = None,
     ) -> AnswerOutput:
-        """Run the full pipeline and return the final answer."""
+        """Run the full pipeline and return the final answer.
+
+        Steps with an entry in ``checkpoints`` (see step_checkpoints) are not
+        run again; their earlier output is copied into the new run.
+        """
         history = conversation_history or []
-        llm_client = LLMClient()
+        checkpoints = checkpoints or {}
+        llm_client = LLMClient(conversation=str(self.conversation_id))
         available_tools = [
             ListTablesTool(),
             ShowSchemaTool(),
+            DescribeTablesTool(),
+            ProfileTableTool(),
             SampleDataTool(),
             QueryTool(),
         ]
+        prefetch = None
+        prefetched: list[PrefetchedCall] = []
+        if settings.SCHEMA_PREFETCH and "explore" not in checkpoints:
+            # Overlaps schema lookups with the plan step's LLM call
+            prefetch = asyncio.create_task(
+                prefetch_schema(user_question, schema_context, available_tools, prefetched)
+            )
+        try:
+            return await self._run(
+                user_question,
+                history,
+                schema_context,
+                llm_client,
+                available_tools,
+                prefetch,
+                prefetched,
+                checkpoints,
+            )
+        finally:
+            if prefetch is not None:
+                prefetch.cancel()
+
+    async def _run(
+        self,
+        user_question: str,
+        history: list[dict],
+        schema_context: dict | None,
+        llm_client: LLMClient,
+        available_tools: list,
+        prefetch: asyncio.Task | None,
+        prefetched: list[PrefetchedCall],
+        checkpoints: dict[str, StepCheckpoint],
+    ) -> AnswerOutput:
+        """Run and persist the steps.
 
+        ``prefetch`` fills ``prefetched`` as its calls finish; explore is
+        seeded with whatever has finished by the time it starts.
+        """
         async with AppSession() as session:
             # Create pipeline run
             pipeline_run = PipelineRun(
@@ -62,6 +143,11 @@ class Pipeline:
             answer_output: AnswerOutput | None = None
 
             try:
+                value_hints = None
+                # Hints only feed the plan and explore prompts
+                if settings.VALUE_HINTS_IN_PROMPTS and not {"plan", "explore"} <= checkpoints.keys():
+                    value_hints = await value_hints_for_prompt(user_question, list(schema_context or {}))
+
                 # Determine which steps to run
                 active_steps: list[PipelineStep] = list(self.steps)  # [plan, explore, answer]
 
@@ -70,6 +156,17 @@ class Pipeline:
                     if step.name == "explore" and plan_output and plan_output.skip_explore:
                         continue
 
+                    checkpoint = checkpoints.get(step.name)
+                    if checkpoint is not None:
+                        result = await self._reuse(session, pipeline_run, step, step_order, checkpoint)
+                        if step.name == "plan":
+                            plan_output = result
+                        elif step.name == "explore":
+                            explore_output = result
+                        elif step.name == "answer":
+                            answer_output = result
+                        continue
+
                     # Build input data for each step
                     if step.name == "plan":
                         input_data = {
@@ -77,11 +174,25 @@ class Pipeline:
                             "history": history,
                             "schema_context": schema_context,
                         }
+                        if settings.PROFILE_IN_PLAN_PROMPT:
+                            input_data["column_profiles"] = await profiles_for_prompt(
+                                list(schema_context or {})
+                            )
+                        if value_hints:
+                            input_data["value_hints"] = value_hints
                     elif step.name == "explore":
                         input_data = {
                             "plan": plan_output.model_dump(),
                             "available_tools": available_tools,
+                            "schema_context": schema_context,
                         }
+                        if value_hints:
+                            input_data["value_hints"] = value_hints
+                        if prefetch is not None:
+                            # Take what finished while the plan ran rather than wait for slow scans
+                            await asyncio.wait({prefetch}, timeout=settings.SCHEMA_PREFETCH_WAIT_SECONDS)
+                            prefetch.cancel()
+                            input_data["prefetched"] = list(prefetched)
                     elif step.name == "answer":
                         input_data = {
                             "question": user_question,
@@ -89,6 +200,8 @@ class Pipeline:
                             "exploration": explore_output.model_dump() if explore_output else None,
                             "history": history,
                         }
+                        if settings.ANSWER_STREAMING:
+                            input_data["conversation_id"] = str(self.conversation_id)
                     else:
                         raise ValueError(f"Unknown step: {step.name}")
 
@@ -96,7 +209,7 @@ class Pipeline:
                     serializable_input = {
                         k: v
                         for k, v in input_data.items()
-                        if k != "available_tools"
+                        if k not in ("available_tools", "prefetched")
                     }
                     step_record = PipelineStepModel(
                         pipeline_run_id=pipeline_run.id,
@@ -119,6 +232,7 @@ class Pipeline:
 
                     # Persist result
                     step_record.output_json = result.model_dump()
+                    step_record.models = dict(llm_client.models_served.get(step.name, {}))
                     step_record.status = "completed"
                     step_record.completed_at = datetime.utcnow()
                     await session.commit()
@@ -169,7 +283,38 @@ class Pipeline:
                 if failed_step:
                     failed_step.status = "failed"
                     failed_step.error = str(exc)
+                    failed_step.models = dict(llm_client.models_served.get(failed_step.step_name, {}))
                     await session.commit()
                 raise
 
             return answer_output  # type: ignore[return-value]
+
+    async def _reuse(
+        self,
+        session: AsyncSession,
+        pipeline_run: PipelineRun,
+        step: PipelineStep,
+        step_order: int,
+        checkpoint: StepCheckpoint,
+    ) -> BaseModel:
+        """Copy a checkpointed step into this run and return its output without running it."""
+        result = step.output_schema.model_validate(checkpoint.output_json)
+        session.add(
+            PipelineStepModel(
+                pipeline_run_id=pipeline_run.id,
+                step_name=step.name,
+                step_order=step_order,
+                input_json=checkpoint.input_json,
+                output_json=checkpoint.output_json,
+                models=checkpoint.models,
+                status="completed",
+                # Not attempted again in this run
+                attempts=0,
+                completed_at=datetime.utcnow(),
+            )
+        )
+        await session.commit()
+        await events.emit(
+            str(self.conversation_id), {"step": step.name, "status": "completed", "resumed": True}
+        )
+        return result
@@ -1,8 +1,45 @@
+import logging
 from typing import Any
 
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
 from app.pipeline.base import PipelineStep
+from app.pipeline.plan_cache import plan_cache
 from app.schemas.api import PlanOutput
 from app.services.llm import LLMClient
+from app.services.token_budget import budget, compact_history, fit_lines, truncate_text
+from app.tools.catalog import catalog
+from app.tools.value_dictionary import format_value_hints
+
+logger = logging.getLogger(__name__)
+
+
+def _format_profile(table: str, profile: dict) -> str:
+    """One compact line per column: type, nulls, distinct count, range and top values."""
+    lines = [f"- {table} ({profile['rows_scanned']} rows profiled):"]
+    for name, col in profile["columns"].items():
+        parts = [col["type"], f"~{col['distinct_estimate']} distinct"]
+        if col["null_fraction"]:
+            parts.append(f"{col['null_fraction']:.0%} null")
+        if "min" in col:
+            parts.append(f"range {col['min']} to {col['max']}")
+        if "quantiles" in col:
+            parts.append(f"median {col['quantiles']['p50']}")
+        if "top_values" in col:
+            parts.append("top: " + ", ".join(str(v["value"]) for v in col["top_values"]))
+        lines.append(f"    {name}: {'; '.join(parts)}")
+    return "\n".join(lines)
+
+
+async def _schema_fingerprint() -> str | None:
+    """Fingerprint of the target schema, or None if the catalog cannot be read."""
+    try:
+        await catalog.snapshot()
+    except (SQLAlchemyError, OSError):
+        logger.warning("Could not read the target schema fingerprint", exc_info=True)
+        return None
+    return catalog.fingerprint
 
 
 class PlanStep(PipelineStep):
@@ -38,6 +75,17 @@ class PlanStep(PipelineStep):
         question: str = input_data["question"]
         history: list[dict] = input_data.get("history", [])
         schema_context: dict | None = input_data.get("schema_context")
+        column_profiles: dict | None = input_data.get("column_profiles")
+        value_hints: list[dict] | None = input_data.get("value_hints")
+
+        # Only first messages are cached: with history, the plan depends on the conversation
+        fingerprint = None
+        if settings.PLAN_CACHE_ENABLED and not history and not input_data.get("_last_error"):
+            fingerprint = await _schema_fingerprint()
+        if fingerprint is not None:
+            hit = plan_cache.lookup(question, fingerprint)
+            if hit is not None:
+                return hit[0].model_copy()
 
         system_content = self.system_prompt
         if schema_context:
@@ -49,16 +97,34 @@ class PlanStep(PipelineStep):
                     lines.append(f"- {table}: {', '.join(cols.keys())}")
                 else:
                     lines.append(f"- {table}: {cols}")
+            lines = fit_lines(lines, budget("schema"), "tables")
             system_content += "\n\nAvailable database schema:\n" + "\n".join(lines)
 
+        if column_profiles:
+            profile_lines = "\n".join(
+                _format_profile(table, profile) for table, profile in column_profiles.items()
+            ).split("\n")
+            profile_lines = fit_lines(profile_lines, budget("schema"), "columns")
+            system_content += "\n\nColumn profiles:\n" + "\n".join(profile_lines)
+
+        system_content = truncate_text(system_content, budget("system"))
+
+        # Per-question context goes last so the system prompt stays a stable cached prefix
+        context = []
+        if value_hints:
+            context.append(format_value_hints(value_hints))
         if input_data.get("_last_error"):
-            system_content += (
-                f"\n\nYour previous response had a validation error: {input_data['_last_error']}"
+            context.append(
+                f"Your previous response had a validation error: {input_data['_last_error']}"
                 "\nPlease correct your output."
             )
+        user_content = "\n\n".join([*context, f"Question: {question}"]) if context else question
 
         messages: list[dict] = [{"role": "system", "content": system_content}]
-        messages.extend(history)
-        messages.append({"role": "user", "content": question})
+        messages.extend(await compact_history(history, budget("history")))
+        messages.append({"role": "user", "content": user_content})
 
-        return await llm_client.chat_json(messages, PlanOutput)
+        plan = await llm_client.chat_json(messages, PlanOutput)
+        if fingerprint is not None:
+            plan_cache.add(question, fingerprint, plan)
+        return plan
@@ -0,0 +1,135 @@
+import math
+import re
+from collections import Counter, OrderedDict
+
+from app.config import settings
+from app.schemas.api import PlanOutput
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are by can do does for from give have has i in is it list me of on "
+    "per please show tell that the their there to us was were what which who with you".split()
+)
+
+# Paraphrases of ranking direction map to one token so they compare equal
+_SYNONYMS = {
+    "highest": "top",
+    "largest": "top",
+    "biggest": "top",
+    "most": "top",
+    "best": "top",
+    "lowest": "bottom",
+    "smallest": "bottom",
+    "least": "bottom",
+    "fewest": "bottom",
+    "worst": "bottom",
+}
+
+def _tokens(question: str) -> list[str]:
+    words = _WORD.findall(question.lower())
+    return [_SYNONYMS.get(word, word) for word in words if word not in _STOPWORDS]
+
+
+def _features(tokens: list[str]) -> Counter:
+    """Word unigrams and bigrams plus character trigrams (which absorb plurals and typos)."""
+    features: Counter = Counter()
+    for token in tokens:
+        features["w:" + token] += 1
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            features["c:" + padded[i : i + 3]] += 1
+    for left, right in zip(tokens, tokens[1:]):
+        features[f"b:{left} {right}"] += 1
+    return features
+
+
+def _singular(token: str) -> str:
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s") and not token.endswith("ss") and len(token) > 3:
+        return token[:-1]
+    return token
+
+
+def _guard(tokens: list[str]) -> frozenset[str]:
+    """Content words (singular) that must match exactly for two questions to share a plan.
+
+    Similarity alone cannot tell "fintech companies" from "healthcare
+    companies" in a long question, so every entity, number and direction
+    word has to be the same; only stopwords, ranking synonyms, plurals and
+    word order may differ.
+    """
+    return frozenset(_singular(token) for token in tokens)
+
+
+class PlanCache:
+    """Similarity index of first-message questions to the plans made for them.
+
+    Questions are vectorized locally with TF-IDF over word and character
+    n-grams and compared by cosine similarity, so no embedding service is
+    needed. A cached plan is reused only for the same target schema
+    fingerprint, at or above ``threshold``, and when both questions use the
+    same content words ("top 5" never matches "top 10" or "bottom 5", and
+    "fintech companies" never matches "healthcare companies").
+    """
+
+    def __init__(self, threshold: float, max_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[Counter, frozenset[str], PlanOutput]] = (
+            OrderedDict()
+        )
+        self._document_frequency: Counter = Counter()
+        self.hits = 0
+        self.misses = 0
+
+    def _idf(self, feature: str) -> float:
+        return math.log((1 + len(self._entries)) / (1 + self._document_frequency[feature])) + 1
+
+    def _weights(self, features: Counter) -> tuple[dict[str, float], float]:
+        weights = {feature: count * self._idf(feature) for feature, count in features.items()}
+        return weights, math.sqrt(sum(w * w for w in weights.values()))
+
+    def lookup(self, question: str, fingerprint: str) -> tuple[PlanOutput, float] | None:
+        """Return the best cached plan and its similarity, or None below the threshold."""
+        tokens = _tokens(question)
+        guard = _guard(tokens)
+        query, query_norm = self._weights(_features(tokens))
+        best: tuple[PlanOutput, float] | None = None
+        if query_norm:
+            for (entry_fingerprint, _), (features, entry_guard, plan) in self._entries.items():
+                if entry_fingerprint != fingerprint or entry_guard != guard:
+                    continue
+                weights, norm = self._weights(features)
+                dot = sum(w * weights.get(feature, 0.0) for feature, w in query.items())
+                score = dot / (query_norm * norm) if norm else 0.0
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (plan, score)
+        if best is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return best
+
+    def add(self, question: str, fingerprint: str, plan: PlanOutput) -> None:
+        key = (fingerprint, " ".join(_WORD.findall(question.lower())))
+        if key in self._entries:
+            self._remove(key)
+        tokens = _tokens(question)
+        features = _features(tokens)
+        self._entries[key] = (features, _guard(tokens), plan)
+        self._document_frequency.update(features.keys())
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        features, _, _ = self._entries.pop(key)
+        self._document_frequency.subtract(features.keys())
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._document_frequency.clear()
+
+
+plan_cache = PlanCache(settings.PLAN_CACHE_THRESHOLD, settings.PLAN_CACHE_MAX_ENTRIES)
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+
+from app.config import settings
+from app.database import target_tool_slots
+from app.pipeline.explore_output import RecordedCall
+from app.tools.base import Tool
+from app.tools.catalog import catalog
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class PrefetchedCall(RecordedCall):
+    """A tool call made ahead of the explore step, and the tables it covers."""
+
+    tables: list[str]
+
+
+def _stem(word: str) -> str:
+    """Crude singular form, so "companies" matches "company"."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _stems(text: str) -> set[str]:
+    return {_stem(word) for word in _WORD.findall(text.lower())}
+
+
+def likely_tables(question: str, schema_context: dict | None, tables: dict[str, dict]) -> list[str]:
+    """Tables the question probably needs, best first, at most SCHEMA_PREFETCH_MAX_TABLES.
+
+    Tables from the conversation's schema context come first; the rest are
+    ranked by question words matching their name (weighted) or column names.
+    """
+    words = _stems(question)
+    scores: dict[str, int] = {}
+    for name, info in tables.items():
+        score = 2 * len(words & _stems(name.replace("_", " ")))
+        for column in info["columns"]:
+            if words & _stems(column["name"].replace("_", " ")):
+                score += 1
+        if score:
+            scores[name] = score
+    known = [name for name in schema_context or {} if name in tables]
+    ranked = sorted((name for name in scores if name not in known), key=lambda name: (-scores[name], name))
+    return [*known, *ranked][: settings.SCHEMA_PREFETCH_MAX_TABLES]
+
+
+async def _call(
+    tool: Tool, arguments: dict, tables: list[str], finished: list[PrefetchedCall]
+) -> PrefetchedCall:
+    async with target_tool_slots:
+        result = await tool.execute(arguments)
+    call = PrefetchedCall(tool.name, arguments, result, tables)
+    finished.append(call)
+    return call
+
+
+async def prefetch_schema(
+    question: str,
+    schema_context: dict | None,
+    tools: list[Tool],
+    finished: list[PrefetchedCall] | None = None,
+) -> list[PrefetchedCall]:
+    """Describe, sample and profile the likely tables for a question, best-effort.
+
+    Meant to run while the plan step's LLM call is in flight. Calls go
+    through the same tools (and caches) the explore step uses; failed calls
+    are logged and left out. Each successful call is also appended to
+    ``finished`` as it completes, so a caller that will not wait for the
+    rest can take what is ready and cancel the task.
+    """
+    if finished is None:
+        finished = []
+    tool_map = {tool.name: tool for tool in tools}
+    try:
+        tables = likely_tables(question, schema_context, await catalog.snapshot())
+    except Exception:
+        logger.warning("Could not load the catalog for schema prefetch", exc_info=True)
+        return []
+    if not tables:
+        return []
+
+    calls = []
+    if "describe_tables" in tool_map:
+        calls.append(_call(tool_map["describe_tables"], {"tables": tables}, tables, finished))
+    for table in tables:
+        if "sample_data" in tool_map:
+            calls.append(_call(tool_map["sample_data"], {"table": table, "limit": 5}, [table], finished))
+        if "profile_table" in tool_map:
+            calls.append(_call(tool_map["profile_table"], {"table": table}, [table], finished))
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    prefetched = []
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.warning("Schema prefetch call failed: %s", result)
+            continue
+        prefetched.append(result)
+    return prefetched
@@ -20,6 +20,7 @@ from app.schemas.api import (
     SendMessageRequest,
 )
 from app.services import events
+from app.services.token_budget import budget, fit_field
 
 router = APIRouter(prefix="/api/conversations", tags=["conversations"])
 
@@ -129,11 +130,15 @@ async def send_message(conversation_id: uuid.UUID, req: SendMessageRequest, curr
                 i for i in range(len(history) - 1, -1, -1)
                 if history[i]["role"] == "assistant"
             )
+            # Large results are sampled so they fit the history budget
+            data_budget = budget("history") // 2
             extra = ""
             if last_assistant.chart_data:
-                extra += f"\n\n[Chart data: {json.dumps(last_assistant.chart_data)}]"
+                chart = fit_field(last_assistant.chart_data, "data", data_budget)
+                extra += f"\n\n[Chart data: {json.dumps(chart)}]"
             if last_assistant.table_data:
-                extra += f"\n\n[Table data: {json.dumps(last_assistant.table_data)}]"
+                table = fit_field(last_assistant.table_data, "rows", data_budget)
+                extra += f"\n\n[Table data: {json.dumps(table)}]"
             if extra:
                 history[last_idx]["content"] += extra
 
@@ -203,6 +208,8 @@ async def send_message(conversation_id: uuid.UUID, req: SendMessageRequest, curr
                             "name": step.step_name,
                             "status": step.status,
                         }
+                        if step.models:
+                            step_info["models"] = step.models
                         if step.step_name == "plan" and step.output_json:
                             reasoning = step.output_json.get("reasoning", "")
                             strategy = step.output_json.get("query_strategy", "")
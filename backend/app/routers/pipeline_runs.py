@@ -8,7 +8,7 @@ from sqlalchemy.orm import selectinload
 from app.auth import get_current_user
 from app.database import AppSession
 from app.models.app import Message, PipelineRun
-from app.pipeline.orchestrator import Pipeline
+from app.pipeline.orchestrator import Pipeline, step_checkpoints
 from app.schemas.api import PipelineRunResponse
 
 router = APIRouter(prefix="/api/pipeline-runs", tags=["pipeline-runs"])
@@ -16,7 +16,12 @@ router = APIRouter(prefix="/api/pipeline-runs", tags=["pipeline-runs"])
 
 @router.post("/{run_id}/retry", response_model=PipelineRunResponse)
 async def retry_pipeline_run(run_id: uuid.UUID, current_user: str = Depends(get_current_user)):
-    """Retry a failed pipeline run."""
+    """Retry a failed pipeline run, resuming from its first failed or unfinished step.
+
+    The retry reuses the original conversation history and schema context
+    (persisted as the plan step's input) and the outputs of the steps that
+    had already completed.
+    """
     async with AppSession() as session:
         result = await session.execute(
             select(PipelineRun)
@@ -49,11 +54,18 @@ async def retry_pipeline_run(run_id: uuid.UUID, current_user: str = Depends(get_
             raise HTTPException(status_code=400, detail="Original user message not found")
 
         question = user_msg.content
+        checkpoints = step_checkpoints(run.steps)
+        plan_input = next(
+            (step.input_json for step in run.steps if step.step_name == "plan" and step.input_json),
+            {},
+        )
+        history = plan_input.get("history") or []
+        schema_context = plan_input.get("schema_context")
 
         # Run pipeline in background with a new pipeline run
         async def _retry():
             pipeline = Pipeline(message.conversation_id, message.id)
-            answer = await pipeline.run(question)
+            answer = await pipeline.run(question, history, schema_context, checkpoints)
             async with AppSession() as bg_session:
                 result = await bg_session.execute(
                     select(Message).where(Message.id == message.id)
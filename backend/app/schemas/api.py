@@ -121,6 +121,7 @@ class PipelineStepResponse(BaseModel):
     status: str
     attempts: int
     error: str | None = None
+    models: dict[str, int] | None = None
     created_at: datetime
     completed_at: datetime | None = None
 
@@ -0,0 +1,185 @@
+import json
+from typing import Any
+
+Path = tuple[str | int, ...]
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = _WHITESPACE + ",}]"
+
+
+class JSONStreamParser:
+    """Incremental parser for one JSON document arriving in arbitrary chunks.
+
+    ``feed`` returns the events completed by each chunk:
+
+    - ``("delta", path, text)``: more characters of the string at ``path``,
+      decoded, as soon as they arrive;
+    - ``("value", path, value)``: a complete value at ``path`` (strings,
+      numbers, literals, and whole objects or arrays once they close).
+
+    Paths are tuples of object keys and array indexes from the root, so a
+    table row is ``("table_data", "rows", 3)``. Text before the root value
+    (such as a markdown code fence) and after it is ignored. Malformed input
+    raises ValueError; the caller still validates the full text afterwards.
+    """
+
+    def __init__(self):
+        # Open containers: [container, path, pending key, expecting]
+        self._stack: list[list[Any]] = []
+        self._started = False
+        self.done = False
+        self._in_string = False
+        self._string_is_key = False
+        self._chars: list[str] = []
+        self._emitted = 0
+        self._escape: str | None = None
+        self._high_surrogate: int | None = None
+        self._scalar: list[str] | None = None
+        self._events: list[tuple[str, Path, Any]] = []
+
+    def feed(self, chunk: str) -> list[tuple[str, Path, Any]]:
+        for char in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                self._string_char(char)
+            elif self._scalar is not None and char not in _SCALAR_END:
+                self._scalar.append(char)
+            else:
+                if self._scalar is not None:
+                    self._finish_scalar()
+                self._structural(char)
+        if self._in_string and not self._string_is_key:
+            self._flush_delta()
+        events, self._events = self._events, []
+        return events
+
+    def _string_char(self, char: str) -> None:
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] != "u":
+                if char not in _ESCAPES:
+                    raise ValueError(f"Invalid escape: \\{char}")
+                self._add_char(_ESCAPES[char])
+                self._escape = None
+            elif len(self._escape) == 5:
+                self._add_codepoint(int(self._escape[1:], 16))
+                self._escape = None
+        elif char == "\\":
+            self._escape = ""
+        elif char == '"':
+            if self._high_surrogate is not None:
+                self._chars.append(chr(self._high_surrogate))
+                self._high_surrogate = None
+            self._in_string = False
+            value = "".join(self._chars)
+            if self._string_is_key:
+                self._stack[-1][2] = value
+                self._stack[-1][3] = ":"
+            else:
+                self._flush_delta()
+                self._complete(value)
+        else:
+            self._add_char(char)
+
+    def _add_codepoint(self, code: int) -> None:
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+        self._add_char(chr(code))
+
+    def _add_char(self, char: str) -> None:
+        if self._high_surrogate is not None:
+            self._chars.append(chr(self._high_surrogate))
+            self._high_surrogate = None
+        self._chars.append(char)
+
+    def _flush_delta(self) -> None:
+        if len(self._chars) > self._emitted:
+            text = "".join(self._chars[self._emitted :])
+            self._emitted = len(self._chars)
+            self._events.append(("delta", self._value_path(), text))
+
+    def _value_path(self) -> Path:
+        if not self._stack:
+            return ()
+        container, path, key, _ = self._stack[-1]
+        return path + ((len(container),) if isinstance(container, list) else (key,))
+
+    def _structural(self, char: str) -> None:
+        if char in _WHITESPACE:
+            return
+        if not self._started:
+            # Skip anything before the root value, e.g. "```json"
+            if char not in "{[":
+                return
+            self._started = True
+        expecting = self._stack[-1][3] if self._stack else "value"
+        if expecting == "key":
+            if char == '"':
+                self._start_string(key=True)
+            elif char == "}" and not self._stack[-1][0]:
+                self._close("}")
+            else:
+                raise ValueError(f"Expected an object key, got {char!r}")
+        elif expecting == ":":
+            if char != ":":
+                raise ValueError(f"Expected ':', got {char!r}")
+            self._stack[-1][3] = "value"
+        elif expecting == "next":
+            if char == ",":
+                self._stack[-1][3] = "key" if isinstance(self._stack[-1][0], dict) else "value"
+            elif char in "}]":
+                self._close(char)
+            else:
+                raise ValueError(f"Expected ',' or a closing bracket, got {char!r}")
+        elif char == "]" and self._stack and self._stack[-1][0] == []:
+            self._close("]")
+        elif char == '"':
+            self._start_string(key=False)
+        elif char in "{[":
+            container: dict | list = {} if char == "{" else []
+            self._stack.append([container, self._value_path(), None, "key" if char == "{" else "value"])
+        elif char in ",:}]":
+            raise ValueError(f"Unexpected {char!r}")
+        else:
+            self._scalar = [char]
+
+    def _start_string(self, key: bool) -> None:
+        self._in_string = True
+        self._string_is_key = key
+        self._chars = []
+        self._emitted = 0
+
+    def _finish_scalar(self) -> None:
+        token = "".join(self._scalar or [])
+        self._scalar = None
+        try:
+            value = json.loads(token)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON value: {token!r}") from exc
+        self._complete(value)
+
+    def _close(self, char: str) -> None:
+        container, _, _, _ = self._stack[-1]
+        if (char == "}") != isinstance(container, dict):
+            raise ValueError(f"Mismatched {char!r}")
+        self._stack.pop()
+        self._complete(container)
+
+    def _complete(self, value: Any) -> None:
+        path = self._value_path()
+        self._events.append(("value", path, value))
+        if not self._stack:
+            self.done = True
+            return
+        frame = self._stack[-1]
+        if isinstance(frame[0], dict):
+            frame[0][frame[2]] = value
+        else:
+            frame[0].append(value)
+        frame[3] = "next"
@@ -1,53 +1,611 @@
+import asyncio
+import functools
+import importlib.util
 import json
+import logging
+import time
+from collections import Counter, OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
 
+import httpx
 import litellm
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 
 from app.config import settings
+from app.services.json_stream import JSONStreamParser, Path
+from app.services.llm_cache import cache_key, llm_cache
+from app.services.structured_output import (
+    STRUCTURED_MODES,
+    StructuredSchema,
+    parse_structured,
+    structured_schema,
+)
+from app.services.token_budget import count_tokens, message_tokens
 
+logger = logging.getLogger(__name__)
 
-class LLMClient:
-    """Wrapper around LiteLLM for calling the LLM proxy."""
+# Name of the pipeline step making LLM calls in the current task, if any
+current_step: ContextVar[str | None] = ContextVar("current_step", default=None)
+# Set by execute_with_retry after an attempt fails validation, so retries escalate
+escalated: ContextVar[bool] = ContextVar("escalated", default=False)
+
+
+class LLMTransport:
+    """Application-lifetime HTTP connection pool to the LLM proxy.
+
+    One keep-alive pool (HTTP/2 when h2 is installed) is shared by every
+    pipeline's LLM calls and the health probe, so connection setup is paid
+    once rather than per request. It is created lazily and closed on shutdown.
+    """
 
     def __init__(self):
+        self._http: httpx.AsyncClient | None = None
+        self._openai: AsyncOpenAI | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=httpx.Timeout(
+                    settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                    connect=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+                ),
+            )
+            self._openai = None
+        return self._http
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        """OpenAI-compatible client for the proxy, passed to litellm as ``client``."""
+        http = self.http
+        if self._openai is None:
+            self._openai = AsyncOpenAI(
+                base_url=settings.LITELLM_PROXY_URL,
+                api_key=settings.LITELLM_API_KEY or "unused",
+                http_client=http,
+            )
+        return self._openai
+
+    async def probe(self, timeout: float = 5.0) -> httpx.Response:
+        """GET the proxy's health endpoint over the shared pool."""
+        return await self.http.get(
+            f"{settings.LITELLM_PROXY_URL.rstrip('/')}/health",
+            headers={"Authorization": f"Bearer {settings.LITELLM_API_KEY}"},
+            timeout=timeout,
+        )
+
+    async def warm_up(self) -> None:
+        """Resolve, connect and handshake with the proxy ahead of the first question."""
+        try:
+            await self.probe()
+        except httpx.HTTPError as exc:
+            logger.warning("LLM proxy warm-up failed: %s", exc)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._openai = None
+
+
+llm_transport = LLMTransport()
+
+# Scheduler priority classes, most urgent first. Calls from steps not listed
+# here, or made outside a pipeline, are background work.
+PRIORITY_CLASSES = ("answer", "plan", "explore", "background")
+
+
+def _priority(step: str | None) -> int:
+    return PRIORITY_CLASSES.index(step) if step in PRIORITY_CLASSES[:-1] else len(PRIORITY_CLASSES) - 1
+
+
+def estimate_tokens(messages: list[dict], tools: Any = None, max_tokens: int | None = None) -> int:
+    """Size of a call for rate limiting: estimated prompt tokens plus the completion."""
+    prompt = message_tokens(messages)
+    if tools:
+        prompt += count_tokens(json.dumps(tools, default=str))
+    return prompt + (max_tokens or settings.LLM_EXPECTED_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    """Allows ``per_minute`` units per minute, refilled continuously; 0 means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.available = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(
+            self.per_minute, self.available + (now - self._updated) * self.per_minute / 60
+        )
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken; amounts above the limit wait for a full bucket."""
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill()
+        needed = min(amount, self.per_minute)
+        if self.available >= needed:
+            return 0.0
+        return (needed - self.available) * 60 / self.per_minute
+
+    def take(self, amount: float) -> None:
+        """Remove ``amount`` (may go negative; a negative amount refunds)."""
+        if self.per_minute > 0:
+            self._refill()
+            self.available -= amount
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    tokens: int
+    priority: int
+    conversation: str
+    enqueued_at: float
+
+
+class LLMReservation:
+    """A granted scheduler slot; ``settle`` corrects the token budget with actual usage."""
+
+    def __init__(self, bucket: TokenBucket, tokens: int):
+        self._bucket = bucket
+        self.tokens = tokens
+
+    def settle(self, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None)
+        if isinstance(total, int):
+            self._bucket.take(total - self.tokens)
+            self.tokens = total
+
+
+class LLMScheduler:
+    """Process-wide admission control for calls to the LLM proxy.
+
+    At most ``max_concurrent`` calls run at once, and calls start only while
+    the requests-per-minute and tokens-per-minute buckets allow. Waiting calls
+    are served strictly by priority class (from ``current_step``) and, within
+    a class, round-robin across conversations so one busy conversation cannot
+    hold up the others.
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: int, tokens_per_minute: int):
+        self.max_concurrent = max_concurrent
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._queues: list[OrderedDict[str, deque[_Waiter]]] = [
+            OrderedDict() for _ in PRIORITY_CLASSES
+        ]
+        self._active = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, tokens: int, conversation: str | None = None) -> AsyncIterator[LLMReservation]:
+        """Wait for a turn to call the LLM with about ``tokens`` tokens, and hold it."""
+        waiter = _Waiter(
+            future=asyncio.get_running_loop().create_future(),
+            tokens=tokens,
+            priority=_priority(current_step.get()),
+            conversation=conversation or "",
+            enqueued_at=time.monotonic(),
+        )
+        self._queues[waiter.priority].setdefault(waiter.conversation, deque()).append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                self._discard(waiter)
+            else:
+                # Granted just before the cancellation arrived
+                self._release()
+            raise
+        try:
+            yield LLMReservation(self.tokens, tokens)
+        finally:
+            self._release()
+
+    def _next(self) -> _Waiter | None:
+        for queues in self._queues:
+            while queues:
+                waiters = next(iter(queues.values()))
+                if not waiters[0].future.cancelled():
+                    return waiters[0]
+                self._discard(waiters[0])
+        return None
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._active < self.max_concurrent:
+            waiter = self._next()
+            if waiter is None:
+                return
+            delay = max(self.requests.delay(1), self.tokens.delay(waiter.tokens))
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            queues = self._queues[waiter.priority]
+            waiters = queues.pop(waiter.conversation)
+            waiters.popleft()
+            if waiters:
+                # Back of the line for this conversation's next call
+                queues[waiter.conversation] = waiters
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self._active += 1
+            wait = time.monotonic() - waiter.enqueued_at
+            self.granted += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            waiter.future.set_result(None)
+
+    def _discard(self, waiter: _Waiter) -> None:
+        queues = self._queues[waiter.priority]
+        waiters = queues.get(waiter.conversation)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del queues[waiter.conversation]
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queued": {
+                name: sum(len(waiters) for waiters in queues.values())
+                for name, queues in zip(PRIORITY_CLASSES, self._queues)
+            },
+            "granted": self.granted,
+            "avg_wait_seconds": round(self.total_wait / self.granted, 3) if self.granted else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+        }
+
+
+llm_scheduler = LLMScheduler(
+    settings.LLM_MAX_CONCURRENT_REQUESTS,
+    settings.LLM_REQUESTS_PER_MINUTE,
+    settings.LLM_TOKENS_PER_MINUTE,
+)
+
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+def with_cache_breakpoints(
+    messages: list[dict], tools: list[dict] | None
+) -> tuple[list[dict], list[dict] | None]:
+    """Mark stable prompt prefixes with cache_control for provider prompt caching.
+
+    Breakpoints go after the tool definitions, after the first system message
+    (steps keep it free of per-question text), and in tool-calling loops,
+    where every call resends the previous call's prompt, after the latest
+    message. Markers are message-level so content stays a plain string.
+    """
+    messages = list(messages)
+    if tools:
+        tools = [*tools[:-1], {**tools[-1], "cache_control": _EPHEMERAL}]
+    if messages and messages[0]["role"] == "system":
+        messages[0] = {**messages[0], "cache_control": _EPHEMERAL}
+    if tools and len(messages) > 1 and isinstance(messages[-1].get("content"), str):
+        messages[-1] = {**messages[-1], "cache_control": _EPHEMERAL}
+    return messages, tools
+
+
+def _usage_int(usage: Any, name: str) -> int | None:
+    value = getattr(usage, name, None)
+    return value if isinstance(value, int) else None
+
+
+class PromptCacheStats:
+    """Prompt tokens per pipeline step, and how many were read from or written to the provider cache."""
+
+    def __init__(self):
+        self._steps: dict[str, dict[str, int]] = {}
+
+    def record(self, step: str | None, usage: Any) -> None:
+        prompt = _usage_int(usage, "prompt_tokens")
+        if prompt is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        read = _usage_int(usage, "cache_read_input_tokens") or _usage_int(details, "cached_tokens") or 0
+        created = (
+            _usage_int(usage, "cache_creation_input_tokens")
+            or _usage_int(details, "cache_creation_tokens")
+            or 0
+        )
+        counts = self._steps.setdefault(
+            step or "background",
+            {"calls": 0, "prompt_tokens": 0, "cache_read_tokens": 0, "cache_creation_tokens": 0},
+        )
+        counts["calls"] += 1
+        counts["prompt_tokens"] += prompt
+        counts["cache_read_tokens"] += read
+        counts["cache_creation_tokens"] += created
+        logger.debug(
+            "LLM call (%s): %d prompt tokens, %d read from cache, %d written to cache",
+            step, prompt, read, created,
+        )
+
+    def stats(self) -> dict:
+        return {
+            step: {
+                **counts,
+                "hit_ratio": (
+                    round(counts["cache_read_tokens"] / counts["prompt_tokens"], 3)
+                    if counts["prompt_tokens"]
+                    else 0.0
+                ),
+            }
+            for step, counts in self._steps.items()
+        }
+
+    def clear(self) -> None:
+        self._steps.clear()
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+def route_model(step: str | None, route: str | None = None) -> str:
+    """Model for a call made by ``step``, from LLM_MODEL_ROUTES.
+
+    A "step:route" entry (e.g. "answer:scalar") wins over a "step" entry;
+    unrouted calls use LLM_MODEL. Escalated retries use
+    LLM_ESCALATION_MODEL when it is set.
+    """
+    if escalated.get() and settings.LLM_ESCALATION_MODEL:
+        return settings.LLM_ESCALATION_MODEL
+    routes = settings.LLM_MODEL_ROUTES
+    if step and route and f"{step}:{route}" in routes:
+        return routes[f"{step}:{route}"]
+    return routes.get(step or "", settings.LLM_MODEL)
+
+
+class ModelUsageStats:
+    """LLM calls per pipeline step by the model that served them, and how many were escalated retries."""
+
+    def __init__(self):
+        self._steps: dict[str, dict[str, Any]] = {}
+
+    def record(self, step: str | None, model: str, was_escalated: bool = False) -> None:
+        counts = self._steps.setdefault(step or "background", {"models": Counter(), "escalated": 0})
+        counts["models"][model] += 1
+        if was_escalated:
+            counts["escalated"] += 1
+
+    def stats(self) -> dict:
+        return {
+            step: {"models": dict(counts["models"]), "escalated": counts["escalated"]}
+            for step, counts in self._steps.items()
+        }
+
+    def clear(self) -> None:
+        self._steps.clear()
+
+
+model_usage = ModelUsageStats()
+
+
+@functools.cache
+def _structured_mode(model: str) -> str:
+    """Resolve LLM_STRUCTURED_OUTPUT for ``model``; "auto" picks the best supported mode."""
+    mode = settings.LLM_STRUCTURED_OUTPUT
+    if mode not in STRUCTURED_MODES:
+        raise ValueError(f"Invalid structured output mode: {mode}")
+    if mode != "auto":
+        return mode
+    try:
+        if litellm.supports_response_schema(model=model):
+            return "json_schema"
+    except Exception:
+        logger.debug("Could not look up response_format support for %s", model, exc_info=True)
+    # Forced tool calls work with any tool-calling model behind the proxy
+    return "tool"
+
+
+class LLMClient:
+    """Wrapper around LiteLLM for calling the LLM proxy.
+
+    Each call's model is chosen by route_model from the calling step and an
+    optional ``route``; ``models_served`` counts the models used per step.
+    """
+
+    def __init__(self, conversation: str | None = None):
         self.base_url = settings.LITELLM_PROXY_URL
         self.api_key = settings.LITELLM_API_KEY
-        self.model = "openai/claude-sonnet-4-5"
+        # Default model for calls outside a routed step
+        self.model = settings.LLM_MODEL
+        # Calls are queued fairly per conversation by llm_scheduler
+        self.conversation = conversation
+        self.models_served: dict[str, Counter[str]] = {}
+
+    def _record_model(self, step: str | None, model: str) -> None:
+        self.models_served.setdefault(step or "background", Counter())[model] += 1
+        model_usage.record(step, model, escalated.get())
 
-    async def chat(self, messages: list[dict], tools=None, tool_choice=None, **kwargs):
-        """Send a chat completion request. Returns the full response."""
-        response = await litellm.acompletion(
-            model=self.model,
+    async def _complete(self, model: str, messages: list[dict], tools, tool_choice, **kwargs):
+        if settings.LLM_PROMPT_CACHING:
+            messages, tools = with_cache_breakpoints(messages, tools)
+        return await litellm.acompletion(
+            model=model,
             messages=messages,
             api_base=self.base_url,
             api_key=self.api_key,
             tools=tools,
             tool_choice=tool_choice,
+            client=llm_transport.openai,
             **kwargs,
         )
+
+    def _slot(self, messages: list[dict], tools, kwargs: dict):
+        tokens = estimate_tokens(messages, tools, kwargs.get("max_tokens"))
+        return llm_scheduler.slot(tokens, self.conversation)
+
+    async def chat(
+        self, messages: list[dict], tools=None, tool_choice=None, route: str | None = None, **kwargs
+    ):
+        """Send a chat completion request. Returns the full response.
+
+        Deterministic calls go through the response cache when LLM_CACHE_MODE
+        enables it; everything else waits its turn in llm_scheduler.
+        """
+        model = route_model(current_step.get(), route)
+        return await self._chat(model, messages, tools, tool_choice, **kwargs)
+
+    async def _chat(self, model: str, messages: list[dict], tools=None, tool_choice=None, **kwargs):
+        step = current_step.get()
+        key = None
+        if "temperature" not in kwargs and llm_cache.applies(step, {**kwargs, "temperature": 0}):
+            # Only repeatable calls are cached, so pin sampling while the cache serves this call
+            kwargs["temperature"] = 0
+        if llm_cache.applies(step, kwargs):
+            key = cache_key(model, messages, tools, tool_choice, kwargs)
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                return cached
+        async with self._slot(messages, tools, kwargs) as reservation:
+            response = await self._complete(model, messages, tools, tool_choice, **kwargs)
+            reservation.settle(response)
+        self._record_model(step, model)
+        prompt_cache_stats.record(step, getattr(response, "usage", None))
+        if key is not None:
+            await llm_cache.put(key, response, step)
         return response
 
-    async def chat_json(self, messages: list[dict], schema: type[BaseModel], **kwargs):
-        """Chat expecting JSON output, parse into Pydantic model."""
-        schema_instruction = (
-            f"Respond with JSON matching this schema: {json.dumps(schema.model_json_schema())}"
-        )
+    def _with_schema_instruction(self, messages: list[dict], instruction: str) -> list[dict]:
         enhanced_messages = list(messages)
         if enhanced_messages and enhanced_messages[0]["role"] == "system":
             enhanced_messages[0] = {
                 **enhanced_messages[0],
-                "content": enhanced_messages[0]["content"] + "\n\n" + schema_instruction,
+                "content": enhanced_messages[0]["content"] + "\n\n" + instruction,
             }
         else:
-            enhanced_messages.insert(0, {"role": "system", "content": schema_instruction})
+            enhanced_messages.insert(0, {"role": "system", "content": instruction})
+        return enhanced_messages
+
+    def _structured_request(
+        self, model: str, messages: list[dict], structured: StructuredSchema, kwargs: dict
+    ) -> tuple[list[dict], dict]:
+        """Messages and call arguments asking for ``structured`` output in the resolved mode.
+
+        - "json_schema": the provider constrains the output via response_format;
+        - "tool": the model is forced to call a submit tool whose parameters
+          are the schema (added after any tools the caller passed);
+        - "prompt": the schema is described in the system prompt.
+        """
+        mode = _structured_mode(model)
+        if mode == "json_schema":
+            return messages, {**kwargs, "response_format": structured.response_format}
+        if mode == "tool":
+            tools = [*(kwargs.get("tools") or []), structured.tool]
+            return messages, {**kwargs, "tools": tools, "tool_choice": structured.tool_choice}
+        return self._with_schema_instruction(messages, structured.instruction), kwargs
+
+    async def chat_json(
+        self, messages: list[dict], schema: type[BaseModel], route: str | None = None, **kwargs
+    ):
+        """Chat expecting JSON output, parse into Pydantic model.
 
-        response = await self.chat(enhanced_messages, **kwargs)
-        content = response.choices[0].message.content
+        Uses native structured output where the model supports it (see
+        LLM_STRUCTURED_OUTPUT); malformed JSON is repaired locally before it
+        counts as a validation error.
+        """
+        model = route_model(current_step.get(), route)
+        structured = structured_schema(schema)
+        messages, kwargs = self._structured_request(model, messages, structured, kwargs)
+        response = await self._chat(model, messages, **kwargs)
+        message = response.choices[0].message
+        content = message.content
+        for call in message.tool_calls or []:
+            if call.function.name == structured.tool_name:
+                content = call.function.arguments
+        return parse_structured(content, structured)
 
-        # Handle markdown code blocks in LLM responses
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0]
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0]
+    async def chat_json_stream(
+        self,
+        messages: list[dict],
+        schema: type[BaseModel],
+        on_event: Callable[[tuple[str, Path, Any]], Awaitable[None]],
+        route: str | None = None,
+        **kwargs,
+    ):
+        """Like chat_json, but streams the completion and parses it as it arrives.
 
-        return schema.model_validate_json(content.strip())
+        Every event from JSONStreamParser (string deltas and completed values)
+        is passed to ``on_event`` as soon as its tokens arrive, whether the
+        JSON comes as message content or as forced tool-call arguments. The
+        full text is validated against ``schema`` once the stream ends.
+        Streamed calls bypass the response cache and hold their scheduler
+        slot until done.
+        """
+        step = current_step.get()
+        model = route_model(step, route)
+        structured = structured_schema(schema)
+        messages, kwargs = self._structured_request(model, messages, structured, kwargs)
+        tools = kwargs.pop("tools", None)
+        tool_choice = kwargs.pop("tool_choice", None)
+        parser = JSONStreamParser()
+        parts: list[str] = []
+        # The slot is held until the stream is fully read
+        async with self._slot(messages, tools, kwargs) as reservation:
+            response = await self._complete(
+                model,
+                messages,
+                tools,
+                tool_choice,
+                stream=True,
+                stream_options={"include_usage": True},
+                **kwargs,
+            )
+            async for chunk in response:
+                usage = getattr(chunk, "usage", None)
+                if _usage_int(usage, "prompt_tokens") is not None:
+                    # Sent with the final chunk
+                    reservation.settle(chunk)
+                    prompt_cache_stats.record(step, usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                text = delta.content
+                if not text and delta.tool_calls:
+                    text = "".join(call.function.arguments or "" for call in delta.tool_calls)
+                if not text:
+                    continue
+                parts.append(text)
+                if parser.done:
+                    continue
+                try:
+                    events = parser.feed(text)
+                except ValueError:
+                    # Stop streaming partial results; the final validation reports the error
+                    parser.done = True
+                    continue
+                for event in events:
+                    await on_event(event)
+        self._record_model(step, model)
+        return parse_structured("".join(parts), structured)
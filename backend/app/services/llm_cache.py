@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import litellm
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = {"off", "cache", "record", "replay"}
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a call has no recorded response."""
+
+
+def cache_key(model: str, messages: list[dict], tools: Any, tool_choice: Any, kwargs: dict) -> str:
+    """Canonical SHA-256 of everything that determines an LLM response."""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": tool_choice,
+        "kwargs": kwargs,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def is_deterministic(kwargs: dict) -> bool:
+    """Whether a call may be served from the cache.
+
+    Only calls that pin temperature to 0 qualify: providers sample by
+    default, so a call without a temperature is not repeatable. Streams and
+    requests for several choices never qualify.
+    """
+    if kwargs.get("stream") or (kwargs.get("n") or 1) > 1:
+        return False
+    return kwargs.get("temperature") == 0
+
+
+class LLMResponseCache:
+    """Exact-match cache of LLM responses: an in-memory LRU over a disk tier.
+
+    Modes (LLM_CACHE_MODE):
+    - "off": every call goes to the LLM.
+    - "cache": responses are kept in memory and on disk for a per-step TTL.
+    - "record": every call goes to the LLM and its response is saved with no expiry.
+    - "replay": responses are served only from disk, ignoring expiry; a miss
+      raises LLMCacheMiss, so benchmark runs never reach the LLM.
+
+    Responses are stored as JSON and rebuilt as litellm ModelResponse objects.
+    """
+
+    def __init__(self, mode: str, directory: str, max_entries: int):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Invalid LLM cache mode: {mode}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, step: str | None) -> float:
+        return settings.LLM_CACHE_TTL_SECONDS.get(step or "", settings.LLM_CACHE_DEFAULT_TTL_SECONDS)
+
+    def applies(self, step: str | None, kwargs: dict) -> bool:
+        """Whether a call made by ``step`` with ``kwargs`` goes through the cache."""
+        if self.mode == "off" or not is_deterministic(kwargs):
+            return False
+        return self.mode != "cache" or self.ttl_for(step) > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> dict | None:
+        try:
+            return json.loads(self._path(key).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Unreadable LLM cache entry %s", key, exc_info=True)
+            return None
+
+    def _write(self, key: str, entry: dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry))
+        tmp.replace(path)
+
+    def _remember(self, key: str, expires_at: float, response: dict) -> None:
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> litellm.ModelResponse | None:
+        if self.mode in ("off", "record"):
+            return None
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None and (self.mode == "replay" or entry[0] > now):
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return litellm.ModelResponse(**entry[1])
+        stored = await asyncio.to_thread(self._read, key)
+        if stored is not None:
+            expires_at = stored["expires_at"] or float("inf")
+            if self.mode == "replay" or expires_at > now:
+                self._remember(key, expires_at, stored["response"])
+                self.hits += 1
+                return litellm.ModelResponse(**stored["response"])
+        self.misses += 1
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded LLM response for key {key}")
+        return None
+
+    async def put(self, key: str, response: Any, step: str | None) -> None:
+        if self.mode not in ("cache", "record"):
+            return
+        data = response.model_dump(mode="json", warnings=False)
+        expires_at = None if self.mode == "record" else time.time() + self.ttl_for(step)
+        entry = {
+            "key": key,
+            "step": step,
+            "created_at": time.time(),
+            "expires_at": expires_at,
+            "response": data,
+        }
+        self._remember(key, expires_at or float("inf"), data)
+        try:
+            await asyncio.to_thread(self._write, key, entry)
+        except OSError:
+            logger.warning("Could not persist LLM cache entry %s", key, exc_info=True)
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "entries": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+
+llm_cache = LLMResponseCache(settings.LLM_CACHE_MODE, settings.LLM_CACHE_DIR, settings.LLM_CACHE_MAX_ENTRIES)
@@ -0,0 +1,200 @@
+import functools
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
+
+STRUCTURED_MODES = {"auto", "json_schema", "tool", "prompt"}
+
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _inline_refs(node: Any, defs: dict) -> Any:
+    """Replace ``$ref`` pointers into ``$defs`` with the definitions themselves."""
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/$defs/"):
+            return _inline_refs(defs[ref.removeprefix("#/$defs/")], defs)
+        return {key: _inline_refs(value, defs) for key, value in node.items() if key != "$defs"}
+    if isinstance(node, list):
+        return [_inline_refs(item, defs) for item in node]
+    return node
+
+
+@dataclass(frozen=True)
+class StructuredSchema:
+    """Everything needed to request and validate one output model, built once per model."""
+
+    model: type[BaseModel]
+    name: str
+    json_schema: dict
+    adapter: TypeAdapter
+    instruction: str
+
+    @property
+    def response_format(self) -> dict:
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": self.name, "schema": self.json_schema, "strict": False},
+        }
+
+    @property
+    def tool_name(self) -> str:
+        return f"submit_{self.name}"
+
+    @property
+    def tool(self) -> dict:
+        return {
+            "type": "function",
+            "function": {
+                "name": self.tool_name,
+                "description": f"Submit the final {self.model.__name__} result.",
+                "parameters": self.json_schema,
+            },
+        }
+
+    @property
+    def tool_choice(self) -> dict:
+        return {"type": "function", "function": {"name": self.tool_name}}
+
+
+@functools.cache
+def structured_schema(model: type[BaseModel]) -> StructuredSchema:
+    raw = model.model_json_schema()
+    json_schema = _inline_refs(raw, raw.get("$defs", {}))
+    return StructuredSchema(
+        model=model,
+        name=re.sub(r"(?<!^)(?=[A-Z])", "_", model.__name__).lower(),
+        json_schema=json_schema,
+        adapter=TypeAdapter(model),
+        instruction=f"Respond with JSON matching this schema: {json.dumps(raw)}",
+    )
+
+
+def repair_json(text: str) -> str:
+    """Fix the syntax slips LLMs make in JSON output, without changing valid JSON.
+
+    Drops prose or markdown code fences around the outermost object or
+    array, removes trailing
+    commas, converts Python literals (True/False/None), escapes raw control
+    characters inside strings, and closes strings and brackets left open by a
+    truncated response.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text
+    out: list[str] = []
+    stack: list[str] = []
+    in_string = False
+    escaped = False
+    i = min(starts)
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char == "\t":
+                char = "\\t"
+            out.append(char)
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            out.append(char)
+        elif char in "}]":
+            while out and out[-1] in " \n\r\t":
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z]+", text[i:]).group()
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(char)
+        i += 1
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    while stack:
+        _strip_dangling(out)
+        closer = stack.pop()
+        if closer == "}" and out and out[-1] == '"':
+            start = _string_start(out)
+            if "".join(out[:start]).rstrip().endswith(("{", ",")):
+                # A key whose value never arrived
+                del out[start:]
+                _strip_dangling(out)
+        out.append(closer)
+    return "".join(out)
+
+
+def _strip_dangling(out: list[str]) -> None:
+    while out and out[-1] in " \n\r\t,:":
+        out.pop()
+
+
+def _string_start(out: list[str]) -> int:
+    """Index of the opening quote of the string that ends ``out``."""
+    i = len(out) - 2
+    while i >= 0:
+        if out[i] == '"':
+            backslashes = 0
+            while i - backslashes - 1 >= 0 and out[i - backslashes - 1] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                return i
+        i -= 1
+    return 0
+
+
+def parse_structured(content: str, structured: StructuredSchema) -> BaseModel:
+    """Validate LLM output against a structured schema, repairing it locally first if needed.
+
+    If the output is not valid as-is, a repaired version (which also drops
+    markdown code fences) and an output wrapped in a single extra key
+    ({"answer_output": {...}}) are tried before the original ValidationError
+    is raised.
+    """
+    content = (content or "").strip()
+    try:
+        return structured.adapter.validate_json(content)
+    except ValidationError as exc:
+        error = exc
+    repaired = repair_json(content)
+    try:
+        result = structured.adapter.validate_json(repaired)
+    except ValidationError:
+        try:
+            data = json.loads(repaired)
+        except ValueError:
+            raise error from None
+        if not (isinstance(data, dict) and len(data) == 1):
+            raise error from None
+        inner = next(iter(data.values()))
+        try:
+            result = structured.adapter.validate_python(inner)
+        except ValidationError:
+            raise error from None
+    logger.info("Repaired malformed %s output locally", structured.model.__name__)
+    return result
@@ -0,0 +1,211 @@
+import json
+import re
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.config import settings
+from app.tools.result_format import ColumnarResult
+
+# Roughly how BPE tokenizers split text: letter runs (long words cost extra
+# tokens), up to three digits, or one other non-space character each
+_PIECE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+# Turns older conversation messages into one short summary string
+Summarizer = Callable[[list[dict]], Awaitable[str]]
+
+
+def count_tokens(text: str) -> int:
+    """Fast local estimate of the token count of ``text``, without a tokenizer."""
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        tokens += 1 + (len(piece) - 1) // 6 if piece[0].isalpha() else 1
+    return tokens
+
+
+def message_tokens(messages: list[dict]) -> int:
+    """Estimated tokens of chat messages, including a few per message for framing."""
+    total = 0
+    for message in messages:
+        total += 4 + count_tokens(str(message.get("content") or ""))
+        if message.get("tool_calls"):
+            total += count_tokens(json.dumps(message["tool_calls"], default=str))
+    return total
+
+
+def budget(section: str) -> int:
+    """Token budget of a prompt section from PROMPT_TOKEN_BUDGETS (0 = unbounded)."""
+    return settings.PROMPT_TOKEN_BUDGETS.get(section, 0)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens``, marking how much was dropped."""
+    total = count_tokens(text)
+    if max_tokens <= 0 or total <= max_tokens:
+        return text
+    keep = len(text) * max_tokens // total
+    while keep and count_tokens(text[:keep]) > max_tokens:
+        keep = keep * 9 // 10
+    return f"{text[:keep]}\n... [truncated, about {total - count_tokens(text[:keep])} more tokens]"
+
+
+def fit_lines(lines: list[str], max_tokens: int, noun: str = "lines") -> list[str]:
+    """Keep leading whole lines within ``max_tokens``, noting how many were left out."""
+    if max_tokens <= 0:
+        return lines
+    kept: list[str] = []
+    used = 0
+    for line in lines:
+        used += count_tokens(line) + 1
+        if used > max_tokens:
+            kept.append(f"... and {len(lines) - len(kept)} more {noun}")
+            break
+        kept.append(line)
+    return kept
+
+
+def sample_rows(rows: list, count: int) -> list:
+    """``count`` rows spread evenly over ``rows``, always including the first and last."""
+    if count >= len(rows):
+        return list(rows)
+    if count <= 1:
+        return list(rows[:count])
+    step = (len(rows) - 1) / (count - 1)
+    return [rows[round(i * step)] for i in range(count)]
+
+
+def _largest_fitting(total: int, fits: Callable[[int], bool]) -> int:
+    """Largest n in 0..total with fits(n), assuming fits is monotonic."""
+    low, high = 0, total
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def fit_rows(rows: list, max_tokens: int) -> tuple[list, bool]:
+    """Sample ``rows`` down to what fits ``max_tokens`` as JSON.
+
+    Returns the rows kept and whether any were dropped.
+    """
+
+    def size(kept: list) -> int:
+        return count_tokens(json.dumps(kept, default=str))
+
+    if max_tokens <= 0 or size(rows) <= max_tokens:
+        return rows, False
+    count = _largest_fitting(len(rows), lambda n: size(sample_rows(rows, n)) <= max_tokens)
+    return sample_rows(rows, count), True
+
+
+def fit_field(data: dict, field: str, max_tokens: int) -> dict:
+    """Copy of ``data`` whose list ``field`` is sampled to fit ``max_tokens``.
+
+    When rows are dropped, ``<field>_total`` records how many there were.
+    """
+    rows = data.get(field)
+    if not isinstance(rows, list):
+        return data
+    kept, sampled = fit_rows(rows, max_tokens)
+    if not sampled:
+        return data
+    return {**data, field: kept, f"{field}_total": len(rows)}
+
+
+def render_rows(rows: Any, max_tokens: int) -> str:
+    """JSON for data rows within ``max_tokens``, sampling rows when there are too many."""
+    if isinstance(rows, list) and rows:
+        kept, sampled = fit_rows(rows, max_tokens)
+        text = json.dumps(kept, default=str)
+        if sampled:
+            text += f"\n[{len(kept)} of {len(rows)} rows shown, sampled evenly]"
+        return text
+    text = rows if isinstance(rows, str) else json.dumps(rows, default=str)
+    return truncate_text(text, max_tokens)
+
+
+def fit_columnar(result: ColumnarResult, max_tokens: int) -> str:
+    """``result.to_llm()`` cut to its first rows that fit ``max_tokens``."""
+    text = result.to_llm()
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text
+
+    def head(n: int) -> str:
+        rows = result.head(n)
+        rows.truncated = True
+        return rows.to_llm()
+
+    return head(_largest_fitting(result.row_count, lambda n: count_tokens(head(n)) <= max_tokens))
+
+
+def compact_tool_messages(messages: list[dict], max_tokens: int, keep_tokens: int = 200) -> None:
+    """Shrink the oldest tool results in place once all of them exceed ``max_tokens``.
+
+    Compaction then goes down to half of ``max_tokens``, so the transcript
+    is rewritten in occasional batches rather than on every call: each
+    rewrite changes the prompt prefix the provider has cached. The most
+    recent tool result is never shrunk; older ones keep their first
+    ``keep_tokens`` so the model can still see what they were.
+    """
+    if max_tokens <= 0:
+        return
+    tool_messages = [m for m in messages if m.get("role") == "tool"]
+    sizes = [count_tokens(m["content"]) for m in tool_messages]
+    total = sum(sizes)
+    if total <= max_tokens:
+        return
+    target = max_tokens // 2
+    for i, message in enumerate(tool_messages[:-1]):
+        if total <= target:
+            break
+        if sizes[i] <= keep_tokens:
+            continue
+        message["content"] = truncate_text(message["content"], keep_tokens)
+        total += count_tokens(message["content"]) - sizes[i]
+
+
+async def outline_messages(messages: list[dict]) -> str:
+    """Default summarizer: the opening line of each earlier message, locally."""
+    lines = []
+    for message in messages:
+        first_line = str(message.get("content") or "").strip().split("\n", 1)[0]
+        lines.append(f"- {message['role']}: {truncate_text(first_line, 40)}")
+    return "\n".join(lines)
+
+
+async def compact_history(
+    history: list[dict], max_tokens: int, summarize: Summarizer = outline_messages
+) -> list[dict]:
+    """Fit conversation history into ``max_tokens``.
+
+    The most recent messages are kept whole (the very latest is truncated if
+    it alone is too large); older ones are replaced by one message holding
+    ``summarize``'s summary of them.
+    """
+    if max_tokens <= 0 or message_tokens(history) <= max_tokens:
+        return history
+    # Reserve a quarter of the budget for the summary of older messages
+    recent_budget = max_tokens * 3 // 4
+    kept: list[dict] = []
+    used = 0
+    for message in reversed(history):
+        size = message_tokens([message])
+        if used + size > recent_budget:
+            if not kept:
+                content = truncate_text(str(message.get("content") or ""), recent_budget)
+                kept.append({**message, "content": content})
+            break
+        kept.append(message)
+        used += size
+    kept.reverse()
+    older = history[: len(history) - len(kept)]
+    if not older:
+        return kept
+    summary = truncate_text(await summarize(older), max_tokens - recent_budget)
+    note = f"[Summary of the earlier conversation]\n{summary}"
+    if kept and kept[0]["role"] == "user":
+        # Merge rather than send two user messages in a row
+        return [{**kept[0], "content": f"{note}\n\n{kept[0]['content']}"}, *kept[1:]]
+    return [{"role": "user", "content": note}, *kept]
@@ -1,6 +1,15 @@
+from app.tools.describe_tables import DescribeTablesTool
 from app.tools.list_tables import ListTablesTool
+from app.tools.profile_table import ProfileTableTool
 from app.tools.query import QueryTool
 from app.tools.sample_data import SampleDataTool
 from app.tools.show_schema import ShowSchemaTool
 
-__all__ = ["ListTablesTool", "ShowSchemaTool", "SampleDataTool", "QueryTool"]
+__all__ = [
+    "ListTablesTool",
+    "ShowSchemaTool",
+    "DescribeTablesTool",
+    "ProfileTableTool",
+    "SampleDataTool",
+    "QueryTool",
+]
@@ -0,0 +1,643 @@
+import asyncio
+import logging
+import operator
+from collections.abc import Callable
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import begin_guarded, target_engine
+from app.tools.catalog import catalog
+from app.tools.data_version import data_versions
+from app.tools.result_format import ColumnarResult
+from app.tools.sql_safety import Token, tokenize
+
+logger = logging.getLogger(__name__)
+
+_AGGREGATES = {"count", "sum", "avg", "min", "max"}
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "<>": operator.ne,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_CLAUSE_KEYWORDS = {"where", "group", "order", "limit", "offset"}
+_NUMERIC = {"int", "float"}
+# Catalog types whose Python values compare, hash and sort like they do in
+# Postgres. Arrays, json, uuid, interval, inet, bpchar and the rest are only
+# ever projected from a snapshot, never filtered, grouped, ordered or aggregated.
+_PLAIN_TYPES = (
+    "smallint",
+    "integer",
+    "bigint",
+    "numeric",
+    "real",
+    "double precision",
+    "text",
+    "character varying",
+    "boolean",
+    "date",
+    "time",
+)
+
+
+class _Unsupported(Exception):
+    """The query is outside the subset the in-memory engine can answer exactly."""
+
+
+class Expr(NamedTuple):
+    """A select-list expression: a column, an aggregate, or round() of either."""
+
+    kind: str  # "column", "agg" or "round"
+    name: str  # column name, aggregate function, or "round"
+    arg: Any = None  # aggregate column (None for count(*)), or the rounded Expr
+    distinct: bool = False
+    digits: int = 0
+
+
+class SelectItem(NamedTuple):
+    expr: Expr
+    alias: str | None
+
+
+class Condition(NamedTuple):
+    column: str
+    op: str  # comparison operator, "in", "not in", "is null" or "is not null"
+    value: Any = None
+
+
+class OrderItem(NamedTuple):
+    ref: Any  # int ordinal, alias/column name, or Expr
+    descending: bool
+
+
+class SimpleSelect(NamedTuple):
+    table: str
+    items: list[SelectItem] | None  # None for SELECT *
+    distinct: bool
+    where: list[Condition]
+    group_by: list[Any]  # column names or int ordinals
+    order_by: list[OrderItem]
+    limit: int | None
+    offset: int
+
+
+class _Parser:
+    def __init__(self, tokens: list[Token]):
+        self.tokens = tokens
+        self.pos = 0
+        self.table = ""
+        self.alias: str | None = None
+
+    # -- token helpers --
+
+    def peek(self, offset: int = 0) -> Token | None:
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def next(self) -> Token:
+        token = self.peek()
+        if token is None:
+            raise _Unsupported("unexpected end of query")
+        self.pos += 1
+        return token
+
+    def at_word(self, *words: str) -> bool:
+        token = self.peek()
+        return token is not None and token.kind == "word" and token.text.lower() in words
+
+    def accept_word(self, *words: str) -> bool:
+        if self.at_word(*words):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_word(self, word: str) -> None:
+        if not self.accept_word(word):
+            raise _Unsupported(f"expected {word}")
+
+    def accept_text(self, value: str) -> bool:
+        token = self.peek()
+        if token is not None and token.text == value and token.kind in ("punct", "op"):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_text(self, value: str) -> None:
+        if not self.accept_text(value):
+            raise _Unsupported(f"expected {value}")
+
+    # -- grammar --
+
+    def identifier(self) -> str:
+        token = self.next()
+        if token.kind == "word":
+            if token.text.lower() in _CLAUSE_KEYWORDS:
+                raise _Unsupported("keyword used as identifier")
+            return token.text.lower()
+        if token.kind == "qident":
+            return token.text[1:-1].replace('""', '"')
+        raise _Unsupported("expected identifier")
+
+    def column_ref(self) -> str:
+        name = self.identifier()
+        if self.accept_text("."):
+            if name not in (self.table, self.alias):
+                raise _Unsupported("column qualified with another table")
+            name = self.identifier()
+        return name
+
+    def integer(self) -> int:
+        token = self.next()
+        if token.kind != "number" or not token.text.isdigit():
+            raise _Unsupported("expected integer")
+        return int(token.text)
+
+    def literal(self) -> Any:
+        token = self.next()
+        if token.kind == "op" and token.text == "-":
+            value = self.literal()
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise _Unsupported("negated non-number")
+            return -value
+        if token.kind == "number":
+            return int(token.text) if token.text.isdigit() else float(token.text)
+        if token.kind == "string" and token.text.startswith("'"):
+            return token.text[1:-1].replace("''", "'")
+        if token.kind == "word" and token.text.lower() in ("true", "false"):
+            return token.text.lower() == "true"
+        raise _Unsupported("unsupported literal")
+
+    def expression(self) -> Expr:
+        token = self.peek()
+        following = self.peek(1)
+        if token is not None and token.kind == "word" and following is not None and following.text == "(":
+            name = token.text.lower()
+            self.pos += 2
+            if name in _AGGREGATES:
+                if name == "count" and self.accept_text("*"):
+                    self.expect_text(")")
+                    return Expr("agg", "count")
+                distinct = self.accept_word("distinct")
+                column = self.column_ref()
+                self.expect_text(")")
+                return Expr("agg", name, column, distinct)
+            if name == "round":
+                inner = self.expression()
+                digits = self.integer() if self.accept_text(",") else 0
+                self.expect_text(")")
+                return Expr("round", "round", inner, digits=digits)
+            raise _Unsupported(f"function {name}")
+        return Expr("column", self.column_ref())
+
+    def select_item(self) -> SelectItem:
+        expr = self.expression()
+        alias = None
+        if self.accept_word("as"):
+            alias = self.identifier()
+        else:
+            token = self.peek()
+            if token is not None and token.kind in ("word", "qident") and not self.at_word("from"):
+                alias = self.identifier()
+        return SelectItem(expr, alias)
+
+    def condition(self) -> Condition:
+        column = self.column_ref()
+        if self.accept_word("is"):
+            negated = self.accept_word("not")
+            self.expect_word("null")
+            return Condition(column, "is not null" if negated else "is null")
+        negated = self.accept_word("not")
+        if self.accept_word("in"):
+            self.expect_text("(")
+            values = [self.literal()]
+            while self.accept_text(","):
+                values.append(self.literal())
+            self.expect_text(")")
+            return Condition(column, "not in" if negated else "in", values)
+        if negated:
+            raise _Unsupported("NOT without IN")
+        token = self.next()
+        if token.kind != "op" or token.text not in _COMPARISONS:
+            raise _Unsupported("unsupported comparison")
+        return Condition(column, token.text, self.literal())
+
+    def order_item(self) -> OrderItem:
+        token = self.peek()
+        if token is not None and token.kind == "number":
+            ref: Any = self.integer()
+        else:
+            expr = self.expression()
+            ref = expr.name if expr.kind == "column" else expr
+        descending = False
+        if self.accept_word("desc"):
+            descending = True
+        else:
+            self.accept_word("asc")
+        if self.at_word("nulls"):
+            raise _Unsupported("explicit NULLS ordering")
+        return OrderItem(ref, descending)
+
+    def parse(self) -> SimpleSelect:
+        self.expect_word("select")
+        distinct = self.accept_word("distinct")
+
+        # The select list is parsed after FROM so qualified names can be checked
+        select_start = self.pos
+        depth = 0
+        while not (depth == 0 and self.at_word("from")):
+            token = self.next()
+            depth += token.text == "("
+            depth -= token.text == ")"
+        select_end = self.pos
+        self.expect_word("from")
+        self.table = self.identifier()
+        if self.accept_word("as") or (self.peek() is not None and not self.at_word(*_CLAUSE_KEYWORDS)):
+            self.alias = self.identifier()
+        after_from = self.pos
+
+        self.pos = select_start
+        items: list[SelectItem] | None
+        if self.accept_text("*"):
+            items = None
+        else:
+            items = [self.select_item()]
+            while self.accept_text(","):
+                items.append(self.select_item())
+        if self.pos != select_end:
+            raise _Unsupported("unsupported select list")
+        self.pos = after_from
+
+        where: list[Condition] = []
+        if self.accept_word("where"):
+            where.append(self.condition())
+            while self.accept_word("and"):
+                where.append(self.condition())
+
+        group_by: list[Any] = []
+        if self.accept_word("group"):
+            self.expect_word("by")
+            while True:
+                token = self.peek()
+                group_by.append(self.integer() if token is not None and token.kind == "number" else self.column_ref())
+                if not self.accept_text(","):
+                    break
+
+        order_by: list[OrderItem] = []
+        if self.accept_word("order"):
+            self.expect_word("by")
+            order_by.append(self.order_item())
+            while self.accept_text(","):
+                order_by.append(self.order_item())
+
+        limit = None
+        offset = 0
+        if self.accept_word("limit"):
+            limit = self.integer()
+        if self.accept_word("offset"):
+            offset = self.integer()
+
+        if self.peek() is not None:
+            raise _Unsupported("trailing clauses")
+        return SimpleSelect(self.table, items, distinct, where, group_by, order_by, limit, offset)
+
+
+def parse_simple_select(sql: str) -> SimpleSelect | None:
+    """Parse SQL into a SimpleSelect, or None if it is outside the supported subset."""
+    try:
+        return _Parser(tokenize(sql)).parse()
+    except (_Unsupported, ValueError):
+        return None
+
+
+# --- Execution ---
+
+
+def _round_half_up(value: float | int | None, digits: int) -> float | int | None:
+    """Round like Postgres round(numeric, n): half away from zero."""
+    if value is None:
+        return None
+    quantum = Decimal(1).scaleb(-digits)
+    rounded = Decimal(str(value)).quantize(quantum, rounding=ROUND_HALF_UP)
+    return int(rounded) if digits <= 0 else float(rounded)
+
+
+def _sum(values: list[Any], kind: str) -> Any:
+    """Sum like Postgres numeric: float columns came from exact decimals, so add them exactly."""
+    if kind == "int":
+        return sum(values)
+    return float(sum(Decimal(repr(v)) for v in values))
+
+
+def _aggregate(expr: Expr, snapshot: "_Columns", idx: list[int]) -> tuple[Any, str]:
+    """Compute one aggregate over the rows in ``idx``; returns (value, type)."""
+    if expr.arg is None:
+        return len(idx), "int"
+    column, kind = snapshot.column(expr.arg)
+    values = [v for v in (column[i] for i in idx) if v is not None]
+    if expr.distinct:
+        values = list(set(values))
+    if expr.name == "count":
+        return len(values), "int"
+    if kind not in _NUMERIC:
+        # Text min/max depends on collation; leave it to Postgres
+        raise _Unsupported(f"{expr.name} over {kind}")
+    if not values:
+        return None, "float" if expr.name == "avg" else kind
+    if expr.name == "sum":
+        return _sum(values, kind), kind
+    if expr.name == "avg":
+        return _sum(values, "float") / len(values), "float"
+    return (min(values) if expr.name == "min" else max(values)), kind
+
+
+def _evaluate(expr: Expr, snapshot: "_Columns", idx: list[int]) -> tuple[Any, str]:
+    if expr.kind == "agg":
+        return _aggregate(expr, snapshot, idx)
+    if expr.kind == "round":
+        value, kind = _evaluate(expr.arg, snapshot, idx)
+        if kind not in _NUMERIC:
+            raise _Unsupported("round over non-number")
+        return _round_half_up(value, expr.digits), "int" if expr.digits <= 0 else "float"
+    column, kind = snapshot.column(expr.name)
+    return (column[idx[0]] if idx else None), kind
+
+
+def _contains_aggregate(expr: Expr) -> bool:
+    return expr.kind == "agg" or (expr.kind == "round" and _contains_aggregate(expr.arg))
+
+
+def _output_name(item: SelectItem) -> str:
+    if item.alias:
+        return item.alias
+    return item.expr.name
+
+
+def _is_plain(type_name: str) -> bool:
+    return not type_name.endswith("]") and type_name.startswith(_PLAIN_TYPES)
+
+
+class _Columns:
+    """Name-indexed access to a snapshot's columns.
+
+    ``opaque`` columns may be projected but not used in any other way.
+    """
+
+    def __init__(self, snapshot: ColumnarResult, opaque: frozenset[str] = frozenset()):
+        self.snapshot = snapshot
+        self.opaque = opaque
+        self.index = {name: i for i, name in enumerate(snapshot.columns)}
+
+    def projected(self, name: str) -> tuple[Any, str]:
+        i = self.index.get(name)
+        if i is None:
+            raise _Unsupported(f"unknown column {name}")
+        return self.snapshot.data[i], self.snapshot.types[i]
+
+    def column(self, name: str) -> tuple[Any, str]:
+        if name in self.opaque:
+            raise _Unsupported(f"column {name} has a non-scalar or non-plain type")
+        return self.projected(name)
+
+
+def _filter(query: SimpleSelect, columns: _Columns) -> list[int]:
+    idx = list(range(columns.snapshot.row_count))
+    for cond in query.where:
+        values, kind = columns.column(cond.column)
+        if cond.op == "is null":
+            idx = [i for i in idx if values[i] is None]
+            continue
+        if cond.op == "is not null":
+            idx = [i for i in idx if values[i] is not None]
+            continue
+        literals = cond.value if cond.op in ("in", "not in") else [cond.value]
+        for literal in literals:
+            if isinstance(literal, bool):
+                ok = kind == "bool"
+            elif isinstance(literal, (int, float)):
+                ok = kind in _NUMERIC
+            else:
+                ok = kind == "text"
+            if not ok:
+                raise _Unsupported("literal type does not match column")
+        if cond.op in ("in", "not in"):
+            members = set(cond.value)
+            if cond.op == "in":
+                idx = [i for i in idx if values[i] is not None and values[i] in members]
+            else:
+                idx = [i for i in idx if values[i] is not None and values[i] not in members]
+            continue
+        if kind == "text" and cond.op not in ("=", "<>", "!="):
+            raise _Unsupported("ordered text comparison")
+        if kind == "bool" and cond.op not in ("=", "<>", "!="):
+            raise _Unsupported("ordered bool comparison")
+        compare = _COMPARISONS[cond.op]
+        literal = cond.value
+        idx = [i for i in idx if values[i] is not None and compare(values[i], literal)]
+    return idx
+
+
+def _sort(rows: list[list[Any]], keys: list[tuple[int, bool]], types: list[str]) -> None:
+    """Stable multi-key sort with Postgres NULL placement (last for ASC, first for DESC)."""
+    for position, descending in reversed(keys):
+        if types[position] == "text":
+            raise _Unsupported("text ordering depends on collation")
+        rows.sort(
+            key=lambda row: (row[position] is None, row[position] if row[position] is not None else 0),
+            reverse=descending,
+        )
+
+
+def _resolve_order(
+    ref: Any, names: list[str], items: list[SelectItem] | None
+) -> int:
+    """Map an ORDER BY reference to an output column position."""
+    if isinstance(ref, int):
+        if not 1 <= ref <= len(names):
+            raise _Unsupported("ORDER BY position out of range")
+        return ref - 1
+    if isinstance(ref, Expr):
+        for position, item in enumerate(items or []):
+            if item.expr == ref:
+                return position
+        raise _Unsupported("ORDER BY expression not in select list")
+    if ref in names:
+        return names.index(ref)
+    raise _Unsupported("ORDER BY column not in select list")
+
+
+def execute_simple_select(
+    query: SimpleSelect, snapshot: ColumnarResult, max_rows: int, opaque: frozenset[str] = frozenset()
+) -> ColumnarResult:
+    """Evaluate a parsed query column-at-a-time against a table snapshot.
+
+    Raises _Unsupported wherever the in-memory result could differ from what
+    Postgres would return (collation-dependent ordering, implicit casts,
+    comparisons on ``opaque`` columns, ...).
+    """
+    columns = _Columns(snapshot, opaque)
+    idx = _filter(query, columns)
+
+    items = query.items
+    if items is None:
+        items = [SelectItem(Expr("column", name), None) for name in snapshot.columns]
+    names = [_output_name(item) for item in items]
+
+    grouped = bool(query.group_by) or any(_contains_aggregate(item.expr) for item in items)
+    if query.distinct and grouped:
+        raise _Unsupported("DISTINCT with grouping")
+    if query.distinct:
+        if any(item.expr.kind != "column" for item in items):
+            raise _Unsupported("DISTINCT over expressions")
+        group_columns = [item.expr.name for item in items]
+        grouped = True
+    else:
+        group_columns = []
+        for ref in query.group_by:
+            if isinstance(ref, int):
+                if not 1 <= ref <= len(items) or items[ref - 1].expr.kind != "column":
+                    raise _Unsupported("GROUP BY position")
+                ref = items[ref - 1].expr.name
+            group_columns.append(ref)
+
+    types: list[str] = []
+    rows: list[list[Any]]
+    if grouped:
+        for item in items:
+            if item.expr.kind == "column" and item.expr.name not in group_columns:
+                raise _Unsupported("ungrouped column in select list")
+        key_columns = [columns.column(name)[0] for name in group_columns]
+        groups: dict[tuple, list[int]] = {}
+        for i in idx:
+            groups.setdefault(tuple(col[i] for col in key_columns), []).append(i)
+        if not group_columns:
+            groups = {(): idx}
+        rows = []
+        for members in groups.values():
+            row = []
+            row_types = []
+            for item in items:
+                value, kind = _evaluate(item.expr, columns, members)
+                row.append(value)
+                row_types.append(kind)
+            rows.append(row)
+            types = row_types
+        if not types:
+            types = [_evaluate(item.expr, columns, [])[1] for item in items]
+        keys = [(_resolve_order(o.ref, names, items), o.descending) for o in query.order_by]
+        _sort(rows, keys, types)
+    else:
+        for item in items:
+            if item.expr.kind != "column":
+                raise _Unsupported("row-level expressions")
+        selected = [columns.projected(item.expr.name) for item in items]
+        types = [kind for _, kind in selected]
+        # Sort row indices so columns that are not selected can be sort keys too
+        for order in reversed(query.order_by):
+            ref = order.ref
+            if isinstance(ref, str) and ref not in names:
+                values, kind = columns.column(ref)
+            else:
+                values, kind = columns.column(items[_resolve_order(ref, names, items)].expr.name)
+            if kind == "text":
+                raise _Unsupported("text ordering depends on collation")
+            idx.sort(
+                key=lambda i: (values[i] is None, values[i] if values[i] is not None else 0),
+                reverse=order.descending,
+            )
+        rows = [[values[i] for values, _ in selected] for i in idx]
+
+    end = None if query.limit is None else query.offset + query.limit
+    rows = rows[query.offset : end]
+    truncated = len(rows) > max_rows
+    rows = rows[:max_rows]
+    result = ColumnarResult.from_rows(names, rows, truncated=truncated)
+    # from_rows cannot infer types from an empty or all-null result
+    result.types = [kind if inferred == "null" else inferred for kind, inferred in zip(types, result.types)]
+    return result
+
+
+# --- Snapshots ---
+
+
+class TableSnapshots:
+    """Columnar in-memory copies of target tables with at most ``max_rows`` rows.
+
+    Simple single-table SELECTs (filter, group by, aggregate, order, limit)
+    are answered from these snapshots; anything outside that subset makes
+    ``try_execute`` return None so the caller falls back to Postgres.
+    Tables are loaded on first use and dropped when their modification
+    counters change (see DataVersionTracker); tables found to be too large
+    are remembered so they are not reloaded on every query.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._tables: dict[str, ColumnarResult | None] = {}
+        self._opaque: dict[str, frozenset[str]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def get(self, table: str) -> ColumnarResult | None:
+        if table in self._tables:
+            return self._tables[table]
+        lock = self._locks.setdefault(table, asyncio.Lock())
+        async with lock:
+            if table in self._tables:
+                return self._tables[table]
+            info = await catalog.table(table)
+            if info is None or info["row_estimate"] > self.max_rows:
+                self._tables[table] = None
+                return None
+            quoted = '"' + table.replace('"', '""') + '"'
+            async with target_engine.connect() as conn:
+                await begin_guarded(conn)
+                result = await conn.execute(
+                    text(f"SELECT * FROM {quoted} LIMIT :limit"), {"limit": self.max_rows + 1}
+                )
+                columns = list(result.keys())
+                rows = result.fetchall()
+            snapshot = None
+            if len(rows) <= self.max_rows:
+                snapshot = ColumnarResult.from_rows(columns, rows, table=table)
+                plain = {column["name"] for column in info["columns"] if _is_plain(column["type"])}
+                self._opaque[table] = frozenset(name for name in columns if name not in plain)
+            self._tables[table] = snapshot
+            return snapshot
+
+    def drop(self, tables: set[str]) -> None:
+        for table in tables:
+            self._tables.pop(table, None)
+            self._opaque.pop(table, None)
+
+    def clear(self) -> None:
+        self._tables.clear()
+        self._opaque.clear()
+
+    async def try_execute(self, sql: str, max_rows: int) -> ColumnarResult | None:
+        """Answer ``sql`` from memory, or return None to fall back to Postgres."""
+        query = parse_simple_select(sql)
+        if query is None:
+            return None
+        try:
+            snapshot = await self.get(query.table)
+        except SQLAlchemyError:
+            logger.warning("Could not load snapshot of %s", query.table, exc_info=True)
+            return None
+        if snapshot is None:
+            return None
+        try:
+            opaque = self._opaque.get(query.table, frozenset())
+            return execute_simple_select(query, snapshot, max_rows, opaque)
+        except (_Unsupported, TypeError):
+            # TypeError: values Python cannot hash or compare the way Postgres does
+            return None
+
+
+snapshots = TableSnapshots(settings.ANALYTICS_MAX_ROWS)
+data_versions.subscribe(snapshots.drop)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+from typing import Any
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import target_catalog_engine
+
+# Relations visible to the read-only role in the public schema: tables,
+# partitioned tables, views, materialized views and foreign tables.
+_RELATIONS = """
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public'
+      AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+      AND has_table_privilege(c.oid, 'SELECT')
+"""
+
+# Changes whenever a relation, column or constraint row is created, altered or
+# dropped. ANALYZE updates pg_class in place, so row estimates do not affect it.
+_FINGERPRINT_SQL = f"""
+SELECT md5(
+    coalesce((SELECT string_agg(c.oid::text || ':' || c.xmin::text, ',' ORDER BY c.oid) {_RELATIONS}), '')
+    || '|' ||
+    coalesce((SELECT string_agg(a.attrelid::text || '.' || a.attnum::text || ':' || a.xmin::text, ','
+                                ORDER BY a.attrelid, a.attnum)
+              FROM pg_attribute a
+              WHERE a.attrelid IN (SELECT c.oid {_RELATIONS}) AND a.attnum > 0), '')
+    || '|' ||
+    coalesce((SELECT string_agg(con.oid::text || ':' || con.xmin::text, ',' ORDER BY con.oid)
+              FROM pg_constraint con
+              WHERE con.conrelid IN (SELECT c.oid {_RELATIONS})), '')
+)
+"""
+
+_SNAPSHOT_SQL = f"""
+SELECT
+    c.relname,
+    c.reltuples::bigint,
+    coalesce((
+        SELECT json_agg(json_build_object(
+                   'name', a.attname,
+                   'type', format_type(a.atttypid, a.atttypmod),
+                   'nullable', NOT a.attnotnull
+               ) ORDER BY a.attnum)
+        FROM pg_attribute a
+        WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    ), '[]'),
+    coalesce((
+        SELECT json_agg(a.attname ORDER BY k.ord)
+        FROM pg_constraint con
+        CROSS JOIN unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+        WHERE con.conrelid = c.oid AND con.contype = 'p'
+    ), '[]'),
+    coalesce((
+        SELECT json_agg(json_build_object(
+                   'columns', (SELECT json_agg(a.attname ORDER BY k.ord)
+                               FROM unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+                               JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum),
+                   'references_table', rc.relname,
+                   'references_columns', (SELECT json_agg(a.attname ORDER BY k.ord)
+                                          FROM unnest(con.confkey) WITH ORDINALITY AS k(attnum, ord)
+                                          JOIN pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.attnum)
+               ) ORDER BY con.conname)
+        FROM pg_constraint con
+        JOIN pg_class rc ON rc.oid = con.confrelid
+        WHERE con.conrelid = c.oid AND con.contype = 'f'
+    ), '[]'),
+    c.relkind
+{_RELATIONS}
+ORDER BY c.relname
+"""
+
+
+def _json(value: Any) -> Any:
+    """asyncpg hands json columns back as text unless a codec is registered."""
+    return json.loads(value) if isinstance(value, str) else value
+
+
+class CatalogCache:
+    """In-memory snapshot of the target database's public schema.
+
+    Tables, columns, types, nullability, primary keys, foreign keys and row
+    estimates are loaded from pg_catalog in a single query. The snapshot is
+    reused until a cheap schema fingerprint changes; the fingerprint itself is
+    checked at most once per ``check_interval`` seconds.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.fingerprint: str | None = None
+        self.tables: dict[str, dict] = {}
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def snapshot(self, force_check: bool = False) -> dict[str, dict]:
+        """Return the table catalog, reloading it if the schema has changed."""
+        if not force_check and time.monotonic() - self._checked_at < self.check_interval:
+            return self.tables
+        async with self._lock:
+            if not force_check and time.monotonic() - self._checked_at < self.check_interval:
+                return self.tables
+            async with target_catalog_engine.connect() as conn:
+                fingerprint = (await conn.execute(text(_FINGERPRINT_SQL))).scalar_one()
+                if fingerprint != self.fingerprint:
+                    result = await conn.execute(text(_SNAPSHOT_SQL))
+                    self.tables = {
+                        row[0]: {
+                            "name": row[0],
+                            "row_estimate": max(int(row[1]), 0),
+                            "columns": _json(row[2]),
+                            "primary_key": _json(row[3]),
+                            "foreign_keys": _json(row[4]),
+                            "kind": row[5],
+                        }
+                        for row in result.fetchall()
+                    }
+                    self.fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+        return self.tables
+
+    async def table(self, name: str) -> dict | None:
+        """Look up one table, re-checking the fingerprint once on a miss."""
+        return (await self.lookup([name]))[name]
+
+    async def lookup(self, names: list[str]) -> dict[str, dict | None]:
+        """Look up several tables, re-checking the fingerprint once if any are missing."""
+        tables = await self.snapshot()
+        if any(name not in tables for name in names):
+            tables = await self.snapshot(force_check=True)
+        return {name: tables.get(name) for name in names}
+
+    def clear(self) -> None:
+        self.fingerprint = None
+        self.tables = {}
+        self._checked_at = float("-inf")
+
+
+catalog = CatalogCache(settings.CATALOG_CHECK_SECONDS)
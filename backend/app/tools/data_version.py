@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import target_catalog_engine
+
+logger = logging.getLogger(__name__)
+
+# Cumulative write counters per table. They only ever grow (until a stats
+# reset), so any difference means the table's contents may have changed.
+# reltuples rides along: ANALYZE updates it without touching the counters or
+# the catalog fingerprint, so this poll is what keeps row estimates current.
+_VERSION_SQL = (
+    "SELECT s.relname, s.n_tup_ins + s.n_tup_upd + s.n_tup_del, c.reltuples::bigint "
+    "FROM pg_stat_user_tables s JOIN pg_class c ON c.oid = s.relid "
+    "WHERE s.schemaname = 'public'"
+)
+
+
+class DataVersionTracker:
+    """Tracks per-table modification counters in the target database.
+
+    Polling is throttled to once per ``check_interval`` seconds so callers can
+    check on every request. Listeners are called with the set of tables whose
+    counters changed and are expected to drop any cached data derived from them.
+    ``row_estimates`` holds each table's latest reltuples (-1 if never analyzed).
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.versions: dict[str, int] = {}
+        self.row_estimates: dict[str, int] = {}
+        self._checked_at = float("-inf")
+        self._listeners: list[Callable[[set[str]], None]] = []
+        self._lock = asyncio.Lock()
+
+    def subscribe(self, listener: Callable[[set[str]], None]) -> None:
+        self._listeners.append(listener)
+
+    async def check(self) -> dict[str, int]:
+        """Refresh counters if the check interval has elapsed and notify on change."""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return self.versions
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return self.versions
+            try:
+                async with target_catalog_engine.connect() as conn:
+                    result = await conn.execute(text(_VERSION_SQL))
+                    rows = result.fetchall()
+                    versions = {row[0]: int(row[1]) for row in rows}
+            except SQLAlchemyError:
+                # Fall back to TTL-only expiry until the next check succeeds
+                logger.warning("Could not read table modification counters", exc_info=True)
+                self._checked_at = time.monotonic()
+                return self.versions
+            self._checked_at = time.monotonic()
+            changed = {
+                table
+                for table in versions.keys() | self.versions.keys()
+                if versions.get(table) != self.versions.get(table)
+            }
+            self.versions = versions
+            self.row_estimates = {row[0]: int(row[2]) for row in rows}
+        if changed:
+            for listener in self._listeners:
+                listener(changed)
+        return self.versions
+
+
+data_versions = DataVersionTracker(settings.DATA_VERSION_CHECK_SECONDS)
@@ -0,0 +1,69 @@
+from typing import Any
+
+from app.tools.base import Tool
+from app.tools.catalog import catalog
+
+
+class DescribeTablesTool(Tool):
+    """Describes several tables at once: columns, keys, row estimates and relationships.
+
+    Answered from the catalog snapshot, so a whole plan's worth of tables
+    costs one tool call and at most one catalog query.
+    """
+
+    name = "describe_tables"
+    description = (
+        "Returns columns, types, nullability, primary keys, estimated row counts and "
+        "foreign-key relationships for several tables in one call. Prefer this over "
+        "calling show_schema once per table."
+    )
+    parameters = {
+        "type": "object",
+        "properties": {
+            "tables": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Table names to describe",
+            }
+        },
+        "required": ["tables"],
+    }
+
+    async def execute(self, params: dict) -> Any:
+        names = list(dict.fromkeys(params["tables"]))
+        if not names:
+            raise ValueError("At least one table name is required")
+
+        found = await catalog.lookup(names)
+        tables = []
+        relationships = []
+        for name in names:
+            info = found[name]
+            if info is None:
+                continue
+            tables.append(
+                {
+                    "table": name,
+                    "row_estimate": info["row_estimate"],
+                    "columns": [
+                        {"name": col["name"], "type": col["type"], "nullable": col["nullable"]}
+                        for col in info["columns"]
+                    ],
+                    "primary_key": info["primary_key"],
+                }
+            )
+            for fk in info["foreign_keys"]:
+                relationships.append(
+                    {
+                        "from_table": name,
+                        "from_columns": fk["columns"],
+                        "to_table": fk["references_table"],
+                        "to_columns": fk["references_columns"],
+                    }
+                )
+
+        result: dict[str, Any] = {"tables": tables, "relationships": relationships}
+        missing = [name for name in names if found[name] is None]
+        if missing:
+            result["missing"] = missing
+        return result
@@ -1,9 +1,7 @@
 from typing import Any
 
-from sqlalchemy import text
-
-from app.database import target_engine
 from app.tools.base import Tool
+from app.tools.catalog import catalog
 
 
 class ListTablesTool(Tool):
@@ -14,9 +12,5 @@ class ListTablesTool(Tool):
     parameters: dict = {"type": "object", "properties": {}}
 
     async def execute(self, params: dict) -> Any:
-        async with target_engine.connect() as conn:
-            result = await conn.execute(
-                text("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
-            )
-            tables = [row[0] for row in result.fetchall()]
-        return {"tables": tables}
+        tables = await catalog.snapshot()
+        return {"tables": list(tables)}
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import re
+from typing import Any
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import begin_guarded, target_engine, target_tool_slots
+from app.tools.base import Tool
+from app.tools.catalog import catalog
+from app.tools.data_version import data_versions
+from app.tools.result_cache import profile_cache
+from app.tools.result_format import ColumnarResult
+from app.tools.sketches import HyperLogLog, SpaceSaving, TDigest
+
+_VALID_TABLE_NAME = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+_QUANTILES = {"p05": 0.05, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p95": 0.95}
+_ORDERED = {"int", "float", "date"}
+_CATEGORICAL = {"text", "bool"}
+_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+# One per catalog table at most (names are checked against the catalog first),
+# and dropped along with the table's profile
+_locks: dict[str, asyncio.Lock] = {}
+
+
+def _drop_profiles(tables: set[str]) -> None:
+    for table in tables:
+        profile_cache.discard(table)
+        _locks.pop(table, None)
+
+
+data_versions.subscribe(_drop_profiles)
+
+
+def _merge_kind(kind: str | None, batch_kind: str) -> str | None:
+    """Combine column types inferred from separate batches."""
+    if batch_kind == "null":
+        return kind
+    if kind is None or kind == batch_kind:
+        return batch_kind
+    if {kind, batch_kind} == {"int", "float"}:
+        return "float"
+    return "text"
+
+
+def _round(value: float) -> float:
+    return float(f"{value:.6g}")
+
+
+class ColumnProfiler:
+    """Single-pass summary of one column: nulls, range, distinct count, top values, quantiles."""
+
+    def __init__(self, top_k: int):
+        self.top_k = top_k
+        self.kind: str | None = None
+        self.rows = 0
+        self.nulls = 0
+        self.min: Any = None
+        self.max: Any = None
+        self.distinct = HyperLogLog()
+        self.frequent = SpaceSaving(top_k * 10)
+        self.digest = TDigest()
+
+    def update(self, kind: str, values: Any) -> None:
+        self.kind = _merge_kind(self.kind, kind)
+        self.rows += len(values)
+        present = [value for value in values if value is not None]
+        self.nulls += len(values) - len(present)
+        if not present:
+            return
+        for value in present:
+            self.distinct.add(value)
+        # Array and JSON values are counted as distinct but have no order or top-k entry
+        scalars = [value for value in present if not isinstance(value, (list, dict))]
+        if not scalars:
+            return
+        if kind in _ORDERED and self.kind in _ORDERED:
+            low, high = min(scalars), max(scalars)
+            if self.min is None or low < self.min:
+                self.min = low
+            if self.max is None or high > self.max:
+                self.max = high
+        if kind in ("int", "float"):
+            for value in present:
+                self.digest.add(value)
+        if kind in _CATEGORICAL:
+            for value in scalars:
+                self.frequent.add(value)
+
+    def summary(self) -> dict[str, Any]:
+        kind = self.kind or "null"
+        profile: dict[str, Any] = {
+            "type": kind,
+            "null_fraction": round(self.nulls / self.rows, 4) if self.rows else 0.0,
+            "distinct_estimate": self.distinct.count(),
+        }
+        if kind in _ORDERED and self.min is not None:
+            profile["min"] = self.min
+            profile["max"] = self.max
+        if kind in ("int", "float") and self.digest.count:
+            profile["quantiles"] = {
+                label: _round(self.digest.quantile(q)) for label, q in _QUANTILES.items()
+            }
+        if kind in _CATEGORICAL:
+            # Only report values seen more than once; unique values are not "top"
+            top = [
+                {"value": value, "count": count}
+                for value, count, error in self.frequent.top(self.top_k)
+                if count - error > 1
+            ]
+            if top:
+                profile["top_values"] = top
+        return profile
+
+
+async def _scan(table: str, row_estimate: int) -> dict[str, Any]:
+    """Stream the table (or a block sample of a large one) through column profilers."""
+    max_rows = settings.PROFILE_MAX_ROWS
+    sampled = row_estimate > max_rows
+    if sampled:
+        method = settings.SAMPLE_TABLESAMPLE_METHOD.upper()
+        if method not in ("SYSTEM", "BERNOULLI"):
+            raise ValueError(f"Invalid TABLESAMPLE method: {method}")
+        percent = min(100.0, 100.0 * max_rows / row_estimate)
+        sql = f'SELECT * FROM "{table}" TABLESAMPLE {method} (:percent) LIMIT :limit'
+        params: dict[str, Any] = {"percent": percent, "limit": max_rows}
+    else:
+        sql = f'SELECT * FROM "{table}" LIMIT :limit'
+        params = {"limit": max_rows}
+
+    profilers: list[ColumnProfiler] = []
+    rows_scanned = 0
+    async with target_engine.connect() as conn:
+        await begin_guarded(conn)
+        result = await conn.stream(text(sql), params, execution_options={"yield_per": _BATCH_SIZE})
+        try:
+            columns = list(result.keys())
+            profilers = [ColumnProfiler(settings.PROFILE_TOP_K) for _ in columns]
+            while batch := await result.fetchmany(_BATCH_SIZE):
+                rows_scanned += len(batch)
+                encoded = ColumnarResult.from_rows(columns, batch)
+                for profiler, kind, values in zip(profilers, encoded.types, encoded.data):
+                    profiler.update(kind, values)
+        finally:
+            await result.close()
+
+    return {
+        "table": table,
+        "rows_scanned": rows_scanned,
+        "sampled": sampled or rows_scanned >= max_rows,
+        "columns": {name: profiler.summary() for name, profiler in zip(columns, profilers)},
+    }
+
+
+async def get_profile(table: str) -> dict[str, Any]:
+    """Return the column profile of ``table``, computing it once per data version."""
+    if not _VALID_TABLE_NAME.match(table):
+        raise ValueError(f"Invalid table name: {table}")
+    info = await catalog.table(table)
+    if info is None:
+        raise ValueError(f"Table not found: {table}")
+
+    await data_versions.check()
+    profile = profile_cache.get(table)
+    if profile is not None:
+        return profile
+    lock = _locks.setdefault(table, asyncio.Lock())
+    async with lock:
+        profile = profile_cache.get(table)
+        if profile is None:
+            profile = await _scan(table, info["row_estimate"])
+            profile_cache.put(table, profile)
+    return profile
+
+
+async def _profile_for_prompt(table: str) -> dict[str, Any]:
+    async with target_tool_slots:
+        return await get_profile(table)
+
+
+async def profiles_for_prompt(tables: list[str] | None) -> dict[str, dict]:
+    """Best-effort profiles for prompt context; failures are logged and skipped.
+
+    Profiles ``tables`` (all catalog tables when empty), at most
+    PROFILE_PROMPT_MAX_TABLES of them.
+    """
+    try:
+        if not tables:
+            tables = sorted(await catalog.snapshot())
+        tables = tables[: settings.PROFILE_PROMPT_MAX_TABLES]
+        results = await asyncio.gather(
+            *(_profile_for_prompt(table) for table in tables), return_exceptions=True
+        )
+    except Exception:
+        logger.warning("Could not load column profiles", exc_info=True)
+        return {}
+    profiles = {}
+    for table, result in zip(tables, results):
+        if isinstance(result, BaseException):
+            logger.warning("Could not profile table %s: %s", table, result)
+            continue
+        profiles[table] = result
+    return profiles
+
+
+class ProfileTableTool(Tool):
+    """Returns precomputed column statistics for a table.
+
+    Min/max, null fraction, approximate distinct counts (HyperLogLog), frequent
+    values and quantiles (t-digest) come from one streaming pass over the
+    table, cached until the table's data changes.
+    """
+
+    name = "profile_table"
+    description = (
+        "Returns per-column statistics for a table: type, null fraction, approximate "
+        "distinct count, min/max, quantiles of numeric columns and the most frequent "
+        "values of text columns. Use it instead of querying MIN/MAX/COUNT(DISTINCT)."
+    )
+    parameters = {
+        "type": "object",
+        "properties": {
+            "table": {"type": "string", "description": "Table name"},
+            "columns": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Only profile these columns (default: all)",
+            },
+        },
+        "required": ["table"],
+    }
+
+    async def execute(self, params: dict) -> dict[str, Any]:
+        profile = await get_profile(params["table"])
+        wanted = params.get("columns")
+        if not wanted:
+            return profile
+        unknown = [name for name in wanted if name not in profile["columns"]]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        return {**profile, "columns": {name: profile["columns"][name] for name in wanted}}
@@ -1,35 +1,135 @@
+import json
 from typing import Any
 
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
 
-from app.database import target_engine
+from app.config import settings
+from app.database import begin_guarded, target_engine
+from app.tools.analytics import snapshots
 from app.tools.base import Tool
-from app.tools.sql_safety import validate_sql
+from app.tools.data_version import data_versions
+from app.tools.result_cache import query_cache
+from app.tools.result_format import ColumnarResult
+from app.tools.sql_safety import check_sql
 
 MAX_ROWS = 1000
 
+_QUERY_CANCELED = "57014"
+
+# A query may read any table, so any data change invalidates every cached result
+data_versions.subscribe(lambda tables: query_cache.clear())
+
+
+async def _check_cost(conn: AsyncConnection, sql: str) -> dict | None:
+    """Run EXPLAIN and return a structured rejection if the estimate is over the limits."""
+    result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    top = plan[0]["Plan"]
+    cost = top["Total Cost"]
+    rows = top["Plan Rows"]
+    if cost <= settings.QUERY_MAX_COST and rows <= settings.QUERY_MAX_PLAN_ROWS:
+        return None
+    return {
+        "error": "Query rejected: the planner estimates it is too expensive to run.",
+        "estimated_cost": cost,
+        "estimated_rows": rows,
+        "max_cost": settings.QUERY_MAX_COST,
+        "max_rows": settings.QUERY_MAX_PLAN_ROWS,
+        "hint": (
+            "Rewrite the query: add selective WHERE filters, aggregate instead of "
+            "returning raw rows, add a LIMIT, and make sure every join has a join condition."
+        ),
+    }
+
+
+async def _fetch_streaming(conn: AsyncConnection, sql: str) -> tuple[list[str], list, bool]:
+    """Pull rows through a server-side cursor, stopping one row past the cap.
+
+    Memory stays bounded by the batch size; rows past MAX_ROWS + 1 are never
+    transferred from the server.
+    """
+    batch_size = settings.QUERY_STREAM_BATCH_SIZE
+    result = await conn.stream(text(sql), execution_options={"yield_per": batch_size})
+    try:
+        columns = list(result.keys())
+        rows: list = []
+        while len(rows) <= MAX_ROWS:
+            batch = await result.fetchmany(min(batch_size, MAX_ROWS + 1 - len(rows)))
+            if not batch:
+                break
+            rows.extend(batch)
+    finally:
+        await result.close()
+    return columns, rows[:MAX_ROWS], len(rows) > MAX_ROWS
+
+
+async def _fetch_buffered(conn: AsyncConnection, sql: str) -> tuple[list[str], list, bool]:
+    """Run the query with a client-side buffered result and cut it at the cap."""
+    result = await conn.execute(text(sql))
+    columns = list(result.keys())
+    rows = result.fetchmany(MAX_ROWS + 1)
+    return columns, rows[:MAX_ROWS], len(rows) > MAX_ROWS
+
 
 class QueryTool(Tool):
     """Executes a read-only SQL query against the target database.
 
-    Safety: validates SQL is SELECT-only, uses read-only database user,
-    enforces result size limits.
+    Safety: validates SQL is SELECT-only, uses read-only database user, runs
+    inside a read-only transaction with a statement timeout, rejects queries
+    whose EXPLAIN estimate is over the configured limits, and enforces result
+    size limits. Results are cached process-wide, keyed on the normalized SQL,
+    until they expire or the target data changes.
     """
 
     name = "query"
-    description = "Executes a read-only SQL query against the target database."
+    description = (
+        "Executes a read-only SQL query against the target database. "
+        f"At most {MAX_ROWS} rows are returned; 'truncated' is true when more were available."
+    )
     parameters = {
         "type": "object",
         "properties": {"sql": {"type": "string", "description": "SQL SELECT query to execute"}},
         "required": ["sql"],
     }
 
-    async def execute(self, params: dict) -> Any:
-        sql = validate_sql(params["sql"])
+    async def execute(self, params: dict) -> ColumnarResult | dict[str, Any]:
+        sql, cache_key = check_sql(params["sql"])
+
+        await data_versions.check()
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if settings.ANALYTICS_ENABLED:
+            output = await snapshots.try_execute(sql, MAX_ROWS)
+            if output is not None:
+                query_cache.put(cache_key, output, size=len(output.to_json()))
+                return output
 
+        fetch = _fetch_streaming if settings.QUERY_STREAMING else _fetch_buffered
         async with target_engine.connect() as conn:
-            result = await conn.execute(text(sql))
-            columns = list(result.keys())
-            rows = [list(row) for row in result.fetchmany(MAX_ROWS)]
+            await begin_guarded(conn)
+            if settings.QUERY_COST_CHECK:
+                rejection = await _check_cost(conn, sql)
+                if rejection is not None:
+                    return rejection
+            try:
+                columns, rows, truncated = await fetch(conn, sql)
+            except DBAPIError as exc:
+                if getattr(exc.orig, "pgcode", None) != _QUERY_CANCELED:
+                    raise
+                return {
+                    "error": (
+                        f"Query cancelled after the {settings.QUERY_STATEMENT_TIMEOUT_MS} ms "
+                        "statement timeout."
+                    ),
+                    "hint": "Narrow the query with filters or aggregation so it finishes faster.",
+                }
 
-        return {"columns": columns, "rows": rows, "row_count": len(rows)}
+        output = ColumnarResult.from_rows(columns, rows, truncated=truncated)
+        query_cache.put(cache_key, output, size=len(output.to_json()))
+        return output
@@ -0,0 +1,79 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.config import settings
+
+
+class ResultCache:
+    """Process-wide LRU cache for tool results with a TTL and a byte budget.
+
+    Entries are sized by their JSON encoding, which is also roughly what they
+    cost once they are sent back to the LLM. Cached values are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any, size: int | None = None) -> None:
+        """Store a value. ``size`` defaults to the length of its JSON encoding."""
+        if size is None:
+            size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+query_cache = ResultCache(settings.QUERY_CACHE_MAX_BYTES, settings.QUERY_CACHE_TTL_SECONDS)
+sample_cache = ResultCache(settings.SAMPLE_CACHE_MAX_BYTES, settings.SAMPLE_CACHE_TTL_SECONDS)
+profile_cache = ResultCache(settings.PROFILE_CACHE_MAX_BYTES, settings.PROFILE_CACHE_TTL_SECONDS)
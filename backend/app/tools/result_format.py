@@ -0,0 +1,185 @@
+import json
+import uuid
+from array import array
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+# default=str is a last resort; values are normally made JSON-native when a result is built
+_COMPACT = {"separators": (",", ":"), "ensure_ascii": False, "default": str}
+
+
+def _json_safe(value: Any) -> Any:
+    """Nested array/json column values with Decimal, date, UUID etc. made JSON-native."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            return str(value)
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return str(value)
+
+
+def _encode_column(values: Sequence[Any]) -> tuple[str, Sequence[Any]]:
+    """Convert a column to JSON-native values in one pass and infer its type.
+
+    Returns the column type ("int", "float", "bool", "date", "text" or "null")
+    and its values. Null-free numeric columns are packed into typed arrays.
+    """
+    kind: str | None = None
+    has_null = False
+    converted: list[Any] = []
+    append = converted.append
+    for value in values:
+        if value is None:
+            has_null = True
+            append(None)
+            continue
+        if isinstance(value, bool):
+            value_kind = "bool"
+        elif isinstance(value, int):
+            value_kind = "int"
+        elif isinstance(value, float):
+            value_kind = "float"
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                value, value_kind = str(value), "text"
+            elif value.as_tuple().exponent >= 0:
+                value, value_kind = int(value), "int"
+            else:
+                value, value_kind = float(value), "float"
+        elif isinstance(value, (datetime, date, time)):
+            value, value_kind = value.isoformat(), "date"
+        elif isinstance(value, str):
+            value_kind = "text"
+        elif isinstance(value, uuid.UUID):
+            value, value_kind = str(value), "text"
+        elif isinstance(value, (list, dict)):
+            value, value_kind = _json_safe(value), "text"
+        else:
+            value, value_kind = str(value), "text"
+
+        if kind is None or kind == value_kind:
+            kind = value_kind
+        elif {kind, value_kind} == {"int", "float"}:
+            kind = "float"
+        else:
+            kind = "text"
+        append(value)
+
+    if kind is None:
+        return "null", converted
+    if not has_null:
+        try:
+            if kind == "int":
+                return kind, array("q", converted)
+            if kind == "float":
+                return kind, array("d", converted)
+        except OverflowError:
+            pass
+    return kind, converted
+
+
+class ColumnarResult:
+    """Type-aware, column-oriented tabular result returned by data tools.
+
+    Values are converted to JSON-native types once when the result is built.
+    ``to_wire`` gives a compact JSON-ready dict for storage and transport;
+    ``to_llm`` gives a token-lean text form for tool messages.
+    """
+
+    __slots__ = ("columns", "types", "data", "row_count", "truncated", "table")
+
+    def __init__(
+        self,
+        columns: list[str],
+        types: list[str],
+        data: list[Sequence[Any]],
+        row_count: int,
+        truncated: bool = False,
+        table: str | None = None,
+    ):
+        self.columns = columns
+        self.types = types
+        self.data = data
+        self.row_count = row_count
+        self.truncated = truncated
+        self.table = table
+
+    @classmethod
+    def from_rows(
+        cls,
+        columns: list[str],
+        rows: Iterable[Sequence[Any]],
+        truncated: bool = False,
+        table: str | None = None,
+    ) -> "ColumnarResult":
+        rows = list(rows)
+        raw_columns = list(zip(*rows)) if rows else [() for _ in columns]
+        types: list[str] = []
+        data: list[Sequence[Any]] = []
+        for values in raw_columns:
+            kind, encoded = _encode_column(values)
+            types.append(kind)
+            data.append(encoded)
+        return cls(columns, types, data, len(rows), truncated, table)
+
+    def head(self, n: int) -> "ColumnarResult":
+        """First ``n`` rows, sharing no storage with this result."""
+        if n >= self.row_count:
+            n = self.row_count
+        return ColumnarResult(
+            self.columns,
+            self.types,
+            [values[:n] for values in self.data],
+            n,
+            self.truncated,
+            self.table,
+        )
+
+    @property
+    def rows(self) -> list[list[Any]]:
+        """Row-oriented view, materialized on demand."""
+        return [list(row) for row in zip(*self.data)]
+
+    def to_wire(self) -> dict:
+        wire: dict[str, Any] = {
+            "columns": self.columns,
+            "types": self.types,
+            "data": [list(values) for values in self.data],
+            "row_count": self.row_count,
+            "truncated": self.truncated,
+        }
+        if self.table is not None:
+            wire["table"] = self.table
+        return wire
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_wire(), **_COMPACT)
+
+    def to_llm(self) -> str:
+        """Header line describing the columns, then one compact JSON array per row."""
+        header: dict[str, Any] = {}
+        if self.table is not None:
+            header["table"] = self.table
+        header["columns"] = [f"{name}:{kind}" for name, kind in zip(self.columns, self.types)]
+        header["row_count"] = self.row_count
+        if self.truncated:
+            header["truncated"] = True
+        lines = [json.dumps(header, **_COMPACT)]
+        lines.extend(json.dumps(list(row), **_COMPACT) for row in zip(*self.data))
+        return "\n".join(lines)
+
+
+def render_tool_result(result: Any) -> str:
+    """Serialize a tool result for a tool message in the LLM conversation."""
+    if isinstance(result, ColumnarResult):
+        return result.to_llm()
+    return json.dumps(result, default=str)
@@ -1,19 +1,64 @@
 import re
-from typing import Any
 
 from sqlalchemy import text
 
-from app.database import target_engine
+from app.config import settings
+from app.database import begin_guarded, target_catalog_engine
 from app.tools.base import Tool
+from app.tools.catalog import catalog
+from app.tools.data_version import data_versions
+from app.tools.result_cache import sample_cache
+from app.tools.result_format import ColumnarResult
 
 _VALID_TABLE_NAME = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+_SAMPLE_METHODS = {"SYSTEM", "BERNOULLI"}
+
+# SYSTEM sampling picks whole pages, so ask for more than needed and trim
+_OVERSAMPLE = 5
+# Sample rate for tables whose size is unknown (never analyzed)
+_UNKNOWN_SIZE_PERCENT = 1.0
+# Views and foreign tables cannot be sampled with TABLESAMPLE
+_NO_TABLESAMPLE_KINDS = {"v", "f"}
+
+
+def _drop_samples(tables: set[str]) -> None:
+    for table in tables:
+        sample_cache.discard(table)
+
+
+data_versions.subscribe(_drop_samples)
+
+
+def _sample_sql(table: str, row_estimate: int, limit: int, tablesample: bool = True) -> tuple[str, dict]:
+    """Build a randomized sample query suited to the table's size.
+
+    An estimate of 0 or less (never analyzed) is treated as a large table.
+    """
+    if not tablesample or 0 < row_estimate < settings.SAMPLE_TABLESAMPLE_MIN_ROWS:
+        # Small tables: a full random sort is cheap and uniformly random
+        return f"SELECT * FROM {table} ORDER BY random() LIMIT :limit", {"limit": limit}
+    method = settings.SAMPLE_TABLESAMPLE_METHOD.upper()
+    if method not in _SAMPLE_METHODS:
+        raise ValueError(f"Invalid TABLESAMPLE method: {method}")
+    percent = _UNKNOWN_SIZE_PERCENT
+    if row_estimate > 0:
+        percent = min(100.0, 100.0 * limit * _OVERSAMPLE / row_estimate)
+    return (
+        f"SELECT * FROM {table} TABLESAMPLE {method} (:percent) LIMIT :limit",
+        {"percent": percent, "limit": limit},
+    )
 
 
 class SampleDataTool(Tool):
-    """Returns sample rows to help the LLM understand data formats and value ranges."""
+    """Returns sample rows to help the LLM understand data formats and value ranges.
+
+    Rows are randomly sampled (TABLESAMPLE on large tables) and kept in a
+    per-table reservoir, so repeat calls are served from memory until the
+    table's data changes.
+    """
 
     name = "sample_data"
-    description = "Returns sample rows from a table to understand data formats."
+    description = "Returns randomly sampled rows from a table to understand data formats."
     parameters = {
         "type": "object",
         "properties": {
@@ -23,29 +68,40 @@ class SampleDataTool(Tool):
         "required": ["table"],
     }
 
-    async def execute(self, params: dict) -> Any:
+    async def execute(self, params: dict) -> ColumnarResult:
         table = params["table"]
         limit = params.get("limit", 5)
 
         if not _VALID_TABLE_NAME.match(table):
             raise ValueError(f"Invalid table name: {table}")
 
-        async with target_engine.connect() as conn:
-            check = await conn.execute(
-                text(
-                    "SELECT table_name FROM information_schema.tables "
-                    "WHERE table_name = :table AND table_schema = 'public'"
-                ),
-                {"table": table},
-            )
-            if not check.fetchone():
-                raise ValueError(f"Table not found: {table}")
-
-            result = await conn.execute(
-                text(f"SELECT * FROM {table} LIMIT :limit"),
-                {"limit": limit},
-            )
+        info = await catalog.table(table)
+        if info is None:
+            raise ValueError(f"Table not found: {table}")
+
+        await data_versions.check()
+        reservoir = sample_cache.get(table)
+        # A reservoir that is not truncated holds the whole table
+        if reservoir is not None and (reservoir.row_count >= limit or not reservoir.truncated):
+            return reservoir.head(limit)
+
+        want = max(limit, settings.SAMPLE_RESERVOIR_SIZE)
+        # The catalog's estimate is as old as its snapshot; the data-version poll has a fresher one
+        row_estimate = data_versions.row_estimates.get(table, info["row_estimate"])
+        tablesample = info.get("kind") not in _NO_TABLESAMPLE_KINDS
+        sql, sql_params = _sample_sql(table, row_estimate, want, tablesample)
+        async with target_catalog_engine.connect() as conn:
+            await begin_guarded(conn)
+            result = await conn.execute(text(sql), sql_params)
             columns = list(result.keys())
-            rows = [list(row) for row in result.fetchall()]
+            rows = result.fetchall()
+            if "percent" in sql_params and len(rows) < want:
+                # The sampled pages came up short; fall back to plain rows
+                result = await conn.execute(
+                    text(f"SELECT * FROM {table} LIMIT :limit"), {"limit": want}
+                )
+                rows = result.fetchall()
 
-        return {"table": table, "columns": columns, "rows": rows}
+        reservoir = ColumnarResult.from_rows(columns, rows, truncated=len(rows) >= want, table=table)
+        sample_cache.put(table, reservoir, size=len(reservoir.to_json()))
+        return reservoir.head(limit)
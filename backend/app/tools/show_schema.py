@@ -1,9 +1,7 @@
 from typing import Any
 
-from sqlalchemy import text
-
-from app.database import target_engine
 from app.tools.base import Tool
+from app.tools.catalog import catalog
 
 
 class ShowSchemaTool(Tool):
@@ -19,17 +17,20 @@ class ShowSchemaTool(Tool):
 
     async def execute(self, params: dict) -> Any:
         table = params["table"]
-        async with target_engine.connect() as conn:
-            result = await conn.execute(
-                text(
-                    "SELECT column_name, data_type, is_nullable "
-                    "FROM information_schema.columns "
-                    "WHERE table_name = :table AND table_schema = 'public'"
-                ),
-                {"table": table},
-            )
-            columns = [
-                {"column_name": row[0], "data_type": row[1], "is_nullable": row[2]}
-                for row in result.fetchall()
-            ]
-        return {"table": table, "columns": columns}
+        info = await catalog.table(table)
+        if info is None:
+            raise ValueError(f"Table not found: {table}")
+        columns = [
+            {
+                "column_name": col["name"],
+                "data_type": col["type"],
+                "is_nullable": "YES" if col["nullable"] else "NO",
+            }
+            for col in info["columns"]
+        ]
+        return {
+            "table": table,
+            "columns": columns,
+            "primary_key": info["primary_key"],
+            "foreign_keys": info["foreign_keys"],
+        }
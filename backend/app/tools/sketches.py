@@ -0,0 +1,156 @@
+import math
+from hashlib import blake2b
+from typing import Any
+
+_INVERSE_POWERS = [2.0**-rank for rank in range(65)]
+
+
+class HyperLogLog:
+    """Approximate distinct counter using ``2 ** precision`` one-byte registers.
+
+    The standard error is about ``1.04 / sqrt(2 ** precision)`` (1.6% at the
+    default precision of 12), independent of how many values are added.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: Any) -> None:
+        digest = blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        width = 64 - self.precision
+        index = hashed >> width
+        rank = width - (hashed & ((1 << width) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(_INVERSE_POWERS[r] for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting is more accurate here
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class TDigest:
+    """Merging t-digest for streaming quantile estimates.
+
+    Values are buffered and periodically merged into at most about
+    ``compression`` centroids. Centroids near the tails stay small, so
+    extreme quantiles are more accurate than the median.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: list[tuple[float, float]] = []  # (mean, weight), sorted by mean
+        self._buffer: list[float] = []
+        self._buffer_size = int(compression * 5)
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        self._buffer.append(value)
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def _scale(self, q: float) -> float:
+        """k1 scale function: centroid sizes shrink toward q = 0 and q = 1."""
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + [(value, 1.0) for value in self._buffer])
+        self._buffer = []
+        total = float(self.count)
+        merged: list[tuple[float, float]] = []
+        mean, weight = points[0]
+        weight_before = 0.0
+        for next_mean, next_weight in points[1:]:
+            q_left = weight_before / total
+            q_right = (weight_before + weight + next_weight) / total
+            if self._scale(q_right) - self._scale(q_left) <= 1:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append((mean, weight))
+                weight_before += weight
+                mean, weight = next_mean, next_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the value at quantile ``q`` (0..1), or None if nothing was added."""
+        self._compress()
+        if not self._centroids:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        target = q * self.count
+        # Interpolate between centroid centers, anchored at min and max
+        previous_center, previous_mean = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in self._centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                if center == previous_center:
+                    return mean
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+        if cumulative <= previous_center:
+            return self.max
+        fraction = (target - previous_center) / (cumulative - previous_center)
+        return previous_mean + fraction * (self.max - previous_mean)
+
+
+class SpaceSaving:
+    """Heavy-hitter counter holding at most ``2 * capacity`` values.
+
+    Counts are exact while the number of distinct values fits. Past that, the
+    least frequent half is evicted in one batch and newcomers start at the
+    highest evicted count, so every reported count is an overestimate by at
+    most its ``error``.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts: dict[Any, list[int]] = {}  # value -> [count, error]
+        self._floor = 0
+
+    def add(self, value: Any) -> None:
+        entry = self._counts.get(value)
+        if entry is not None:
+            entry[0] += 1
+            return
+        self._counts[value] = [self._floor + 1, self._floor]
+        if len(self._counts) > 2 * self.capacity:
+            ranked = sorted(self._counts.items(), key=lambda item: item[1][0], reverse=True)
+            self._floor = max(self._floor, ranked[self.capacity][1][0])
+            self._counts = dict(ranked[: self.capacity])
+
+    def top(self, k: int) -> list[tuple[Any, int, int]]:
+        """The ``k`` most frequent values as (value, count, error), most frequent first."""
+        ranked = sorted(self._counts.items(), key=lambda item: item[1][0], reverse=True)
+        return [(value, count, error) for value, (count, error) in ranked[:k]]
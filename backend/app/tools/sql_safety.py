@@ -1,30 +1,179 @@
 import re
+from functools import lru_cache
+from typing import NamedTuple
 
 DANGEROUS_KEYWORDS = [
     "INSERT", "UPDATE", "DELETE", "DROP", "ALTER",
     "TRUNCATE", "CREATE", "GRANT", "REVOKE",
+    "INTO", "COPY", "MERGE", "CALL", "LOCK",
 ]
 
-_dangerous_pattern = re.compile(
-    r"\b(" + "|".join(DANGEROUS_KEYWORDS) + r")\b",
-    re.IGNORECASE,
+_DANGEROUS = frozenset(DANGEROUS_KEYWORDS)
+_ALLOWED_STARTS = frozenset({"SELECT", "WITH"})
+
+# Ordered alternatives; the first that matches at the current position wins.
+# Escape strings, block comments and dollar quotes need more than a regex and
+# are finished by hand in tokenize.
+_TOKEN = re.compile(
+    r"""
+      (?P<ws>\s+)
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*)
+    | (?P<estring>[eE]')
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<qident>"(?:[^"]|"")*")
+    | (?P<dollar>\$(?:[A-Za-z_\u0080-\uffff][A-Za-z0-9_\u0080-\uffff]*)?\$)
+    | (?P<param>\$\d+)
+    | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<word>[A-Za-z_\u0080-\uffff][A-Za-z0-9_$\u0080-\uffff]*)
+    | (?P<punct>[(),;\[\]])
+    | (?P<op>::|[.:]|(?:(?!--|/\*)[+\-*/<>=~!@#%^&|`?])+)
+    """,
+    re.VERBOSE,
 )
 
 
-def validate_sql(sql: str) -> str:
-    cleaned = sql.strip()
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+
+
+class SqlVerdict(NamedTuple):
+    """An accepted query: the SQL to run and its normalized fingerprint."""
+
+    sql: str
+    fingerprint: str
+
+
+def _end_of_block_comment(sql: str, pos: int) -> int:
+    """Return the index just past a (possibly nested) block comment opened at ``pos``."""
+    depth = 0
+    i = pos
+    n = len(sql)
+    while i < n:
+        if sql.startswith("/*", i):
+            depth += 1
+            i += 2
+        elif sql.startswith("*/", i):
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    raise ValueError("Unterminated block comment")
+
+
+def _end_of_escape_string(sql: str, pos: int) -> int:
+    """Return the index just past an E'...' string whose opening quote is at ``pos``."""
+    i = pos + 1
+    n = len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == "\\":
+            i += 2
+        elif ch == "'":
+            if i + 1 < n and sql[i + 1] == "'":
+                i += 2
+            else:
+                return i + 1
+        else:
+            i += 1
+    raise ValueError("Unterminated quoted string")
+
+
+def tokenize(sql: str) -> list[Token]:
+    """Split SQL into significant tokens, dropping whitespace and comments."""
+    tokens: list[Token] = []
+    pos = 0
+    n = len(sql)
+    match = _TOKEN.match
+    while pos < n:
+        m = match(sql, pos)
+        if m is None:
+            if sql[pos] in "'\"":
+                raise ValueError("Unterminated quoted string")
+            raise ValueError(f"Unexpected character in SQL: {sql[pos]!r}")
+        kind = m.lastgroup
+        end = m.end()
+        if kind == "block_comment":
+            end = _end_of_block_comment(sql, pos)
+        elif kind == "estring":
+            end = _end_of_escape_string(sql, pos + 1)
+            tokens.append(Token("string", sql[pos:end], pos))
+        elif kind == "dollar":
+            tag = m.group()
+            close = sql.find(tag, end)
+            if close == -1:
+                raise ValueError("Unterminated dollar-quoted string")
+            end = close + len(tag)
+            tokens.append(Token("string", sql[pos:end], pos))
+        elif kind not in ("ws", "line_comment"):
+            tokens.append(Token(kind, m.group(), pos))
+        pos = end
+    return tokens
+
 
-    if not cleaned:
-        raise ValueError("SQL query cannot be empty")
+def _fingerprint(tokens: list[Token]) -> str:
+    """Lowercase bare words, keep literals and quoted identifiers, single-space tokens."""
+    return " ".join(t.text.lower() if t.kind == "word" else t.text for t in tokens)
 
-    if ";" in cleaned:
-        raise ValueError("Multiple statements are not allowed")
 
-    if not cleaned.upper().startswith("SELECT"):
-        raise ValueError("Only SELECT queries are allowed")
+@lru_cache(maxsize=4096)
+def _check(sql: str) -> SqlVerdict | str:
+    """Memoized verdict for a raw SQL string: a SqlVerdict, or the rejection reason."""
+    try:
+        tokens = tokenize(sql)
+    except ValueError as exc:
+        return str(exc)
+
+    # Trailing semicolons are harmless; any other semicolon separates statements
+    end = len(tokens)
+    while end and tokens[end - 1].text == ";":
+        end -= 1
+    body = tokens[:end]
+
+    if not body:
+        return "SQL query cannot be empty"
+    if any(t.text == ";" for t in body):
+        return "Multiple statements are not allowed"
+
+    first = next((t for t in body if t.text != "("), None)
+    if first is None or first.kind != "word" or first.text.upper() not in _ALLOWED_STARTS:
+        return "Only SELECT queries are allowed"
+
+    for token in body:
+        if token.kind == "word" and token.text.upper() in _DANGEROUS:
+            return f"Forbidden keyword: {token.text.upper()}"
+
+    last = body[-1]
+    cleaned = sql[body[0].start : last.start + len(last.text)]
+    return SqlVerdict(cleaned, _fingerprint(body))
+
+
+def check_sql(sql: str) -> SqlVerdict:
+    """Validate that SQL is a single read-only SELECT (optionally with CTEs).
+
+    The query is tokenized, so semicolons and keywords inside string literals,
+    quoted identifiers and comments are not mistaken for statements. Raises
+    ValueError with the reason on rejection.
+    """
+    verdict = _check(sql)
+    if isinstance(verdict, str):
+        raise ValueError(verdict)
+    return verdict
+
+
+def validate_sql(sql: str) -> str:
+    """Validate SQL and return it with surrounding whitespace and trailing semicolons removed."""
+    return check_sql(sql).sql
+
 
-    match = _dangerous_pattern.search(cleaned)
-    if match:
-        raise ValueError(f"Forbidden keyword: {match.group(0).upper()}")
+def normalize_sql(sql: str) -> str:
+    """Return the normalized fingerprint of a query for use as a cache key.
 
-    return cleaned
+    Reformatted copies of a query (whitespace, keyword case, comments) share
+    the same fingerprint; literals and quoted identifiers are kept verbatim.
+    """
+    return check_sql(sql).fingerprint
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import re
+from difflib import SequenceMatcher
+from typing import Any
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import begin_guarded, target_catalog_engine
+from app.tools.catalog import catalog
+from app.tools.data_version import data_versions
+
+logger = logging.getLogger(__name__)
+
+_TEXT_TYPES = ("text", "character", "citext")
+
+# n_distinct is negative when Postgres expects it to scale with the row count
+# (a fraction of rows), positive when it is an absolute count.
+_STATS_SQL = """
+SELECT attname, n_distinct, most_common_vals::text::text[]
+FROM pg_stats
+WHERE schemaname = 'public' AND tablename = :table
+"""
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(value: str) -> str:
+    return " ".join(_WORD.findall(value.lower()))
+
+
+def _is_text(column_type: str) -> bool:
+    """Scalar text types only; "text[]" and "character varying[]" hold arrays."""
+    return column_type.startswith(_TEXT_TYPES) and not column_type.endswith("]")
+
+
+def _similarity(phrase: str, value: str) -> float:
+    """Similarity of two normalized strings, ignoring spacing ("health care" = "healthcare")."""
+    phrase, value = phrase.replace(" ", ""), value.replace(" ", "")
+    if phrase == value:
+        return 1.0
+    if len(value) < 4:
+        return 0.0
+    matcher = SequenceMatcher(None, phrase, value, autojunk=False)
+    if matcher.real_quick_ratio() < settings.VALUE_MATCH_THRESHOLD:
+        return 0.0
+    if matcher.quick_ratio() < settings.VALUE_MATCH_THRESHOLD:
+        return 0.0
+    return matcher.ratio()
+
+
+class ValueDictionary:
+    """Distinct values of low-cardinality text columns in the target database.
+
+    Categorical columns are detected from the catalog (text types) and
+    pg_stats (estimated distinct count at most ``max_distinct``). When the
+    planner statistics hold every value they are used as-is; otherwise small
+    tables are scanned with SELECT DISTINCT. Entries are dropped when a
+    table's modification counters or the schema fingerprint change.
+    """
+
+    def __init__(self, max_distinct: int, scan_max_rows: int):
+        self.max_distinct = max_distinct
+        self.scan_max_rows = scan_max_rows
+        self._tables: dict[str, tuple[str | None, dict[str, list[str]]]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def columns(self, table: str) -> dict[str, list[str]]:
+        """Return the categorical columns of ``table`` and their values."""
+        info = await catalog.table(table)
+        if info is None:
+            return {}
+        entry = self._tables.get(table)
+        if entry is not None and entry[0] == catalog.fingerprint:
+            return entry[1]
+        lock = self._locks.setdefault(table, asyncio.Lock())
+        async with lock:
+            entry = self._tables.get(table)
+            if entry is not None and entry[0] == catalog.fingerprint:
+                return entry[1]
+            values = await self._load(info)
+            self._tables[table] = (catalog.fingerprint, values)
+        return values
+
+    async def _load(self, info: dict) -> dict[str, list[str]]:
+        table = info["name"]
+        text_columns = [col["name"] for col in info["columns"] if _is_text(col["type"])]
+        if not text_columns:
+            return {}
+        row_estimate = info["row_estimate"]
+        quoted_table = '"' + table.replace('"', '""') + '"'
+        values: dict[str, list[str]] = {}
+        async with target_catalog_engine.connect() as conn:
+            await begin_guarded(conn)
+            result = await conn.execute(text(_STATS_SQL), {"table": table})
+            stats = {row[0]: (row[1], row[2]) for row in result.fetchall()}
+            for column in text_columns:
+                n_distinct, common = stats.get(column, (None, None))
+                if n_distinct is not None:
+                    estimate = n_distinct if n_distinct >= 0 else -n_distinct * row_estimate
+                    if estimate > self.max_distinct:
+                        continue
+                    if common and len(common) >= estimate:
+                        # The most-common-values list already holds every value
+                        values[column] = sorted(common)
+                        continue
+                if row_estimate > self.scan_max_rows:
+                    continue
+                quoted = '"' + column.replace('"', '""') + '"'
+                result = await conn.execute(
+                    text(
+                        f"SELECT DISTINCT {quoted} FROM {quoted_table} "
+                        f"WHERE {quoted} IS NOT NULL LIMIT :limit"
+                    ),
+                    {"limit": self.max_distinct + 1},
+                )
+                distinct = [row[0] for row in result.fetchall() if isinstance(row[0], str)]
+                if len(distinct) <= self.max_distinct:
+                    values[column] = sorted(distinct)
+        return values
+
+    async def lookup(self, question: str, tables: list[str]) -> list[dict[str, Any]]:
+        """Find column values that fuzzily match phrases in ``question``.
+
+        Returns at most VALUE_HINTS_MAX matches as {table, column, value,
+        score}, best first.
+        """
+        words = _normalize(question).split()
+        matches: dict[tuple[str, str, str], float] = {}
+        for table in tables:
+            for column, values in (await self.columns(table)).items():
+                for value in values:
+                    if not isinstance(value, str):
+                        continue
+                    normalized = _normalize(value)
+                    if not normalized:
+                        continue
+                    size = len(normalized.split())
+                    best = 0.0
+                    for n in range(max(1, size - 1), size + 2):
+                        for i in range(len(words) - n + 1):
+                            best = max(best, _similarity(" ".join(words[i : i + n]), normalized))
+                    if best >= settings.VALUE_MATCH_THRESHOLD:
+                        matches[(table, column, value)] = best
+        ranked = sorted(matches.items(), key=lambda item: item[1], reverse=True)
+        return [
+            {"table": table, "column": column, "value": value, "score": round(score, 2)}
+            for (table, column, value), score in ranked[: settings.VALUE_HINTS_MAX]
+        ]
+
+    def drop(self, tables: set[str]) -> None:
+        for table in tables:
+            self._tables.pop(table, None)
+            self._locks.pop(table, None)
+
+    def clear(self) -> None:
+        self._tables.clear()
+        self._locks.clear()
+
+
+value_dictionary = ValueDictionary(
+    settings.VALUE_DICTIONARY_MAX_DISTINCT, settings.VALUE_DICTIONARY_SCAN_MAX_ROWS
+)
+data_versions.subscribe(value_dictionary.drop)
+
+
+async def value_hints_for_prompt(question: str, tables: list[str] | None) -> list[dict[str, Any]]:
+    """Best-effort value matches for prompt context; failures are logged and skipped.
+
+    Looks in ``tables`` (all catalog tables when empty).
+    """
+    try:
+        await data_versions.check()
+        if not tables:
+            tables = sorted(await catalog.snapshot())
+        return await value_dictionary.lookup(question, tables)
+    except Exception:
+        logger.warning("Could not look up column values", exc_info=True)
+        return []
+
+
+def format_value_hints(hints: list[dict[str, Any]]) -> str:
+    """Prompt section listing matched values, grouped by column."""
+    by_column: dict[str, list[str]] = {}
+    for hint in hints:
+        by_column.setdefault(f"{hint['table']}.{hint['column']}", []).append(
+            "'" + hint["value"].replace("'", "''") + "'"
+        )
+    lines = [f"- {column}: {', '.join(values)}" for column, values in by_column.items()]
+    return (
+        "Column values matching the question (use these exact literals in filters):\n"
+        + "\n".join(lines)
+    )
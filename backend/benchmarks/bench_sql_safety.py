@@ -0,0 +1,43 @@
+"""Microbenchmark for the SQL validator.
+
+Run from backend/:  uv run python -m benchmarks.bench_sql_safety
+"""
+
+import timeit
+
+from app.tools.sql_safety import _check, check_sql
+
+QUERIES = [
+    "SELECT count(*) FROM companies",
+    "SELECT industry_vertical, AVG(arr_thousands) AS avg_arr FROM companies "
+    "GROUP BY industry_vertical ORDER BY avg_arr DESC",
+    "WITH top AS (SELECT company_name, arr_thousands FROM companies "
+    "WHERE industry_vertical = 'Fintech' ORDER BY arr_thousands DESC LIMIT 10) "
+    "SELECT * FROM top /* top ten */",
+    "SELECT company_name, founding_year, churn_rate_percent, yoy_growth_rate_percent "
+    "FROM companies WHERE churn_rate_percent > 5.5 AND note <> 'a; b' "
+    "AND founding_year BETWEEN 2010 AND 2020 ORDER BY 3 DESC LIMIT 100",
+]
+
+
+def _cold() -> None:
+    for sql in QUERIES:
+        _check.cache_clear()
+        check_sql(sql)
+
+
+def _warm() -> None:
+    for sql in QUERIES:
+        check_sql(sql)
+
+
+def main(number: int = 2000) -> None:
+    cold = min(timeit.repeat(_cold, number=number, repeat=3)) / (number * len(QUERIES))
+    _warm()
+    warm = min(timeit.repeat(_warm, number=number, repeat=3)) / (number * len(QUERIES))
+    print(f"tokenize + validate: {cold * 1e6:8.2f} us/query")
+    print(f"memoized verdict:    {warm * 1e6:8.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
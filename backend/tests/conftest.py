@@ -1,3 +1,5 @@
+from unittest.mock import AsyncMock
+
 import pytest
 from httpx import ASGITransport, AsyncClient
 
@@ -9,3 +11,36 @@ async def client():
     transport = ASGITransport(app=app, raise_app_exceptions=False)
     async with AsyncClient(transport=transport, base_url="http://test") as c:
         yield c
+
+
+@pytest.fixture(autouse=True)
+def _isolate_tool_caches(monkeypatch):
+    """Start every test with empty process-wide caches and no target DB polling."""
+    from app.pipeline.plan_cache import plan_cache
+    from app.services.llm import model_usage, prompt_cache_stats
+    from app.tools.analytics import snapshots
+    from app.tools.catalog import catalog
+    from app.tools.data_version import data_versions
+    from app.tools.result_cache import profile_cache, query_cache, sample_cache
+    from app.tools.value_dictionary import value_dictionary
+
+    query_cache.clear()
+    sample_cache.clear()
+    profile_cache.clear()
+    catalog.clear()
+    snapshots.clear()
+    value_dictionary.clear()
+    plan_cache.clear()
+    prompt_cache_stats.clear()
+    model_usage.clear()
+    monkeypatch.setattr(data_versions, "check", AsyncMock(return_value={}))
+    yield
+    query_cache.clear()
+    sample_cache.clear()
+    profile_cache.clear()
+    catalog.clear()
+    snapshots.clear()
+    value_dictionary.clear()
+    plan_cache.clear()
+    prompt_cache_stats.clear()
+    model_usage.clear()
@@ -0,0 +1,275 @@
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.tools.analytics import (
+    TableSnapshots,
+    execute_simple_select,
+    parse_simple_select,
+)
+from app.tools.result_format import ColumnarResult
+
+
+def _companies():
+    return ColumnarResult.from_rows(
+        ["company_name", "industry", "arr", "churn", "public"],
+        [
+            ("Acme", "Fintech", 100, Decimal("0.1"), True),
+            ("Globex", "Fintech", 300, Decimal("0.2"), False),
+            ("Initech", "Healthcare", 200, None, False),
+            ("Umbrella", "Healthcare", None, Decimal("0.5"), True),
+            ("Hooli", None, 50, Decimal("0.3"), False),
+        ],
+        table="companies",
+    )
+
+
+def _run(sql, max_rows=1000):
+    query = parse_simple_select(sql)
+    assert query is not None, sql
+    return execute_simple_select(query, _companies(), max_rows)
+
+
+# --- Parsing ---
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM companies c JOIN orders o ON o.company_name = c.company_name",
+        "SELECT * FROM companies, orders",
+        "WITH x AS (SELECT 1) SELECT * FROM x",
+        "SELECT * FROM companies WHERE arr > 1 OR arr < 0",
+        "SELECT industry FROM companies GROUP BY industry HAVING count(*) > 1",
+        "SELECT lower(industry) FROM companies",
+        "SELECT * FROM public.companies",
+        "SELECT * FROM companies WHERE arr IN (SELECT arr FROM orders)",
+        "SELECT * FROM companies ORDER BY arr NULLS FIRST",
+        "SELECT arr + 1 FROM companies",
+    ],
+)
+def test_parse_falls_back_outside_subset(sql):
+    assert parse_simple_select(sql) is None
+
+
+def test_parse_simple_select():
+    query = parse_simple_select(
+        'SELECT c.industry AS vertical, count(*) FROM "companies" c '
+        "WHERE c.arr >= 100 AND industry IS NOT NULL GROUP BY 1 ORDER BY 2 DESC LIMIT 5"
+    )
+    assert query.table == "companies"
+    assert [item.alias for item in query.items] == ["vertical", None]
+    assert query.where[0] == ("arr", ">=", 100)
+    assert query.where[1].op == "is not null"
+    assert query.group_by == [1]
+    assert query.order_by[0].descending is True
+    assert query.limit == 5
+
+
+# --- Execution ---
+
+
+def test_filter_and_project():
+    result = _run("SELECT company_name, arr FROM companies WHERE arr > 100 ORDER BY arr")
+    assert result.rows == [["Initech", 200], ["Globex", 300]]
+
+
+def test_null_comparisons_exclude_nulls():
+    result = _run("SELECT company_name FROM companies WHERE industry <> 'Fintech'")
+    assert result.rows == [["Initech"], ["Umbrella"]]
+    result = _run("SELECT company_name FROM companies WHERE industry NOT IN ('Fintech')")
+    assert result.rows == [["Initech"], ["Umbrella"]]
+    result = _run("SELECT company_name FROM companies WHERE industry IS NULL")
+    assert result.rows == [["Hooli"]]
+
+
+def test_group_by_with_aggregates():
+    result = _run(
+        "SELECT industry, count(*) AS n, count(arr), sum(arr), round(avg(churn), 2) "
+        "FROM companies WHERE industry IS NOT NULL GROUP BY industry ORDER BY n DESC, 4"
+    )
+    assert result.columns == ["industry", "n", "count", "sum", "round"]
+    assert result.rows == [
+        ["Healthcare", 2, 1, 200, 0.5],
+        ["Fintech", 2, 2, 400, 0.15],
+    ]
+
+
+def test_float_sums_are_exact_like_numeric():
+    result = _run("SELECT sum(churn) FROM companies WHERE company_name IN ('Acme', 'Globex')")
+    assert result.rows == [[0.3]]
+
+
+def test_aggregates_over_empty_input():
+    result = _run("SELECT count(*), sum(arr), max(arr) FROM companies WHERE arr > 1000")
+    assert result.rows == [[0, None, None]]
+    assert result.types == ["int", "int", "int"]
+
+
+def test_null_ordering_matches_postgres():
+    asc = _run("SELECT company_name FROM companies ORDER BY arr")
+    desc = _run("SELECT company_name FROM companies ORDER BY arr DESC")
+    assert asc.rows[-1] == ["Umbrella"]
+    assert desc.rows[0] == ["Umbrella"]
+
+
+def test_distinct_limit_and_offset():
+    result = _run("SELECT DISTINCT public FROM companies ORDER BY public")
+    assert result.rows == [[False], [True]]
+    result = _run("SELECT company_name FROM companies ORDER BY arr LIMIT 2 OFFSET 1")
+    assert result.rows == [["Acme"], ["Initech"]]
+
+
+def test_row_cap_marks_truncated():
+    result = _run("SELECT company_name FROM companies", max_rows=2)
+    assert result.row_count == 2
+    assert result.truncated is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT company_name FROM companies ORDER BY company_name",
+        "SELECT max(industry) FROM companies",
+        "SELECT * FROM companies WHERE arr = '100'",
+        "SELECT * FROM companies WHERE industry > 'F'",
+        "SELECT industry, arr FROM companies GROUP BY industry",
+        "SELECT missing FROM companies",
+    ],
+)
+async def test_unsupported_semantics_fall_back(sql):
+    snapshots = TableSnapshots(max_rows=100)
+    snapshots._tables["companies"] = _companies()
+    assert await snapshots.try_execute(sql, 1000) is None
+
+
+# --- Snapshots ---
+
+
+def _mock_table_connect(columns, rows):
+    result = MagicMock()
+    result.keys.return_value = columns
+    result.fetchall.return_value = rows
+    conn = AsyncMock()
+    conn.execute = AsyncMock(return_value=result)
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, conn
+
+
+@pytest.mark.asyncio
+async def test_snapshot_loaded_once_and_dropped_on_data_change():
+    from app.tools.data_version import data_versions
+
+    snapshots = TableSnapshots(max_rows=100)
+    data_versions.subscribe(snapshots.drop)
+    ctx, conn = _mock_table_connect(["id"], [(1,), (2,)])
+
+    with patch("app.tools.analytics.catalog") as mock_catalog, \
+         patch("app.tools.analytics.target_engine") as mock_engine:
+        mock_catalog.table = AsyncMock(
+            return_value={"row_estimate": 2, "columns": [{"name": "id", "type": "integer"}]}
+        )
+        mock_engine.connect.return_value = ctx
+        first = await snapshots.try_execute("SELECT count(*) FROM items", 1000)
+        second = await snapshots.try_execute("SELECT max(id) FROM items", 1000)
+        for listener in data_versions._listeners:
+            listener({"items"})
+        await snapshots.try_execute("SELECT count(*) FROM items", 1000)
+    data_versions._listeners.remove(snapshots.drop)
+
+    assert first.rows == [[2]]
+    assert second.rows == [[2]]
+    assert mock_engine.connect.call_count == 2
+    # Loaded inside the same read-only, time-limited transaction as ad-hoc queries
+    conn.execution_options.assert_awaited_with(postgresql_readonly=True)
+    assert "set_config('statement_timeout'" in str(conn.execute.await_args_list[0].args[0])
+
+
+@pytest.mark.asyncio
+async def test_failed_snapshot_load_falls_back():
+    from sqlalchemy.exc import OperationalError
+
+    snapshots = TableSnapshots(max_rows=100)
+    ctx, conn = _mock_table_connect(["id"], [(1,), (2,)])
+    conn.execute.side_effect = [None, OperationalError("SELECT", {}, Exception("canceled"))]
+
+    with patch("app.tools.analytics.catalog") as mock_catalog, \
+         patch("app.tools.analytics.target_engine") as mock_engine:
+        mock_catalog.table = AsyncMock(
+            return_value={"row_estimate": 2, "columns": [{"name": "id", "type": "integer"}]}
+        )
+        mock_engine.connect.return_value = ctx
+        assert await snapshots.try_execute("SELECT count(*) FROM items", 1000) is None
+
+    # The failure is not remembered, so the next query tries again
+    assert "items" not in snapshots._tables
+
+
+@pytest.mark.asyncio
+async def test_large_tables_are_not_snapshotted():
+    snapshots = TableSnapshots(max_rows=100)
+
+    with patch("app.tools.analytics.catalog") as mock_catalog, \
+         patch("app.tools.analytics.target_engine") as mock_engine:
+        mock_catalog.table = AsyncMock(return_value={"row_estimate": 5000})
+        assert await snapshots.try_execute("SELECT count(*) FROM events", 1000) is None
+        assert await snapshots.try_execute("SELECT count(*) FROM events", 1000) is None
+
+    mock_catalog.table.assert_awaited_once()
+    mock_engine.connect.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_query_tool_routes_to_snapshots_when_enabled():
+    from app.tools.analytics import snapshots
+    from app.tools.query import QueryTool
+
+    snapshots._tables["companies"] = _companies()
+
+    with patch("app.tools.query.settings") as mock_settings, \
+         patch("app.tools.query.target_engine") as mock_engine:
+        mock_settings.ANALYTICS_ENABLED = True
+        tool = QueryTool()
+        result = await tool.execute({"sql": "SELECT count(*) AS cnt FROM companies"})
+
+    assert result.rows == [[5]]
+    mock_engine.connect.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_non_plain_columns_fall_back():
+    snapshots = TableSnapshots(max_rows=100)
+    rows = [(1, ["a", "b"], "US "), (2, ["a"], "CA ")]
+    ctx, conn = _mock_table_connect(["id", "tags", "country"], rows)
+    columns = [
+        {"name": "id", "type": "integer"},
+        {"name": "tags", "type": "text[]"},
+        {"name": "country", "type": "character(3)"},
+    ]
+
+    with patch("app.tools.analytics.catalog") as mock_catalog, \
+         patch("app.tools.analytics.target_engine") as mock_engine:
+        mock_catalog.table = AsyncMock(return_value={"row_estimate": 2, "columns": columns})
+        mock_engine.connect.return_value = ctx
+        projected = await snapshots.try_execute("SELECT id, tags FROM items ORDER BY id", 1000)
+        for sql in (
+            "SELECT DISTINCT tags FROM items",
+            "SELECT count(DISTINCT tags) FROM items",
+            "SELECT tags, count(*) FROM items GROUP BY tags",
+            "SELECT id FROM items WHERE tags = 'a'",
+            "SELECT id FROM items WHERE country = 'US'",
+        ):
+            assert await snapshots.try_execute(sql, 1000) is None, sql
+
+    assert projected.rows == [[1, ["a", "b"]], [2, ["a"]]]
+
+
+@pytest.mark.asyncio
+async def test_unhashable_values_fall_back():
+    snapshots = TableSnapshots(max_rows=100)
+    snapshots._tables["items"] = ColumnarResult.from_rows(["tags"], [(["a"],), (["b"],)], table="items")
+    assert await snapshots.try_execute("SELECT DISTINCT tags FROM items", 1000) is None
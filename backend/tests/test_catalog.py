@@ -0,0 +1,109 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.tools.catalog import CatalogCache
+
+
+def _result(scalar=None, rows=None):
+    result = MagicMock()
+    result.scalar_one.return_value = scalar
+    result.fetchall.return_value = rows or []
+    return result
+
+
+def _snapshot_row(name, columns):
+    return (
+        name,
+        -1,
+        json.dumps([{"name": c, "type": "integer", "nullable": True} for c in columns]),
+        "[]",
+        "[]",
+        "r",
+    )
+
+
+def _mock_connect(*results):
+    conn = AsyncMock()
+    conn.execute = AsyncMock(side_effect=list(results))
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, conn
+
+
+@pytest.mark.asyncio
+async def test_catalog_reuses_snapshot_while_fingerprint_unchanged():
+    cache = CatalogCache(check_interval=0)
+    ctx, conn = _mock_connect(
+        _result(scalar="fp-1"),
+        _result(rows=[_snapshot_row("companies", ["id"])]),
+        _result(scalar="fp-1"),
+    )
+
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        first = await cache.snapshot()
+        second = await cache.snapshot()
+
+    assert first is second
+    assert list(second) == ["companies"]
+    # fingerprint, snapshot, fingerprint — no second snapshot load
+    assert conn.execute.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_catalog_reloads_when_fingerprint_changes():
+    cache = CatalogCache(check_interval=0)
+    ctx, conn = _mock_connect(
+        _result(scalar="fp-1"),
+        _result(rows=[_snapshot_row("companies", ["id"])]),
+        _result(scalar="fp-2"),
+        _result(rows=[_snapshot_row("companies", ["id", "name"])]),
+    )
+
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        await cache.snapshot()
+        tables = await cache.snapshot()
+
+    assert [c["name"] for c in tables["companies"]["columns"]] == ["id", "name"]
+    assert tables["companies"]["row_estimate"] == 0
+    assert cache.fingerprint == "fp-2"
+
+
+@pytest.mark.asyncio
+async def test_catalog_skips_fingerprint_within_check_interval():
+    cache = CatalogCache(check_interval=60)
+    ctx, conn = _mock_connect(
+        _result(scalar="fp-1"),
+        _result(rows=[_snapshot_row("companies", ["id"])]),
+    )
+
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        await cache.snapshot()
+        await cache.snapshot()
+        await cache.table("companies")
+
+    assert mock_engine.connect.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_catalog_table_miss_forces_recheck():
+    cache = CatalogCache(check_interval=60)
+    ctx, conn = _mock_connect(
+        _result(scalar="fp-1"),
+        _result(rows=[_snapshot_row("companies", ["id"])]),
+        _result(scalar="fp-2"),
+        _result(rows=[_snapshot_row("companies", ["id"]), _snapshot_row("orders", ["id"])]),
+    )
+
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        await cache.snapshot()
+        orders = await cache.table("orders")
+
+    assert orders is not None
+    assert orders["name"] == "orders"
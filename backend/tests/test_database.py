@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.database import check_target_liveness, ping_engine
+
+
+def _mock_engine(execute_side_effect=None):
+    conn = AsyncMock()
+    conn.execute = AsyncMock(side_effect=execute_side_effect)
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    engine = MagicMock()
+    engine.connect.return_value = ctx
+    engine.dispose = AsyncMock()
+    return engine, conn
+
+
+@pytest.mark.asyncio
+async def test_ping_engine_ok():
+    engine, conn = _mock_engine()
+
+    assert await ping_engine(engine) is True
+    assert str(conn.execute.await_args.args[0]) == "SELECT 1"
+    engine.dispose.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ping_engine_failure_disposes_pool():
+    engine, conn = _mock_engine(OperationalError("SELECT 1", None, Exception("server closed")))
+
+    assert await ping_engine(engine) is False
+    engine.dispose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_liveness_checker_pings_both_target_pools():
+    query_engine, _ = _mock_engine()
+    catalog_engine, _ = _mock_engine()
+
+    with (
+        patch("app.database.target_engine", query_engine),
+        patch("app.database.target_catalog_engine", catalog_engine),
+    ):
+        task = asyncio.create_task(check_target_liveness(0.01))
+        await asyncio.sleep(0.035)
+        task.cancel()
+
+    assert query_engine.connect.call_count >= 2
+    assert catalog_engine.connect.call_count >= 2
+
+
+def test_target_pools_have_no_pre_ping():
+    from app.database import target_catalog_engine, target_engine
+
+    assert target_engine.pool._pre_ping is False
+    assert target_catalog_engine.pool._pre_ping is False
@@ -0,0 +1,57 @@
+from app.pipeline.explore_output import RecordedCall, build_explore_output, summarize_result
+from app.tools.result_format import ColumnarResult
+
+
+def _result(columns, rows, **kwargs):
+    return ColumnarResult.from_rows(columns, rows, **kwargs)
+
+
+def test_summarize_result():
+    assert summarize_result(_result(["n"], [(3,)])) == "1 row: n=3"
+    assert (
+        summarize_result(_result(["a", "b"], [(1, 2), (3, 4)], truncated=True))
+        == "2 rows (truncated); columns: a, b"
+    )
+    assert summarize_result({"error": "Query rejected", "hint": "Add a LIMIT"}) == "Error: Query rejected"
+
+
+def test_build_explore_output_from_queries():
+    calls = [
+        RecordedCall("query", {"sql": "SELECT 1 AS a"}, _result(["a"], [(1,)])),
+        RecordedCall("query", {"sql": "SELECT broken"}, {"error": "syntax error"}),
+        RecordedCall("query", {"sql": "SELECT 2 AS b"}, _result(["b"], [(2,)])),
+    ]
+
+    output = build_explore_output(calls, "notes")
+
+    assert [query.sql for query in output.queries_executed] == ["SELECT 1 AS a", "SELECT broken", "SELECT 2 AS b"]
+    assert output.queries_executed[1].result_summary == "Error: syntax error"
+    assert output.raw_data == [
+        {"sql": "SELECT 1 AS a", "rows": [{"a": 1}]},
+        {"sql": "SELECT 2 AS b", "rows": [{"b": 2}]},
+    ]
+    assert output.exploration_notes == "notes"
+
+
+def test_build_explore_output_collects_schema_context():
+    calls = [
+        RecordedCall(
+            "describe_tables",
+            {"tables": ["companies"]},
+            {"tables": [{"table": "companies", "columns": [{"name": "id"}, {"name": "name"}]}]},
+        ),
+        RecordedCall("profile_table", {"table": "orders"}, {"table": "orders", "columns": {"total": {}}}),
+        RecordedCall("sample_data", {"table": "orders"}, _result(["id", "total"], [(1, 9)], table="orders")),
+        RecordedCall("show_schema", {"table": "missing"}, {"error": "Table not found: missing"}),
+    ]
+
+    output = build_explore_output(calls, "", {"users": ["id"], "companies": ["id"]})
+
+    assert output.schema_context == {
+        "users": ["id"],
+        "companies": ["id", "name"],
+        "orders": ["total", "id"],
+    }
+    assert output.queries_executed == []
+    # Without queries, the last successful result stands in as the raw data
+    assert output.raw_data == [{"id": 1, "total": 9}]
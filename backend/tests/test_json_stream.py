@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from app.services.json_stream import JSONStreamParser
+
+DOC = (
+    '```json\n{"text_answer": "Caf\\u00e9 \\ud83d\\ude00 said \\"hi\\"\\n", '
+    '"table_data": {"columns": ["name", "total"], "rows": [["a", 1.5], [null, -2e3]]}, '
+    '"chart_data": null, "flags": [true, false, {}], "empty": []}\n```'
+)
+
+
+def _parse(doc, size):
+    parser = JSONStreamParser()
+    events = []
+    for i in range(0, len(doc), size):
+        events.extend(parser.feed(doc[i : i + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 13, len(DOC)])
+def test_chunking_does_not_change_the_result(size):
+    parser, events = _parse(DOC, size)
+    expected = json.loads(DOC.removeprefix("```json\n").removesuffix("\n```"))
+
+    assert parser.done
+    root = [value for kind, path, value in events if kind == "value" and path == ()]
+    assert root == [expected]
+    text = "".join(value for kind, path, value in events if kind == "delta" and path == ("text_answer",))
+    assert text == expected["text_answer"]
+    rows = [(path, value) for kind, path, value in events if kind == "value" and path[:2] == ("table_data", "rows") and len(path) == 3]
+    assert rows == [(("table_data", "rows", 0), ["a", 1.5]), (("table_data", "rows", 1), [None, -2000.0])]
+
+
+def test_string_deltas_arrive_before_the_string_closes():
+    parser = JSONStreamParser()
+
+    assert parser.feed('{"text_answer": "Rev') == [("delta", ("text_answer",), "Rev")]
+    assert parser.feed("enue grew") == [("delta", ("text_answer",), "enue grew")]
+    assert parser.feed(' 5%", "x"') == [
+        ("delta", ("text_answer",), " 5%"),
+        ("value", ("text_answer",), "Revenue grew 5%"),
+    ]
+
+
+def test_split_escape_is_not_emitted_half_decoded():
+    parser = JSONStreamParser()
+
+    assert parser.feed('["a\\u00') == [("delta", (0,), "a")]
+    assert parser.feed('e9"]') == [
+        ("delta", (0,), "é"),
+        ("value", (0,), "aé"),
+        ("value", (), ["aé"]),
+    ]
+
+
+def test_text_after_the_root_value_is_ignored():
+    parser = JSONStreamParser()
+    events = parser.feed('{"a": 1}\n``` trailing {"b": 2}')
+
+    assert events[-1] == ("value", (), {"a": 1})
+    assert parser.feed("more") == []
+
+
+@pytest.mark.parametrize("doc", ['{"a" 1}', '{"a": 1,}', "[1,]", '{"a": tru}', "[1}"])
+def test_malformed_json_raises(doc):
+    with pytest.raises(ValueError):
+        JSONStreamParser().feed(doc)
@@ -74,7 +74,8 @@ async def test_llm_chat_with_tools(llm):
     assert msg.tool_calls is not None
     assert msg.tool_calls[0].function.name == "get_weather"
     call_kwargs = mock_completion.call_args.kwargs
-    assert call_kwargs["tools"] == tools
+    # The tool definitions end with a prompt-cache breakpoint
+    assert call_kwargs["tools"] == [{**tools[0], "cache_control": {"type": "ephemeral"}}]
 
 
 class SimpleAnswer(BaseModel):
@@ -125,3 +126,358 @@ async def test_llm_chat_json_handles_bare_code_block(llm):
     assert isinstance(result, SimpleAnswer)
     assert result.answer == "4"
     assert result.confidence == 0.8
+
+
+@pytest.mark.asyncio
+async def test_llm_clients_share_one_transport():
+    from app.services.llm import llm_transport
+
+    fake = _fake_response(content="Hi")
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock_completion:
+        await LLMClient().chat(messages=[{"role": "user", "content": "hi"}])
+        await LLMClient().chat(messages=[{"role": "user", "content": "hi again"}])
+
+    first, second = (call.kwargs["client"] for call in mock_completion.call_args_list)
+    assert first is second is llm_transport.openai
+    assert first._client is llm_transport.http
+
+
+@pytest.mark.asyncio
+async def test_transport_probe_and_warm_up():
+    import httpx
+
+    from app.services.llm import LLMTransport
+
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"status": "healthy"})
+
+    transport = LLMTransport()
+    transport._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    await transport.warm_up()
+    resp = await transport.probe()
+    await transport.close()
+
+    assert resp.status_code == 200
+    assert len(seen) == 2
+    assert seen[0].url.path.endswith("health")
+    assert seen[0].headers["Authorization"].startswith("Bearer ")
+
+
+@pytest.mark.asyncio
+async def test_transport_warm_up_tolerates_unreachable_proxy():
+    import httpx
+
+    from app.services.llm import LLMTransport
+
+    def handler(request):
+        raise httpx.ConnectError("connection refused")
+
+    transport = LLMTransport()
+    transport._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    await transport.warm_up()
+    await transport.close()
+    assert transport._http is None
+
+
+@pytest.mark.asyncio
+async def test_llm_health_uses_shared_transport(client):
+    import httpx
+
+    with patch(
+        "app.main.llm_transport.probe",
+        new_callable=AsyncMock,
+        return_value=httpx.Response(200),
+    ) as mock_probe:
+        resp = await client.get("/api/llm-health")
+
+    assert resp.json() == {"status": "ok"}
+    mock_probe.assert_awaited_once()
+
+
+def _fake_stream(*parts):
+    """Build a fake litellm streaming response yielding ``parts`` as content deltas."""
+
+    async def chunks():
+        for part in parts:
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = part
+            yield chunk
+
+    return chunks()
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_json_stream(llm):
+    seen = []
+
+    async def on_event(event):
+        seen.append(event)
+
+    fake = _fake_stream("```json\n", '{"answer": "fo', 'ur", "confi', 'dence": 0.9}', "\n```")
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock_completion:
+        result = await llm.chat_json_stream(
+            messages=[{"role": "user", "content": "What is 2+2?"}],
+            schema=SimpleAnswer,
+            on_event=on_event,
+        )
+
+    assert result == SimpleAnswer(answer="four", confidence=0.9)
+    assert mock_completion.call_args.kwargs["stream"] is True
+    assert [value for kind, path, value in seen if kind == "delta"] == ["fo", "ur"]
+    assert ("value", ("confidence",), 0.9) in seen
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_json_stream_still_validates_the_result(llm):
+    from pydantic import ValidationError
+
+    async def on_event(event):
+        pass
+
+    fake = _fake_stream('{"answer": "four"}')
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake):
+        with pytest.raises(ValidationError):
+            await llm.chat_json_stream(
+                messages=[{"role": "user", "content": "What is 2+2?"}],
+                schema=SimpleAnswer,
+                on_event=on_event,
+            )
+
+
+@pytest.mark.asyncio
+async def test_llm_stats_reports_scheduler_and_cache(client):
+    resp = await client.get("/api/llm-stats")
+
+    body = resp.json()
+    assert set(body["scheduler"]["queued"]) == {"answer", "plan", "explore", "background"}
+    assert body["cache"]["mode"] == "off"
+    assert body["prompt_cache"] == {}
+
+
+@pytest.fixture
+def structured_mode():
+    """Force LLM_STRUCTURED_OUTPUT for one test."""
+    from app.services.llm import _structured_mode
+
+    def set_mode(mode):
+        patcher = patch("app.services.llm.settings.LLM_STRUCTURED_OUTPUT", mode)
+        patcher.start()
+        patches.append(patcher)
+        _structured_mode.cache_clear()
+
+    patches = []
+    yield set_mode
+    for patcher in patches:
+        patcher.stop()
+    _structured_mode.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_json_forced_tool_call(llm, structured_mode):
+    structured_mode("tool")
+    tool_call = MagicMock()
+    tool_call.function.name = "submit_simple_answer"
+    tool_call.function.arguments = '{"answer": "4", "confidence": 0.9}'
+    fake = _fake_response(content=None, tool_calls=[tool_call])
+    explore_tool = {"type": "function", "function": {"name": "query", "parameters": {}}}
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock_completion:
+        result = await llm.chat_json(
+            messages=[{"role": "system", "content": "Be brief."}],
+            schema=SimpleAnswer,
+            tools=[explore_tool],
+        )
+
+    assert result == SimpleAnswer(answer="4", confidence=0.9)
+    kwargs = mock_completion.call_args.kwargs
+    assert [t["function"]["name"] for t in kwargs["tools"]] == ["query", "submit_simple_answer"]
+    assert kwargs["tool_choice"] == {"type": "function", "function": {"name": "submit_simple_answer"}}
+    assert kwargs["messages"][0]["content"] == "Be brief."
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_json_response_format(llm, structured_mode):
+    structured_mode("json_schema")
+    fake = _fake_response(content='{"answer": "4", "confidence": 0.9}')
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock_completion:
+        await llm.chat_json(messages=[{"role": "user", "content": "2+2?"}], schema=SimpleAnswer)
+
+    kwargs = mock_completion.call_args.kwargs
+    assert kwargs["response_format"]["type"] == "json_schema"
+    assert kwargs["response_format"]["json_schema"]["name"] == "simple_answer"
+    assert kwargs["messages"] == [{"role": "user", "content": "2+2?"}]
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_json_prompt_mode_describes_schema(llm, structured_mode):
+    structured_mode("prompt")
+    fake = _fake_response(content='{"answer": "4", "confidence": 0.9}')
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock_completion:
+        await llm.chat_json(messages=[{"role": "user", "content": "2+2?"}], schema=SimpleAnswer)
+
+    kwargs = mock_completion.call_args.kwargs
+    assert "Respond with JSON matching this schema" in kwargs["messages"][0]["content"]
+    assert "response_format" not in kwargs and kwargs["tool_choice"] is None
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_json_repairs_instead_of_failing(llm):
+    fake = _fake_response(content='{"answer": "4", "confidence": 0.99,')
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake):
+        result = await llm.chat_json(messages=[{"role": "user", "content": "2+2?"}], schema=SimpleAnswer)
+
+    assert result == SimpleAnswer(answer="4", confidence=0.99)
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_json_stream_reads_tool_call_arguments(llm, structured_mode):
+    structured_mode("tool")
+    seen = []
+
+    async def on_event(event):
+        seen.append(event)
+
+    async def chunks():
+        for part in ['{"answer": "fo', 'ur", "confidence": 1}']:
+            call = MagicMock()
+            call.function.arguments = part
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = None
+            chunk.choices[0].delta.tool_calls = [call]
+            yield chunk
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=chunks()):
+        result = await llm.chat_json_stream(
+            messages=[{"role": "user", "content": "2+2?"}], schema=SimpleAnswer, on_event=on_event
+        )
+
+    assert result == SimpleAnswer(answer="four", confidence=1)
+    assert [value for kind, _, value in seen if kind == "delta"] == ["fo", "ur"]
+
+
+def test_cache_breakpoints_mark_stable_prefixes():
+    from app.services.llm import with_cache_breakpoints
+
+    messages = [
+        {"role": "system", "content": "You are an analyst."},
+        {"role": "user", "content": "How many companies?"},
+    ]
+    tools = [{"type": "function", "function": {"name": "a"}}, {"type": "function", "function": {"name": "b"}}]
+
+    marked, marked_tools = with_cache_breakpoints(messages, tools)
+
+    assert marked[0]["cache_control"] == {"type": "ephemeral"}
+    assert marked[-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in marked_tools[0]
+    assert marked_tools[-1]["cache_control"] == {"type": "ephemeral"}
+    # The caller's messages are left untouched
+    assert "cache_control" not in messages[0]
+
+    marked, _ = with_cache_breakpoints(messages, None)
+    assert "cache_control" in marked[0]
+    assert "cache_control" not in marked[-1]
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_records_prompt_cache_usage(llm):
+    from litellm import Usage
+
+    from app.services.llm import prompt_cache_stats
+
+    fake = _fake_response(content="Hello")
+    fake.usage = Usage(
+        prompt_tokens=1000,
+        completion_tokens=10,
+        total_tokens=1010,
+        cache_read_input_tokens=800,
+        cache_creation_input_tokens=0,
+    )
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock_completion:
+        await llm.chat(messages=[{"role": "system", "content": "Stable"}, {"role": "user", "content": "Hi"}])
+
+    assert mock_completion.call_args.kwargs["messages"][0]["cache_control"] == {"type": "ephemeral"}
+    stats = prompt_cache_stats.stats()["background"]
+    assert stats["prompt_tokens"] == 1000
+    assert stats["cache_read_tokens"] == 800
+    assert stats["hit_ratio"] == 0.8
+
+
+@pytest.mark.asyncio
+async def test_llm_chat_without_prompt_caching(llm):
+    fake = _fake_response(content="Hello")
+
+    with (
+        patch("app.services.llm.settings.LLM_PROMPT_CACHING", False),
+        patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock_completion,
+    ):
+        await llm.chat(messages=[{"role": "system", "content": "Stable"}, {"role": "user", "content": "Hi"}])
+
+    assert "cache_control" not in mock_completion.call_args.kwargs["messages"][0]
+
+
+def test_route_model_prefers_the_most_specific_route():
+    from app.services.llm import escalated, route_model
+
+    routes = {"plan": "fast", "answer:skip_explore": "fast", "answer:chart": "vision"}
+    with (
+        patch("app.services.llm.settings.LLM_MODEL_ROUTES", routes),
+        patch("app.services.llm.settings.LLM_MODEL", "default"),
+        patch("app.services.llm.settings.LLM_ESCALATION_MODEL", "strong"),
+    ):
+        assert route_model("plan") == "fast"
+        assert route_model("answer", "skip_explore") == "fast"
+        assert route_model("answer", "scalar") == "default"
+        assert route_model("explore") == "default"
+        assert route_model(None) == "default"
+
+        token = escalated.set(True)
+        try:
+            assert route_model("plan") == "strong"
+        finally:
+            escalated.reset(token)
+
+
+def test_routing_is_off_by_default():
+    from app.config import Settings, settings
+    from app.services.llm import escalated, route_model
+
+    defaults = Settings()
+    with (
+        patch("app.services.llm.settings.LLM_MODEL_ROUTES", defaults.LLM_MODEL_ROUTES),
+        patch("app.services.llm.settings.LLM_ESCALATION_MODEL", defaults.LLM_ESCALATION_MODEL),
+    ):
+        token = escalated.set(True)
+        try:
+            assert route_model("plan") == settings.LLM_MODEL
+            assert route_model("explore", "summary") == settings.LLM_MODEL
+        finally:
+            escalated.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_llm_stats_reports_models_per_step(client, llm):
+    from app.services.llm import current_step
+
+    token = current_step.set("plan")
+    try:
+        with (
+            patch("app.services.llm.settings.LLM_MODEL_ROUTES", {"plan": "fast"}),
+            patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=_fake_response()),
+        ):
+            await llm.chat(messages=[{"role": "user", "content": "Hi"}])
+    finally:
+        current_step.reset(token)
+
+    resp = await client.get("/api/llm-stats")
+
+    assert resp.json()["models"] == {"plan": {"models": {"fast": 1}, "escalated": 0}}
@@ -0,0 +1,174 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import litellm
+import pytest
+
+from app.services.llm import LLMClient, current_step
+from app.services.llm_cache import LLMCacheMiss, LLMResponseCache, cache_key, is_deterministic
+
+
+def _response(content="Hello"):
+    return litellm.ModelResponse(
+        choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]
+    )
+
+
+@pytest.fixture
+def use_cache(monkeypatch, tmp_path):
+    def install(mode):
+        cache = LLMResponseCache(mode, str(tmp_path), max_entries=10)
+        monkeypatch.setattr("app.services.llm.llm_cache", cache)
+        return cache
+
+    return install
+
+
+def test_cache_key_is_canonical():
+    messages = [{"role": "user", "content": "hi"}]
+    assert cache_key("m", messages, None, None, {"a": 1, "b": 2}) == cache_key(
+        "m", messages, None, None, {"b": 2, "a": 1}
+    )
+    assert cache_key("m", messages, None, None, {}) != cache_key("other", messages, None, None, {})
+
+
+def test_only_pinned_temperature_is_deterministic():
+    assert is_deterministic({"temperature": 0})
+    assert is_deterministic({"temperature": 0, "n": None})
+    assert not is_deterministic({})
+    assert not is_deterministic({"temperature": 0.7})
+    assert not is_deterministic({"temperature": 0, "n": 2})
+    assert not is_deterministic({"temperature": 0, "stream": True})
+
+
+@pytest.mark.asyncio
+async def test_cache_mode_serves_repeat_calls_from_memory_and_disk(use_cache, tmp_path):
+    cache = use_cache("cache")
+    messages = [{"role": "user", "content": "How many companies?"}]
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=_response()) as mock:
+        first = await LLMClient().chat(messages)
+        second = await LLMClient().chat(messages)
+        cache.clear_memory()
+        third = await LLMClient().chat(messages)
+
+    assert mock.await_count == 1
+    assert first.choices[0].message.content == "Hello"
+    assert second.choices[0].message.content == "Hello"
+    assert third.choices[0].message.content == "Hello"
+    assert len(list(tmp_path.rglob("*.json"))) == 1
+    assert cache.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_temperature_pinned_only_while_the_cache_serves_the_call(use_cache, monkeypatch):
+    monkeypatch.setattr("app.services.llm_cache.settings.LLM_CACHE_TTL_SECONDS", {"explore": 0.0})
+    messages = [{"role": "user", "content": "hi"}]
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=_response()) as mock:
+        use_cache("off")
+        await LLMClient().chat(messages)
+        assert "temperature" not in mock.call_args.kwargs
+
+        use_cache("cache")
+        token = current_step.set("explore")
+        try:
+            await LLMClient().chat(messages)
+        finally:
+            current_step.reset(token)
+        assert "temperature" not in mock.call_args.kwargs
+
+        await LLMClient().chat(messages)
+        assert mock.call_args.kwargs["temperature"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_bypassed_for_sampling_calls(use_cache):
+    use_cache("cache")
+    messages = [{"role": "user", "content": "Tell me a story"}]
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=_response()) as mock:
+        await LLMClient().chat(messages, temperature=0.7)
+        await LLMClient().chat(messages, temperature=0.7)
+
+    assert mock.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_per_step_ttl(use_cache, monkeypatch):
+    use_cache("cache")
+    monkeypatch.setattr(
+        "app.services.llm_cache.settings.LLM_CACHE_TTL_SECONDS", {"plan": 3600.0, "explore": 0.0}
+    )
+    messages = [{"role": "user", "content": "hi"}]
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=_response()) as mock:
+        for step in ("explore", "explore", "plan", "plan"):
+            token = current_step.set(step)
+            try:
+                await LLMClient().chat(messages)
+            finally:
+                current_step.reset(token)
+
+    # explore is never cached; plan is cached after the first call
+    assert mock.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_refetched(use_cache, tmp_path):
+    cache = use_cache("cache")
+    messages = [{"role": "user", "content": "hi"}]
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=_response()) as mock:
+        await LLMClient().chat(messages)
+        cache.clear_memory()
+        (path,) = tmp_path.rglob("*.json")
+        entry = json.loads(path.read_text())
+        entry["expires_at"] = 0.5
+        path.write_text(json.dumps(entry))
+        await LLMClient().chat(messages)
+
+    assert mock.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(use_cache):
+    messages = [{"role": "user", "content": "benchmark question"}]
+
+    use_cache("record")
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=_response("42")) as mock:
+        await LLMClient().chat(messages)
+        await LLMClient().chat(messages)
+    # Record mode always calls the LLM
+    assert mock.await_count == 2
+
+    use_cache("replay")
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock) as mock:
+        replayed = await LLMClient().chat(messages)
+        with pytest.raises(LLMCacheMiss):
+            await LLMClient().chat([{"role": "user", "content": "never recorded"}])
+    mock.assert_not_awaited()
+    assert replayed.choices[0].message.content == "42"
+
+
+def test_invalid_mode_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Invalid LLM cache mode"):
+        LLMResponseCache("sometimes", str(tmp_path), 10)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_steps_set_current_step():
+    from app.pipeline.base import PipelineStep
+
+    seen = []
+
+    class RecordingStep(PipelineStep):
+        name = "plan"
+
+        async def execute(self, input_data, llm_client):
+            seen.append(current_step.get())
+            return None
+
+    await RecordingStep().execute_with_retry({}, LLMClient())
+    assert seen == ["plan"]
+    assert current_step.get() is None
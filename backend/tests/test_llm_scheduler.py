@@ -0,0 +1,145 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.llm import LLMScheduler, TokenBucket, current_step, estimate_tokens
+from app.services.token_budget import message_tokens
+
+
+async def _call(scheduler, order, step=None, conversation=None, hold=0.0):
+    if step is not None:
+        current_step.set(step)
+    async with scheduler.slot(10, conversation):
+        order.append((step, conversation))
+        await asyncio.sleep(hold)
+
+
+async def _queued_behind_busy_slot(scheduler, calls):
+    """Start ``calls`` while the only slot is taken, then free it and run them."""
+    order = []
+    async with scheduler.slot(10):
+        tasks = [asyncio.create_task(_call(scheduler, order, *call)) for call in calls]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_priority_classes_in_order():
+    scheduler = LLMScheduler(1, 0, 0)
+    order = await _queued_behind_busy_slot(
+        scheduler, [(None, "a"), ("explore", "a"), ("plan", "a"), ("answer", "a")]
+    )
+
+    assert [step for step, _ in order] == ["answer", "plan", "explore", None]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_round_robins_conversations_within_a_class():
+    scheduler = LLMScheduler(1, 0, 0)
+    order = await _queued_behind_busy_slot(
+        scheduler, [("explore", "a"), ("explore", "a"), ("explore", "a"), ("explore", "b")]
+    )
+
+    assert [conversation for _, conversation in order] == ["a", "b", "a", "a"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrency_and_reports_stats():
+    scheduler = LLMScheduler(2, 0, 0)
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with scheduler.slot(10):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    tasks = [asyncio.create_task(call()) for _ in range(5)]
+    await asyncio.sleep(0)
+    stats = scheduler.stats()
+    await asyncio.gather(*tasks)
+
+    assert peak == 2
+    assert stats["active"] == 2
+    assert stats["queued"]["background"] == 3
+    final = scheduler.stats()
+    assert final["active"] == 0
+    assert final["granted"] == 5
+    assert final["max_wait_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_drops_cancelled_waiters():
+    scheduler = LLMScheduler(1, 0, 0)
+    order = []
+    async with scheduler.slot(10):
+        cancelled = asyncio.create_task(_call(scheduler, order, "plan", "a"))
+        waiting = asyncio.create_task(_call(scheduler, order, "explore", "b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queued"]["plan"] == 0
+    await waiting
+
+    assert order == [("explore", "b")]
+    assert scheduler.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_waits_for_the_rate_limit(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.llm.time.monotonic", lambda: clock[0])
+    scheduler = LLMScheduler(10, 2, 0)
+    order = []
+
+    for _ in range(2):
+        async with scheduler.slot(10):
+            pass
+    task = asyncio.create_task(_call(scheduler, order))
+    await asyncio.sleep(0)
+    assert order == [] and scheduler.stats()["queued"]["background"] == 1
+
+    clock[0] += 30  # one request's worth of refill
+    scheduler._dispatch()
+    await task
+    assert order == [(None, None)]
+
+
+def test_token_bucket_refills_over_a_minute(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("app.services.llm.time.monotonic", lambda: clock[0])
+    bucket = TokenBucket(600)
+
+    assert bucket.delay(600) == 0
+    bucket.take(600)
+    assert bucket.delay(60) == pytest.approx(6.0)
+    clock[0] += 6
+    assert bucket.delay(60) == 0
+    # Requests above the limit wait for a full bucket rather than forever
+    assert bucket.delay(10_000) == pytest.approx(54.0)
+    assert TokenBucket(0).delay(10_000) == 0
+
+
+@pytest.mark.asyncio
+async def test_reservation_settles_with_actual_usage(monkeypatch):
+    monkeypatch.setattr("app.services.llm.time.monotonic", lambda: 0.0)
+    scheduler = LLMScheduler(1, 0, 1000)
+    response = MagicMock()
+    response.usage.total_tokens = 150
+
+    async with scheduler.slot(400) as reservation:
+        assert scheduler.tokens.available == 600
+        reservation.settle(response)
+
+    assert scheduler.tokens.available == 850
+
+
+def test_estimate_tokens_counts_prompt_and_completion():
+    messages = [{"role": "user", "content": "x" * 400}]
+
+    assert estimate_tokens(messages, max_tokens=50) == message_tokens(messages) + 50
+    assert estimate_tokens(messages) == message_tokens(messages) + 1000
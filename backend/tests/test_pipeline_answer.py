@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
@@ -182,3 +182,67 @@ async def test_answer_step_dataset(answer_step, mock_llm):
     messages = mock_llm.chat_json.call_args[0][0]
     system_content = messages[0]["content"]
     assert "table_data" in system_content
+
+
+@pytest.mark.asyncio
+async def test_answer_step_streams_rows_and_text(answer_step, mock_llm):
+    async def fake_stream(messages, schema, on_event, **kwargs):
+        await on_event(("delta", ("text_answer",), "Here are "))
+        await on_event(("delta", ("text_answer",), "the departments."))
+        await on_event(("value", ("text_answer",), "Here are the departments."))
+        await on_event(("value", ("table_data", "columns"), ["Department", "Headcount"]))
+        await on_event(("value", ("table_data", "rows", 0), ["Engineering", 50]))
+        await on_event(("value", ("table_data", "rows", 0, 1), 50))
+        return AnswerOutput(
+            text_answer="Here are the departments.",
+            table_data=TableData(columns=["Department", "Headcount"], rows=[["Engineering", 50]]),
+        )
+
+    mock_llm.chat_json_stream = AsyncMock(side_effect=fake_stream)
+    input_data = {**_dataset_input(), "conversation_id": "c1"}
+
+    with (
+        patch("app.pipeline.answer.settings.ANSWER_STREAMING", True),
+        patch("app.pipeline.answer.events.emit", new_callable=AsyncMock) as mock_emit,
+    ):
+        result = await answer_step.execute(input_data, mock_llm)
+
+    assert result.table_data.rows == [["Engineering", 50]]
+    mock_llm.chat_json.assert_not_called()
+    emitted = [call.args for call in mock_emit.call_args_list]
+    assert emitted == [
+        ("c1", {"step": "answer", "status": "streaming", "text_delta": "Here are "}),
+        ("c1", {"step": "answer", "status": "streaming", "text_delta": "the departments."}),
+        ("c1", {"step": "answer", "status": "streaming", "table_columns": ["Department", "Headcount"]}),
+        ("c1", {"step": "answer", "status": "streaming", "table_row": ["Engineering", 50]}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_answer_step_streaming_retry_resets_client(answer_step, mock_llm):
+    mock_llm.chat_json_stream = AsyncMock(return_value=AnswerOutput(text_answer="ok"))
+    input_data = {**_scalar_input(), "conversation_id": "c1", "_last_error": "bad json"}
+
+    with (
+        patch("app.pipeline.answer.settings.ANSWER_STREAMING", True),
+        patch("app.pipeline.answer.events.emit", new_callable=AsyncMock) as mock_emit,
+    ):
+        await answer_step.execute(input_data, mock_llm)
+
+    mock_emit.assert_awaited_once_with("c1", {"step": "answer", "status": "streaming", "reset": True})
+
+
+@pytest.mark.asyncio
+async def test_answer_step_samples_raw_data_to_its_budget(answer_step, mock_llm):
+    input_data = _dataset_input()
+    input_data["exploration"]["raw_data"] = [
+        {"department": f"Dept {i}", "headcount": i} for i in range(5000)
+    ]
+    mock_llm.chat_json = AsyncMock(return_value=AnswerOutput(text_answer="ok"))
+
+    with patch.dict("app.services.token_budget.settings.PROMPT_TOKEN_BUDGETS", {"raw_data": 2000}):
+        await answer_step.execute(input_data, mock_llm)
+
+    content = mock_llm.chat_json.call_args[0][0][1]["content"]
+    assert "of 5000 rows shown, sampled evenly" in content
+    assert '"Dept 0"' in content and '"Dept 4999"' in content
@@ -290,3 +290,84 @@ async def test_pipeline_run_handles_failure():
     runs = [r for r in records_added if isinstance(r, PipelineRun)]
     assert len(runs) == 1
     assert runs[0].status == "failed"
+
+
+def _step_record(name, order, status="completed", output=None):
+    record = PipelineStepModel(step_name=name, step_order=order, status=status, output_json=output)
+    record.input_json = {"question": "How many companies?"} if name == "plan" else None
+    return record
+
+
+def test_step_checkpoints_stop_at_first_failed_step():
+    from app.pipeline.orchestrator import step_checkpoints
+
+    plan = _fake_plan().model_dump()
+    records = [
+        _step_record("answer", 2, "completed", _fake_answer().model_dump()),
+        _step_record("explore", 1, "failed"),
+        _step_record("plan", 0, "completed", plan),
+    ]
+
+    checkpoints = step_checkpoints(records)
+
+    # The answer after the failed explore is not trusted
+    assert list(checkpoints) == ["plan"]
+    assert checkpoints["plan"].output_json == plan
+    assert checkpoints["plan"].input_json == {"question": "How many companies?"}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_resumes_from_checkpoints():
+    """Checkpointed steps are copied into the new run; only the rest are executed."""
+    from app.pipeline.orchestrator import Pipeline, step_checkpoints
+
+    ctx, session = _mock_session()
+    records_added = []
+
+    def track_add(obj):
+        obj.id = uuid.uuid4()
+        records_added.append(obj)
+
+    session.add = track_add
+    session.refresh = AsyncMock()
+    checkpoints = step_checkpoints([
+        _step_record("plan", 0, output=_fake_plan().model_dump()),
+        _step_record("explore", 1, output=_fake_explore().model_dump()),
+        _step_record("answer", 2, "failed"),
+    ])
+    executed = []
+    emitted = []
+
+    async def emit(conversation_id, event):
+        emitted.append(event)
+
+    with (
+        patch("app.pipeline.orchestrator.AppSession", return_value=ctx),
+        patch("app.pipeline.orchestrator.LLMClient"),
+        patch("app.pipeline.orchestrator.events.emit", side_effect=emit),
+    ):
+        pipeline = Pipeline(uuid.uuid4(), uuid.uuid4())
+        for step in pipeline.steps:
+
+            async def execute(input_data, llm_client, name=step.name):
+                executed.append((name, input_data))
+                return _fake_answer()
+
+            step.execute_with_retry = execute
+        result = await pipeline.run("How many companies?", checkpoints=checkpoints)
+
+    assert result == _fake_answer()
+    # Only the answer step ran, with the checkpointed plan and exploration
+    assert [name for name, _ in executed] == ["answer"]
+    answer_input = executed[0][1]
+    assert answer_input["plan"] == _fake_plan().model_dump()
+    assert answer_input["exploration"] == _fake_explore().model_dump()
+
+    steps = [r for r in records_added if isinstance(r, PipelineStepModel)]
+    assert [(s.step_name, s.status, s.attempts) for s in steps] == [
+        ("plan", "completed", 0),
+        ("explore", "completed", 0),
+        ("answer", "completed", 1),
+    ]
+    assert steps[0].input_json == {"question": "How many companies?"}
+    assert {"step": "explore", "status": "completed", "resumed": True} in emitted
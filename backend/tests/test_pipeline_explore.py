@@ -1,3 +1,4 @@
+import asyncio
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -73,7 +74,7 @@ def _assistant_response(content=None, tool_calls=None):
 
 @pytest.mark.asyncio
 async def test_explore_step(explore_step, llm, tools):
-    """Test the agentic loop: LLM calls list_tables, then finishes, then summarizes."""
+    """Test the agentic loop: LLM calls list_tables, then finishes with its notes."""
     # Turn 1: LLM calls list_tables tool
     tc = _make_tool_call("call_1", "list_tables", {})
     resp_with_tool = _assistant_response(content=None, tool_calls=[tc])
@@ -81,22 +82,11 @@ async def test_explore_step(explore_step, llm, tools):
     # Turn 2: LLM decides it's done (no tool calls)
     resp_done = _assistant_response(content="I have gathered the data.")
 
-    # Turn 3: Summary as ExploreOutput JSON
-    summary_json = json.dumps({
-        "queries_executed": [
-            {"sql": "list_tables()", "result_summary": "Found companies, orders"}
-        ],
-        "raw_data": {"tables": ["companies", "orders"]},
-        "exploration_notes": "Listed available tables",
-        "schema_context": {"companies": ["id", "name"], "orders": ["id", "total"]},
-    })
-    resp_summary = _assistant_response(content=summary_json)
-
     with patch(
         "app.services.llm.litellm.acompletion",
         new_callable=AsyncMock,
-        side_effect=[resp_with_tool, resp_done, resp_summary],
-    ):
+        side_effect=[resp_with_tool, resp_done],
+    ) as mock_comp:
         result = await explore_step.execute(
             {
                 "plan": {
@@ -111,10 +101,44 @@ async def test_explore_step(explore_step, llm, tools):
             llm,
         )
 
+    # No summarization call: the output is built from the recorded tool calls
+    assert mock_comp.await_count == 2
     assert isinstance(result, ExploreOutput)
-    assert len(result.queries_executed) > 0
-    assert result.raw_data is not None
-    assert result.schema_context is not None
+    assert result.queries_executed == []
+    assert result.raw_data == {"tables": ["companies", "orders"]}
+    assert result.exploration_notes == "I have gathered the data."
+    assert result.schema_context == {}
+
+
+@pytest.mark.asyncio
+async def test_explore_step_fits_plan_to_its_own_budget(explore_step, llm, tools):
+    budgets = {"system": 0, "plan": 30}
+    with (
+        patch.dict("app.services.token_budget.settings.PROMPT_TOKEN_BUDGETS", budgets),
+        patch(
+            "app.services.llm.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=_assistant_response(content="Done."),
+        ) as mock_comp,
+    ):
+        await explore_step.execute(
+            {
+                "plan": {
+                    "reasoning": "Look at every company " * 50,
+                    "query_strategy": "SELECT * FROM companies",
+                    "expected_answer_type": "dataset",
+                    "suggested_chart_type": None,
+                    "tables_to_explore": ["companies"],
+                },
+                "available_tools": tools,
+            },
+            llm,
+        )
+
+    user = mock_comp.call_args.kwargs["messages"][1]
+    # The plan travels in the user message, so the "plan" budget applies, not "system"
+    assert "Plan reasoning: Look at every company" in user["content"]
+    assert "[truncated, about" in user["content"]
 
 
 @pytest.mark.asyncio
@@ -126,21 +150,10 @@ async def test_explore_step_multiple_tool_calls(explore_step, llm, tools):
 
     resp_done = _assistant_response(content="Done exploring.")
 
-    summary_json = json.dumps({
-        "queries_executed": [
-            {"sql": "list_tables()", "result_summary": "Found tables"},
-            {"sql": "show_schema(companies)", "result_summary": "Got schema"},
-        ],
-        "raw_data": {"tables": ["companies"]},
-        "exploration_notes": "Listed tables and schema",
-        "schema_context": {"companies": ["id", "name"]},
-    })
-    resp_summary = _assistant_response(content=summary_json)
-
     with patch(
         "app.services.llm.litellm.acompletion",
         new_callable=AsyncMock,
-        side_effect=[resp_multi, resp_done, resp_summary],
+        side_effect=[resp_multi, resp_done],
     ):
         result = await explore_step.execute(
             {
@@ -157,7 +170,8 @@ async def test_explore_step_multiple_tool_calls(explore_step, llm, tools):
         )
 
     assert isinstance(result, ExploreOutput)
-    assert len(result.queries_executed) == 2
+    assert result.schema_context == {"companies": ["id", "name"]}
+    assert result.raw_data["table"] == "companies"
 
 
 @pytest.mark.asyncio
@@ -168,18 +182,10 @@ async def test_explore_step_unknown_tool(explore_step, llm, tools):
 
     resp_done = _assistant_response(content="Done.")
 
-    summary_json = json.dumps({
-        "queries_executed": [],
-        "raw_data": {},
-        "exploration_notes": "Tool not found",
-        "schema_context": {},
-    })
-    resp_summary = _assistant_response(content=summary_json)
-
     with patch(
         "app.services.llm.litellm.acompletion",
         new_callable=AsyncMock,
-        side_effect=[resp_with_bad_tool, resp_done, resp_summary],
+        side_effect=[resp_with_bad_tool, resp_done],
     ):
         result = await explore_step.execute(
             {
@@ -196,3 +202,261 @@ async def test_explore_step_unknown_tool(explore_step, llm, tools):
         )
 
     assert isinstance(result, ExploreOutput)
+
+
+class SlowTool(Tool):
+    """Records how many calls overlap; later calls finish first."""
+
+    description = "Slow fake tool."
+    parameters: dict = {"type": "object", "properties": {}}
+
+    def __init__(self, name, delay, tracker):
+        self.name = name
+        self.delay = delay
+        self.tracker = tracker
+
+    async def execute(self, params: dict):
+        self.tracker["active"] += 1
+        self.tracker["peak"] = max(self.tracker["peak"], self.tracker["active"])
+        await asyncio.sleep(self.delay)
+        self.tracker["active"] -= 1
+        return {"tool": self.name}
+
+
+@pytest.mark.asyncio
+async def test_explore_step_runs_tool_calls_concurrently_in_order(explore_step, llm):
+    tracker = {"active": 0, "peak": 0}
+    slow_tools = [
+        SlowTool("first", 0.05, tracker),
+        SlowTool("second", 0.03, tracker),
+        SlowTool("third", 0.01, tracker),
+    ]
+    calls = [
+        _make_tool_call("call_1", "first", {}),
+        _make_tool_call("call_2", "second", {}),
+        _make_tool_call("call_3", "third", {}),
+    ]
+    resp_multi = _assistant_response(content=None, tool_calls=calls)
+    resp_done = _assistant_response(content="Done.")
+
+    with (
+        patch(
+            "app.services.llm.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=[resp_multi, resp_done],
+        ) as mock_completion,
+        patch("app.pipeline.explore.target_tool_slots", asyncio.Semaphore(2)),
+    ):
+        await explore_step.execute(
+            {
+                "plan": {
+                    "reasoning": "Parallel calls",
+                    "query_strategy": "Call three tools at once",
+                    "expected_answer_type": "scalar",
+                    "suggested_chart_type": None,
+                    "tables_to_explore": [],
+                },
+                "available_tools": slow_tools,
+            },
+            llm,
+        )
+
+    # Two calls overlapped, but never more than the concurrency limit
+    assert tracker["peak"] == 2
+    messages = mock_completion.call_args_list[1].kwargs["messages"]
+    tool_messages = [m for m in messages if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_1", "call_2", "call_3"]
+    assert [json.loads(m["content"])["tool"] for m in tool_messages] == ["first", "second", "third"]
+
+
+@pytest.mark.asyncio
+async def test_explore_step_includes_value_hints(explore_step, llm, tools):
+    resp_done = _assistant_response(content="Nothing to explore.")
+
+    with patch(
+        "app.services.llm.litellm.acompletion",
+        new_callable=AsyncMock,
+        side_effect=[resp_done],
+    ) as mock_comp:
+        await explore_step.execute(
+            {
+                "plan": {
+                    "reasoning": "Count fintech companies",
+                    "query_strategy": "Filter on industry_vertical",
+                    "expected_answer_type": "scalar",
+                    "suggested_chart_type": None,
+                    "tables_to_explore": ["companies"],
+                },
+                "available_tools": tools,
+                "value_hints": [
+                    {"table": "companies", "column": "industry_vertical", "value": "Fintech", "score": 1.0}
+                ],
+            },
+            llm,
+        )
+
+    messages = mock_comp.call_args_list[0].kwargs["messages"]
+    # Hints are per-question, so they stay out of the cached system prompt
+    assert "Fintech" not in messages[0]["content"]
+    assert "- companies.industry_vertical: 'Fintech'" in messages[1]["content"]
+
+
+@pytest.mark.asyncio
+async def test_explore_step_starts_with_prefetched_results(explore_step, llm, tools):
+    from app.pipeline.prefetch import PrefetchedCall
+
+    prefetched = [
+        PrefetchedCall("show_schema", {"table": "companies"}, {"table": "companies", "columns": []}, ["companies"]),
+        PrefetchedCall("show_schema", {"table": "orders"}, {"table": "orders", "columns": []}, ["orders"]),
+    ]
+    resp_done = _assistant_response(content="Schema was enough.")
+
+    with patch(
+        "app.services.llm.litellm.acompletion",
+        new_callable=AsyncMock,
+        side_effect=[resp_done],
+    ) as mock_comp:
+        result = await explore_step.execute(
+            {
+                "plan": {
+                    "reasoning": "Look at companies",
+                    "query_strategy": "Describe companies",
+                    "expected_answer_type": "scalar",
+                    "suggested_chart_type": None,
+                    "tables_to_explore": ["companies"],
+                },
+                "available_tools": tools,
+                "prefetched": prefetched,
+            },
+            llm,
+        )
+
+    messages = mock_comp.call_args_list[0].kwargs["messages"]
+    # Only the call touching a planned table is replayed
+    assert [tc["function"]["name"] for tc in messages[2]["tool_calls"]] == ["show_schema"]
+    assert json.loads(messages[2]["tool_calls"][0]["function"]["arguments"]) == {"table": "companies"}
+    assert messages[3]["role"] == "tool"
+    assert messages[3]["tool_call_id"] == messages[2]["tool_calls"][0]["id"]
+    assert '"companies"' in messages[3]["content"]
+    assert len(messages) == 4
+    # Seeded calls count towards the output like the model's own calls
+    assert result.schema_context == {"companies": []}
+
+
+class FakeQueryTool(Tool):
+    name = "query"
+    description = "Runs SQL."
+    parameters = {"type": "object", "properties": {"sql": {"type": "string"}}, "required": ["sql"]}
+
+    async def execute(self, params: dict):
+        from app.tools.result_format import ColumnarResult
+
+        return ColumnarResult.from_rows(["count"], [(42,)])
+
+
+@pytest.mark.asyncio
+async def test_explore_step_asks_only_for_notes_when_iterations_run_out(explore_step, llm):
+    tc = _make_tool_call("call_1", "query", {"sql": "SELECT COUNT(*) FROM companies"})
+    resp_query = _assistant_response(content=None, tool_calls=[tc])
+    resp_notes = _assistant_response(content="There are 42 companies.")
+
+    with (
+        patch("app.pipeline.explore.MAX_ITERATIONS", 1),
+        patch(
+            "app.services.llm.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=[resp_query, resp_notes],
+        ) as mock_comp,
+    ):
+        result = await explore_step.execute(
+            {
+                "plan": {
+                    "reasoning": "Count companies",
+                    "query_strategy": "SELECT COUNT(*) FROM companies",
+                    "expected_answer_type": "scalar",
+                    "suggested_chart_type": None,
+                    "tables_to_explore": ["companies"],
+                },
+                "available_tools": [FakeQueryTool()],
+                "schema_context": {"companies": ["id"]},
+            },
+            llm,
+        )
+
+    # The notes request is a plain chat call, not a structured summary, and may not call tools
+    assert "response_format" not in mock_comp.call_args.kwargs
+    assert mock_comp.call_args.kwargs["tool_choice"] == "none"
+    assert result.queries_executed[0].sql == "SELECT COUNT(*) FROM companies"
+    assert result.queries_executed[0].result_summary == "1 row: count=42"
+    assert result.raw_data == [{"count": 42}]
+    assert result.exploration_notes == "There are 42 companies."
+    assert result.schema_context == {"companies": ["id"]}
+
+
+@pytest.mark.asyncio
+async def test_explore_step_falls_back_to_plain_notes(explore_step, llm):
+    tc = _make_tool_call("call_1", "query", {"sql": "SELECT COUNT(*) FROM companies"})
+    resp_query = _assistant_response(content=None, tool_calls=[tc])
+    resp_empty = _assistant_response(content=None)
+
+    with (
+        patch("app.pipeline.explore.MAX_ITERATIONS", 1),
+        patch(
+            "app.services.llm.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=[resp_query, resp_empty],
+        ),
+    ):
+        result = await explore_step.execute(
+            {
+                "plan": {
+                    "reasoning": "Count companies",
+                    "query_strategy": "SELECT COUNT(*) FROM companies",
+                    "expected_answer_type": "scalar",
+                    "suggested_chart_type": None,
+                    "tables_to_explore": ["companies"],
+                },
+                "available_tools": [FakeQueryTool()],
+            },
+            llm,
+        )
+
+    assert result.exploration_notes == (
+        "Queries run (no notes were written):\nSELECT COUNT(*) FROM companies -> 1 row: count=42"
+    )
+
+
+@pytest.mark.asyncio
+async def test_explore_step_reports_unrenderable_results_as_errors(explore_step, llm, tools):
+    tc = _make_tool_call("call_1", "list_tables", {})
+
+    with (
+        patch("app.pipeline.explore._render_result", side_effect=TypeError("not serializable")),
+        patch(
+            "app.services.llm.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=[
+                _assistant_response(content=None, tool_calls=[tc]),
+                _assistant_response(content="Could not read the tables."),
+            ],
+        ) as mock_comp,
+    ):
+        result = await explore_step.execute(
+            {
+                "plan": {
+                    "reasoning": "List tables",
+                    "query_strategy": "list_tables",
+                    "expected_answer_type": "scalar",
+                    "suggested_chart_type": None,
+                    "tables_to_explore": [],
+                },
+                "available_tools": tools,
+            },
+            llm,
+        )
+
+    tool_message = mock_comp.call_args.kwargs["messages"][-1]
+    assert tool_message["role"] == "tool"
+    assert "not serializable" in json.loads(tool_message["content"])["error"]
+    # The failed call is recorded as an error, so there is no raw data
+    assert result.raw_data == []
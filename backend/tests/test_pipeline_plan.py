@@ -106,6 +106,82 @@ async def test_plan_step_with_schema_context(plan_step, llm):
     assert "industry" in system_msg
 
 
+@pytest.mark.asyncio
+async def test_plan_step_with_column_profiles(plan_step, llm):
+    plan_json = json.dumps(
+        {
+            "reasoning": "Filter companies by industry",
+            "query_strategy": "SELECT COUNT(*) FROM companies WHERE industry_vertical = 'Fintech'",
+            "expected_answer_type": "scalar",
+            "suggested_chart_type": None,
+            "tables_to_explore": ["companies"],
+        }
+    )
+    profiles = {
+        "companies": {
+            "table": "companies",
+            "rows_scanned": 500,
+            "sampled": False,
+            "columns": {
+                "industry_vertical": {
+                    "type": "text",
+                    "null_fraction": 0.0,
+                    "distinct_estimate": 8,
+                    "top_values": [{"value": "Fintech", "count": 70}],
+                },
+                "arr_thousands": {
+                    "type": "float",
+                    "null_fraction": 0.0,
+                    "distinct_estimate": 480,
+                    "min": 120.5,
+                    "max": 98000.0,
+                    "quantiles": {"p05": 300.0, "p25": 900.0, "p50": 2400.0, "p75": 8000.0, "p95": 40000.0},
+                },
+            },
+        }
+    }
+
+    with patch(
+        "app.services.llm.litellm.acompletion",
+        new_callable=AsyncMock,
+        return_value=_fake_response(plan_json),
+    ) as mock_comp:
+        await plan_step.execute(
+            {"question": "How many fintech companies?", "column_profiles": profiles}, llm
+        )
+
+    system_msg = mock_comp.call_args.kwargs["messages"][0]["content"]
+    assert "Column profiles:" in system_msg
+    assert "industry_vertical: text; ~8 distinct; top: Fintech" in system_msg
+    assert "range 120.5 to 98000.0; median 2400.0" in system_msg
+
+
+@pytest.mark.asyncio
+async def test_plan_step_with_value_hints(plan_step, llm):
+    plan_json = json.dumps(
+        {
+            "reasoning": "Filter companies by industry",
+            "query_strategy": "SELECT COUNT(*) FROM companies WHERE industry_vertical = 'Fintech'",
+            "expected_answer_type": "scalar",
+            "suggested_chart_type": None,
+            "tables_to_explore": ["companies"],
+        }
+    )
+    hints = [{"table": "companies", "column": "industry_vertical", "value": "Fintech", "score": 1.0}]
+
+    with patch(
+        "app.services.llm.litellm.acompletion",
+        new_callable=AsyncMock,
+        return_value=_fake_response(plan_json),
+    ) as mock_comp:
+        await plan_step.execute({"question": "churn in fintech", "value_hints": hints}, llm)
+
+    messages = mock_comp.call_args.kwargs["messages"]
+    assert "Fintech" not in messages[0]["content"]
+    assert "- companies.industry_vertical: 'Fintech'" in messages[-1]["content"]
+    assert messages[-1]["content"].endswith("Question: churn in fintech")
+
+
 @pytest.mark.asyncio
 async def test_plan_step_with_history(plan_step, llm):
     plan_json = json.dumps(
@@ -167,6 +243,33 @@ async def test_execute_with_retry_succeeds_on_second_attempt(plan_step, llm):
     assert result.expected_answer_type == "scalar"
 
 
+@pytest.mark.asyncio
+async def test_execute_with_retry_escalates_to_stronger_model(plan_step, llm):
+    good_json = json.dumps(
+        {
+            "reasoning": "Count companies",
+            "query_strategy": "SELECT COUNT(*) FROM companies",
+            "expected_answer_type": "scalar",
+            "suggested_chart_type": None,
+            "tables_to_explore": ["companies"],
+        }
+    )
+
+    with (
+        patch("app.services.llm.settings.LLM_MODEL_ROUTES", {"plan": "fast"}),
+        patch("app.services.llm.settings.LLM_ESCALATION_MODEL", "strong"),
+        patch(
+            "app.services.llm.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=[_fake_response('{"reasoning": "oops"}'), _fake_response(good_json)],
+        ) as mock_comp,
+    ):
+        await plan_step.execute_with_retry({"question": "How many companies?"}, llm)
+
+    assert [call.kwargs["model"] for call in mock_comp.call_args_list] == ["fast", "strong"]
+    assert llm.models_served["plan"] == {"fast": 1, "strong": 1}
+
+
 @pytest.mark.asyncio
 async def test_execute_with_retry_exhausts_retries(plan_step, llm):
     bad_json = '{"reasoning": "oops"}'
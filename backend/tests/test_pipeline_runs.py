@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -7,6 +8,7 @@ from httpx import AsyncClient
 
 from app.models.app import Message, PipelineRun
 from app.models.app import PipelineStep as PipelineStepModel
+from app.schemas.api import AnswerOutput
 
 
 def _mock_session():
@@ -141,6 +143,59 @@ async def test_retry_pipeline_run(auth_client: AsyncClient):
     assert data["status"] == "failed"  # Returns the original run
 
 
+@pytest.mark.asyncio
+async def test_retry_pipeline_run_resumes_from_failed_step(auth_client: AsyncClient):
+    """The retry reuses completed steps and the original history and schema context."""
+    run = _make_pipeline_run(status="failed")
+    plan = _make_step(run.id, "plan", 0)
+    plan.input_json = {
+        "question": "And by industry?",
+        "history": [{"role": "user", "content": "How many companies?"}],
+        "schema_context": {"companies": ["id", "industry"]},
+    }
+    plan.output_json = {"reasoning": "Group by industry"}
+    explore = _make_step(run.id, "explore", 1)
+    explore.output_json = {"exploration_notes": "done"}
+    run.steps = [_make_step(run.id, "answer", 2, status="failed"), explore, plan]
+
+    msg = Message()
+    msg.id = run.message_id
+    msg.conversation_id = uuid.uuid4()
+    msg.created_at = datetime(2026, 1, 1)
+    user_msg = Message()
+    user_msg.content = "And by industry?"
+
+    ctx, session = _mock_session()
+    run_result = MagicMock()
+    run_result.scalar_one_or_none.return_value = run
+    msg_result = MagicMock()
+    msg_result.scalar_one.return_value = msg
+    user_msg_result = MagicMock()
+    user_msg_result.scalar_one_or_none.return_value = user_msg
+    session.execute = AsyncMock(side_effect=[run_result, msg_result, user_msg_result, msg_result])
+
+    with (
+        patch("app.routers.pipeline_runs.AppSession", return_value=ctx),
+        patch("app.routers.pipeline_runs.Pipeline") as MockPipeline,
+    ):
+        MockPipeline.return_value.run = AsyncMock(
+            return_value=AnswerOutput(text_answer="By industry: ...", table_data=None, chart_data=None)
+        )
+        resp = await auth_client.post(f"/api/pipeline-runs/{run.id}/retry")
+        # Let the background retry finish
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    assert resp.status_code == 200
+    question, history, schema_context, checkpoints = MockPipeline.return_value.run.await_args.args
+    assert question == "And by industry?"
+    assert history == [{"role": "user", "content": "How many companies?"}]
+    assert schema_context == {"companies": ["id", "industry"]}
+    assert list(checkpoints) == ["plan", "explore"]
+    assert checkpoints["explore"].output_json == {"exploration_notes": "done"}
+    assert msg.content == "By industry: ..."
+
+
 @pytest.mark.asyncio
 async def test_retry_pipeline_run_not_found(auth_client: AsyncClient):
     """404 when run doesn't exist."""
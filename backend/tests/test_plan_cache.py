@@ -0,0 +1,124 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.pipeline.plan import PlanStep
+from app.pipeline.plan_cache import PlanCache
+from app.schemas.api import PlanOutput
+from app.services.llm import LLMClient
+
+_PLAN = PlanOutput(
+    reasoning="Rank companies by ARR",
+    query_strategy="SELECT company_name, arr_thousands FROM companies ORDER BY 2 DESC LIMIT 5",
+    expected_answer_type="dataset",
+    tables_to_explore=["companies"],
+)
+
+
+@pytest.fixture
+def cache():
+    cache = PlanCache(threshold=0.8, max_entries=10)
+    cache.add("top 5 companies by ARR", "fp-1", _PLAN)
+    cache.add("average churn rate by industry", "fp-1", _PLAN)
+    return cache
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Top 5 companies by ARR?",
+        "which 5 companies have the highest ARR",
+        "Show me the 5 companies with the largest ARR",
+        "what is the average churn rate per industry",
+    ],
+)
+def test_paraphrases_hit(cache, question):
+    hit = cache.lookup(question, "fp-1")
+    assert hit is not None
+    assert hit[0] is _PLAN
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "top 10 companies by ARR",
+        "bottom 5 companies by ARR",
+        "average growth rate by industry",
+        "how many companies are there",
+    ],
+)
+def test_different_questions_miss(cache, question):
+    assert cache.lookup(question, "fp-1") is None
+
+
+def test_questions_differing_only_by_entity_miss(cache):
+    question = (
+        "Which {} companies in the US and Canada with more than fifty employees "
+        "have the highest ARR growth rate?"
+    )
+    cache.add(question.format("fintech"), "fp-1", _PLAN)
+
+    assert cache.lookup(question.format("healthcare"), "fp-1") is None
+    assert cache.lookup(question.format("Fintech").replace("companies", "company"), "fp-1") is not None
+
+
+def test_schema_change_misses(cache):
+    assert cache.lookup("top 5 companies by ARR", "fp-2") is None
+
+
+def test_eviction_keeps_document_frequencies_consistent():
+    cache = PlanCache(threshold=0.8, max_entries=2)
+    for question in ("top 5 companies by ARR", "average churn by industry", "companies founded after 2015"):
+        cache.add(question, "fp-1", _PLAN)
+    assert cache.lookup("top 5 companies by ARR", "fp-1") is None
+    assert cache.lookup("companies founded after 2015", "fp-1") is not None
+    assert cache._document_frequency["w:top"] == 0
+
+
+def _fake_response(content):
+    message = MagicMock()
+    message.content = content
+    choice = MagicMock()
+    choice.message = message
+    response = MagicMock()
+    response.choices = [choice]
+    return response
+
+
+@pytest.mark.asyncio
+async def test_plan_step_reuses_cached_plan(monkeypatch):
+    monkeypatch.setattr("app.pipeline.plan.settings.PLAN_CACHE_ENABLED", True)
+    monkeypatch.setattr("app.pipeline.plan._schema_fingerprint", AsyncMock(return_value="fp-1"))
+    fake = _fake_response(_PLAN.model_dump_json())
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock:
+        first = await PlanStep().execute({"question": "top 5 companies by ARR"}, LLMClient())
+        second = await PlanStep().execute(
+            {"question": "Which 5 companies have the highest ARR?"}, LLMClient()
+        )
+        # Follow-ups depend on the conversation and always go to the LLM
+        await PlanStep().execute(
+            {
+                "question": "top 5 companies by ARR",
+                "history": [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}],
+            },
+            LLMClient(),
+        )
+
+    assert mock.await_count == 2
+    assert second == first
+    assert second is not first
+
+
+@pytest.mark.asyncio
+async def test_plan_step_skips_cache_without_fingerprint(monkeypatch):
+    monkeypatch.setattr("app.pipeline.plan.settings.PLAN_CACHE_ENABLED", True)
+    monkeypatch.setattr("app.pipeline.plan._schema_fingerprint", AsyncMock(return_value=None))
+    fake = _fake_response(json.dumps(_PLAN.model_dump()))
+
+    with patch("app.services.llm.litellm.acompletion", new_callable=AsyncMock, return_value=fake) as mock:
+        await PlanStep().execute({"question": "top 5 companies by ARR"}, LLMClient())
+        await PlanStep().execute({"question": "top 5 companies by ARR"}, LLMClient())
+
+    assert mock.await_count == 2
@@ -0,0 +1,135 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.pipeline.orchestrator import Pipeline
+from app.pipeline.prefetch import PrefetchedCall, likely_tables, prefetch_schema
+from app.schemas.api import AnswerOutput, ExploreOutput, PlanOutput
+from app.tools.base import Tool
+from app.tools.catalog import catalog
+
+
+def _table(*columns):
+    return {"columns": [{"name": name, "type": "text", "nullable": True} for name in columns]}
+
+
+TABLES = {
+    "companies": _table("id", "company_name", "churn_rate_percent"),
+    "orders": _table("id", "company_id", "total"),
+    "users": _table("id", "email"),
+}
+
+
+class RecordingTool(Tool):
+    description = ""
+    parameters: dict = {}
+
+    def __init__(self, name, fail_on=None):
+        self.name = name
+        self.fail_on = fail_on
+        self.calls = []
+
+    async def execute(self, params: dict):
+        self.calls.append(params)
+        if self.fail_on and params.get("table") == self.fail_on:
+            raise ValueError("boom")
+        return {"tool": self.name, **params}
+
+
+def test_likely_tables_matches_names_and_columns():
+    # Table name matches count double; orders matches through company_id
+    assert likely_tables("Which company has the highest churn?", None, TABLES) == ["companies", "orders"]
+    assert likely_tables("Order totals per company", None, TABLES) == ["orders", "companies"]
+    assert likely_tables("Email addresses of our users", None, TABLES) == ["users"]
+    assert likely_tables("Hello there", None, TABLES) == []
+
+
+def test_likely_tables_puts_schema_context_first():
+    context = {"users": ["id"], "dropped_table": ["id"]}
+
+    with patch("app.pipeline.prefetch.settings.SCHEMA_PREFETCH_MAX_TABLES", 2):
+        assert likely_tables("orders by company", context, TABLES) == ["users", "companies"]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_schema_calls_tools_and_skips_failures():
+    describe = RecordingTool("describe_tables")
+    sample = RecordingTool("sample_data", fail_on="companies")
+    profile = RecordingTool("profile_table")
+
+    with patch.object(catalog, "snapshot", AsyncMock(return_value=TABLES)):
+        finished = []
+        calls = await prefetch_schema("churn by company", None, [describe, sample, profile], finished)
+
+    assert describe.calls == [{"tables": ["companies", "orders"]}]
+    assert [(call.tool, call.tables) for call in calls] == [
+        ("describe_tables", ["companies", "orders"]),
+        ("profile_table", ["companies"]),
+        ("sample_data", ["orders"]),
+        ("profile_table", ["orders"]),
+    ]
+    assert calls[1].result == {"tool": "profile_table", "table": "companies"}
+    # Successful calls are also handed over as they finish
+    assert sorted(finished, key=calls.index) == calls
+
+
+@pytest.mark.asyncio
+async def test_prefetch_schema_tolerates_catalog_errors():
+    with patch.object(catalog, "snapshot", AsyncMock(side_effect=OSError("down"))):
+        assert await prefetch_schema("churn by company", None, []) == []
+
+
+@pytest.mark.asyncio
+async def test_pipeline_hands_finished_prefetch_calls_to_explore():
+    session = AsyncMock()
+    session.add = MagicMock()
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=session)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    prefetched = [PrefetchedCall("describe_tables", {"tables": ["companies"]}, {}, ["companies"])]
+    outputs = {
+        "plan": PlanOutput(
+            reasoning="Count",
+            query_strategy="SELECT COUNT(*) FROM companies",
+            expected_answer_type="scalar",
+            suggested_chart_type=None,
+            tables_to_explore=["companies"],
+        ),
+        "explore": ExploreOutput(queries_executed=[], raw_data=[], exploration_notes="", schema_context={}),
+        "answer": AnswerOutput(text_answer="42", table_data=None, chart_data=None),
+    }
+    inputs = {}
+    cancelled = []
+
+    async def slow_prefetch(question, schema_context, tools, finished):
+        finished.extend(prefetched)
+        try:
+            await asyncio.sleep(3600)  # a profile scan still running when explore starts
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with (
+        patch("app.pipeline.orchestrator.settings.SCHEMA_PREFETCH", True),
+        patch("app.pipeline.orchestrator.prefetch_schema", AsyncMock(side_effect=slow_prefetch)) as prefetch,
+        patch("app.pipeline.orchestrator.AppSession", return_value=ctx),
+        patch("app.pipeline.orchestrator.LLMClient"),
+        patch("app.pipeline.orchestrator.events.emit", AsyncMock()),
+    ):
+        pipeline = Pipeline(uuid.uuid4(), uuid.uuid4())
+        for step in pipeline.steps:
+
+            async def execute(input_data, llm_client, name=step.name):
+                inputs[name] = input_data
+                return outputs[name]
+
+            step.execute_with_retry = execute
+        await pipeline.run("How many companies?", schema_context={"companies": ["id"]})
+        await asyncio.sleep(0)  # let the cancellation reach the prefetch task
+
+    assert prefetch.await_args.args[:2] == ("How many companies?", {"companies": ["id"]})
+    assert inputs["explore"]["prefetched"] == prefetched
+    assert cancelled == [True]
+    assert "prefetched" not in inputs["plan"]
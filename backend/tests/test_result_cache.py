@@ -0,0 +1,122 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.tools.data_version import DataVersionTracker
+from app.tools.result_cache import ResultCache
+from app.tools.sql_safety import normalize_sql
+
+
+# --- normalize_sql ---
+
+def test_normalize_sql_collapses_whitespace_and_case():
+    a = normalize_sql("SELECT  industry,\n  AVG(arr_thousands)\nFROM companies GROUP BY industry")
+    b = normalize_sql("select industry, avg(arr_thousands) from companies group by industry")
+    assert a == b
+
+
+def test_normalize_sql_preserves_literals():
+    assert normalize_sql("SELECT * FROM t WHERE x = 'FinTech  Co'") == (
+        "select * from t where x = 'FinTech  Co'"
+    )
+    assert normalize_sql("SELECT \"MixedCase\" FROM t") == 'select "MixedCase" from t'
+
+
+def test_normalize_sql_handles_escaped_quotes():
+    assert normalize_sql("SELECT 'it''s  OK' AS A") == "select 'it''s  OK' as a"
+
+
+# --- ResultCache ---
+
+def test_cache_hit_and_miss_counters():
+    cache = ResultCache(max_bytes=10_000, ttl_seconds=60)
+    assert cache.get("q") is None
+    cache.put("q", {"rows": [[1]]})
+    assert cache.get("q") == {"rows": [[1]]}
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    cache = ResultCache(max_bytes=70, ttl_seconds=60)  # room for two entries
+    cache.put("a", {"rows": "x" * 20})
+    cache.put("b", {"rows": "y" * 20})
+    cache.get("a")  # "a" is now most recently used
+    cache.put("c", {"rows": "z" * 20})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 70
+
+
+def test_cache_skips_values_larger_than_budget():
+    cache = ResultCache(max_bytes=10, ttl_seconds=60)
+    cache.put("big", {"rows": "x" * 100})
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_cache_expires_entries_after_ttl():
+    cache = ResultCache(max_bytes=10_000, ttl_seconds=30)
+    with patch("app.tools.result_cache.time.monotonic", return_value=100.0):
+        cache.put("q", {"rows": []})
+    with patch("app.tools.result_cache.time.monotonic", return_value=129.0):
+        assert cache.get("q") == {"rows": []}
+    with patch("app.tools.result_cache.time.monotonic", return_value=131.0):
+        assert cache.get("q") is None
+    assert cache.stats()["entries"] == 0
+
+
+# --- DataVersionTracker ---
+
+def _mock_counters(*snapshots):
+    results = []
+    for rows in snapshots:
+        result = MagicMock()
+        result.fetchall.return_value = rows
+        results.append(result)
+    conn = AsyncMock()
+    conn.execute = AsyncMock(side_effect=results)
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx
+
+
+@pytest.mark.asyncio
+async def test_data_version_tracker_notifies_changed_tables():
+    tracker = DataVersionTracker(check_interval=0)
+    changes: list[set[str]] = []
+    tracker.subscribe(changes.append)
+
+    ctx = _mock_counters(
+        [("companies", 500, 100), ("orders", 10, -1)],
+        [("companies", 500, 100), ("orders", 10, 10)],
+        [("companies", 501, 101), ("orders", 10, 10)],
+    )
+    with patch("app.tools.data_version.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        await tracker.check()
+        await tracker.check()
+        await tracker.check()
+
+    # ANALYZE moved the orders estimate without a data change, so no notification
+    assert changes == [{"companies", "orders"}, {"companies"}]
+    assert tracker.versions["companies"] == 501
+    assert tracker.row_estimates == {"companies": 101, "orders": 10}
+
+
+@pytest.mark.asyncio
+async def test_data_version_tracker_throttles_polling():
+    tracker = DataVersionTracker(check_interval=60)
+    ctx = _mock_counters([("companies", 500, 100)])
+    with patch("app.tools.data_version.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        await tracker.check()
+        await tracker.check()
+
+    assert mock_engine.connect.call_count == 1
@@ -0,0 +1,92 @@
+import json
+from array import array
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.tools.result_format import ColumnarResult, render_tool_result
+
+
+def _sample():
+    return ColumnarResult.from_rows(
+        ["industry", "companies", "avg_arr", "founded"],
+        [
+            ("Fintech", 120, Decimal("1234.50"), date(2015, 3, 1)),
+            ("Healthcare", 80, Decimal("987.25"), date(2018, 7, 9)),
+        ],
+    )
+
+
+def test_columnar_infers_types_and_converts_once():
+    result = _sample()
+    assert result.types == ["text", "int", "float", "date"]
+    assert result.row_count == 2
+    assert isinstance(result.data[1], array)
+    assert isinstance(result.data[2], array)
+    assert list(result.data[2]) == [1234.5, 987.25]
+    assert result.data[3] == ["2015-03-01", "2018-07-09"]
+
+
+def test_columnar_integral_decimal_becomes_int():
+    result = ColumnarResult.from_rows(["total"], [(Decimal("617500"),)])
+    assert result.types == ["int"]
+    assert result.rows == [[617500]]
+
+
+def test_columnar_nulls_keep_list_storage():
+    result = ColumnarResult.from_rows(["churn"], [(Decimal("1.5"),), (None,)])
+    assert result.types == ["float"]
+    assert result.data[0] == [1.5, None]
+
+
+def test_columnar_mixed_int_float_widens_to_float():
+    result = ColumnarResult.from_rows(["v"], [(1,), (2.5,)])
+    assert result.types == ["float"]
+    assert list(result.data[0]) == [1.0, 2.5]
+
+
+def test_columnar_empty_result_keeps_columns():
+    result = ColumnarResult.from_rows(["a", "b"], [])
+    assert result.row_count == 0
+    assert result.types == ["null", "null"]
+    assert result.rows == []
+
+
+def test_columnar_wire_form_is_compact_json():
+    result = _sample()
+    wire = json.loads(result.to_json())
+    assert wire["columns"] == ["industry", "companies", "avg_arr", "founded"]
+    assert wire["data"][2] == [1234.5, 987.25]
+    assert ", " not in result.to_json()
+    assert result.rows[0] == ["Fintech", 120, 1234.5, "2015-03-01"]
+
+
+def test_columnar_llm_form_is_smaller_than_row_json():
+    rows = [(f"Company {i}", i * 10, Decimal(f"{i}.25"), datetime(2020, 1, 1)) for i in range(50)]
+    columns = ["company_name", "arr_thousands", "churn_rate_percent", "created_at"]
+    result = ColumnarResult.from_rows(columns, rows)
+
+    legacy = json.dumps({"columns": columns, "rows": [list(r) for r in rows]}, default=str)
+    llm_text = render_tool_result(result)
+
+    assert len(llm_text) < len(legacy)
+    lines = llm_text.splitlines()
+    header = json.loads(lines[0])
+    assert header["row_count"] == 50
+    assert header["columns"][2] == "churn_rate_percent:float"
+    assert json.loads(lines[1]) == ["Company 0", 0, 0.25, "2020-01-01T00:00:00"]
+
+
+def test_render_tool_result_passes_dicts_through():
+    assert json.loads(render_tool_result({"tables": ["companies"]})) == {"tables": ["companies"]}
+
+
+def test_columnar_array_and_json_values_are_json_safe():
+    result = ColumnarResult.from_rows(
+        ["prices", "meta"],
+        [([Decimal("1.5"), Decimal("2")], {"since": date(2024, 1, 2), "tags": ("a",)})],
+    )
+
+    assert result.types == ["text", "text"]
+    assert result.rows == [[[1.5, 2], {"since": "2024-01-02", "tags": ["a"]}]]
+    assert json.loads(result.to_json())["data"] == [[[1.5, 2]], [{"since": "2024-01-02", "tags": ["a"]}]]
+    assert '[1.5,2]' in result.to_llm()
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from app.tools.sketches import HyperLogLog, SpaceSaving, TDigest
+
+
+def test_hyperloglog_estimates_distinct_count():
+    hll = HyperLogLog()
+    for i in range(20_000):
+        hll.add(f"value-{i % 10_000}")
+    assert abs(hll.count() - 10_000) < 10_000 * 0.05
+
+
+def test_hyperloglog_small_counts_are_near_exact():
+    hll = HyperLogLog()
+    for value in ["Fintech", "Healthcare", "Retail", "Fintech"]:
+        hll.add(value)
+    assert hll.count() == 3
+
+
+def test_hyperloglog_merge():
+    left, right = HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        left.add(i)
+        right.add(i + 1500)
+    left.merge(right)
+    assert abs(left.count() - 4500) < 4500 * 0.05
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(precision=10))
+
+
+def test_tdigest_quantiles():
+    rng = random.Random(7)
+    values = [rng.uniform(0, 1000) for _ in range(50_000)]
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+    values.sort()
+    for q in (0.05, 0.5, 0.95):
+        exact = values[int(q * len(values))]
+        assert abs(digest.quantile(q) - exact) < 10
+    assert digest.quantile(0) == values[0]
+    assert digest.quantile(1) == values[-1]
+    assert len(digest._centroids) < 200
+
+
+def test_tdigest_small_and_empty():
+    digest = TDigest()
+    assert digest.quantile(0.5) is None
+    for value in (1, 2, 3, 4, 5):
+        digest.add(value)
+    assert digest.quantile(0.5) == 3
+
+
+def test_space_saving_finds_heavy_hitters():
+    rng = random.Random(3)
+    counter = SpaceSaving(capacity=50)
+    stream = ["hot"] * 500 + ["warm"] * 200 + [f"rare-{i}" for i in range(5000)]
+    rng.shuffle(stream)
+    for value in stream:
+        counter.add(value)
+    top = counter.top(2)
+    assert [value for value, _, _ in top] == ["hot", "warm"]
+    for value, count, error in top:
+        true_count = stream.count(value)
+        assert count - error <= true_count <= count
+
+
+def test_space_saving_exact_under_capacity():
+    counter = SpaceSaving(capacity=5)
+    for value in ["a", "b", "a", "c", "a", "b"]:
+        counter.add(value)
+    assert counter.top(3) == [("a", 3, 0), ("b", 2, 0), ("c", 1, 0)]
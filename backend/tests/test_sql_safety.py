@@ -0,0 +1,105 @@
+import pytest
+
+from app.tools.sql_safety import _check, check_sql, normalize_sql, validate_sql
+
+# --- Adversarial corpus: queries that must be accepted ---
+
+ALLOWED = [
+    "SELECT * FROM companies",
+    "SELECT updated_at, created_at, deleted_flag FROM companies",
+    "SELECT * FROM companies WHERE note = 'DELETE FROM companies'",
+    "SELECT * FROM companies WHERE note = 'a; b'",
+    "SELECT 'it''s; fine' AS s",
+    "SELECT E'escaped \\' quote; DROP TABLE x' AS s",
+    "SELECT $$ DROP TABLE companies; $$ AS body",
+    "SELECT $tag$ it's ; $x$ still inside $tag$ AS body",
+    'SELECT "delete", "drop table" FROM companies',
+    "SELECT 1 -- DROP TABLE companies",
+    "SELECT /* ; DELETE */ 1",
+    "SELECT /* outer /* nested ; */ still comment */ 1",
+    "WITH top AS (SELECT * FROM companies ORDER BY arr_thousands DESC LIMIT 5) SELECT * FROM top",
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5) SELECT * FROM n",
+    "(SELECT 1) UNION (SELECT 2)",
+    "SELECT industry_vertical, AVG(arr_thousands)::numeric(10, 2) FROM companies GROUP BY 1",
+    "SELECT * FROM companies WHERE churn_rate_percent >= 1.5e-1 AND founding_year <> 2000",
+    "SELECT 1;",
+    "SELECT 1 ;  ; ",
+    "  select 1  ",
+    "/* leading comment */ SELECT 1",
+]
+
+# --- Adversarial corpus: queries that must be rejected, with the reason ---
+
+REJECTED = [
+    ("", "cannot be empty"),
+    ("   ", "cannot be empty"),
+    ("-- just a comment", "cannot be empty"),
+    (";", "cannot be empty"),
+    ("SELECT 1; DROP TABLE companies", "Multiple statements"),
+    ("SELECT 'a'; DELETE FROM companies", "Multiple statements"),
+    ("SELECT 1 /* x */ ; SELECT 2", "Multiple statements"),
+    ("INSERT INTO companies VALUES (1)", "Only SELECT"),
+    ("DELETE FROM companies", "Only SELECT"),
+    ("UPDATE companies SET arr_thousands = 0", "Only SELECT"),
+    ("/* SELECT */ DROP TABLE companies", "Only SELECT"),
+    ("EXPLAIN ANALYZE SELECT 1", "Only SELECT"),
+    ("VACUUM companies", "Only SELECT"),
+    ("SET statement_timeout = 0", "Only SELECT"),
+    ("SELECT 1 FROM (DROP TABLE companies)", "Forbidden keyword: DROP"),
+    ("WITH d AS (DELETE FROM companies RETURNING *) SELECT * FROM d", "Forbidden keyword: DELETE"),
+    ("WITH u AS (UPDATE companies SET x = 1 RETURNING *) SELECT 1", "Forbidden keyword: UPDATE"),
+    ("SELECT * INTO backup FROM companies", "Forbidden keyword: INTO"),
+    ("SELECT * FROM companies FOR UPDATE", "Forbidden keyword: UPDATE"),
+    ("SeLeCt 1 fRoM (dRoP tAbLe x)", "Forbidden keyword: DROP"),
+    ("SELECT 'unterminated", "Unterminated quoted string"),
+    ('SELECT "unterminated', "Unterminated quoted string"),
+    ("SELECT E'\\'; DROP TABLE x", "Unterminated quoted string"),
+    ("SELECT $$ never closed", "Unterminated dollar-quoted string"),
+    ("SELECT 1 /* never closed", "Unterminated block comment"),
+]
+
+
+@pytest.mark.parametrize("sql", ALLOWED)
+def test_corpus_allowed(sql):
+    verdict = check_sql(sql)
+    assert verdict.sql
+    assert verdict.fingerprint
+
+
+@pytest.mark.parametrize("sql,reason", REJECTED)
+def test_corpus_rejected(sql, reason):
+    with pytest.raises(ValueError, match=reason):
+        check_sql(sql)
+
+
+def test_trailing_semicolons_and_comments_are_dropped():
+    assert validate_sql("  SELECT 1 ; ") == "SELECT 1"
+    assert validate_sql("SELECT 1 -- trailing note") == "SELECT 1"
+    assert validate_sql("/* why */ SELECT 1") == "SELECT 1"
+
+
+def test_fingerprint_ignores_formatting_and_comments():
+    a = normalize_sql("SELECT industry_vertical,\n  AVG(arr_thousands) -- avg\nFROM companies;")
+    b = normalize_sql("select INDUSTRY_VERTICAL, avg( arr_thousands ) /* x */ from companies")
+    assert a == b
+
+
+def test_fingerprint_keeps_literals_and_quoted_identifiers():
+    a = normalize_sql("SELECT * FROM companies WHERE industry_vertical = 'Fintech'")
+    b = normalize_sql("SELECT * FROM companies WHERE industry_vertical = 'FINTECH'")
+    assert a != b
+    assert normalize_sql('SELECT "Name" FROM t') != normalize_sql('SELECT "name" FROM t')
+
+
+def test_verdicts_are_memoized():
+    _check.cache_clear()
+    check_sql("SELECT count(*) FROM companies")
+    check_sql("SELECT count(*) FROM companies")
+    with pytest.raises(ValueError):
+        check_sql("DROP TABLE companies")
+    with pytest.raises(ValueError):
+        check_sql("DROP TABLE companies")
+
+    info = _check.cache_info()
+    assert info.hits == 2
+    assert info.misses == 2
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.api import AnswerOutput, PlanOutput
+from app.services.structured_output import parse_structured, repair_json, structured_schema
+
+
+def test_structured_schema_is_built_once_per_model():
+    first = structured_schema(AnswerOutput)
+
+    assert structured_schema(AnswerOutput) is first
+    assert first.name == "answer_output"
+    assert first.tool["function"]["name"] == "submit_answer_output"
+    assert first.tool_choice == {"type": "function", "function": {"name": "submit_answer_output"}}
+    # Nested models are inlined so providers never have to resolve $ref
+    assert "$ref" not in json.dumps(first.json_schema)
+    assert "$defs" not in first.json_schema
+    assert first.response_format["json_schema"]["schema"] is first.json_schema
+
+
+@pytest.mark.parametrize(
+    "broken, expected",
+    [
+        ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+        ('Sure! Here it is: {"a": true} Hope that helps.', {"a": True}),
+        ('{"a": True, "b": None, "c": False}', {"a": True, "b": None, "c": False}),
+        ('{"a": "line one\nline two"}', {"a": "line one\nline two"}),
+        ('{"a": [1, 2', {"a": [1, 2]}),
+        ('{"a": {"b": "trunc', {"a": {"b": "trunc"}}),
+        ('{"a": "x", "b":', {"a": "x"}),
+    ],
+)
+def test_repair_json(broken, expected):
+    assert json.loads(repair_json(broken)) == expected
+
+
+def test_repair_json_leaves_valid_json_alone():
+    valid = '{"text": "a, b] and {c}", "n": [1, 2], "t": true}'
+
+    assert repair_json(valid) == valid
+
+
+def test_parse_structured_repairs_before_failing():
+    structured = structured_schema(AnswerOutput)
+
+    result = parse_structured('```json\n{"text_answer": "42 users",}\n```', structured)
+    assert result == AnswerOutput(text_answer="42 users")
+
+    wrapped = parse_structured('{"answer_output": {"text_answer": "42 users"}}', structured)
+    assert wrapped == AnswerOutput(text_answer="42 users")
+
+    truncated = parse_structured('{"text_answer": "42 us', structured)
+    assert truncated.text_answer == "42 us"
+
+
+def test_parse_structured_still_rejects_schema_mismatches():
+    structured = structured_schema(PlanOutput)
+
+    with pytest.raises(ValidationError):
+        parse_structured('{"reasoning": "r", "expected_answer_type": "poem"}', structured)
+
+
+def test_parse_structured_keeps_code_fences_inside_valid_json():
+    structured = structured_schema(AnswerOutput)
+    content = json.dumps({"text_answer": "Run:\n```sql\nSELECT 1\n```"})
+
+    assert parse_structured(content, structured).text_answer == "Run:\n```sql\nSELECT 1\n```"
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+from app.services.token_budget import (
+    compact_history,
+    compact_tool_messages,
+    count_tokens,
+    fit_columnar,
+    fit_field,
+    fit_lines,
+    fit_rows,
+    render_rows,
+    sample_rows,
+    truncate_text,
+)
+from app.tools.result_format import ColumnarResult
+
+
+def test_count_tokens_tracks_bpe_sized_pieces():
+    assert count_tokens("") == 0
+    assert count_tokens("How many users?") == 4
+    assert count_tokens("2024-01-15") == 6
+    # Long words cost more than one token
+    assert count_tokens("internationalization") == 4
+    prose = "The quick brown fox jumps over the lazy dog. " * 20
+    assert len(prose) / 6 < count_tokens(prose) < len(prose) / 3
+
+
+def test_truncate_text_fits_budget_and_marks_the_cut():
+    text = "word " * 1000
+
+    cut = truncate_text(text, 100)
+    assert count_tokens(cut.split("\n...")[0]) <= 100
+    assert "[truncated, about" in cut
+    assert truncate_text("short", 100) == "short"
+    assert truncate_text(text, 0) == text
+
+
+def test_fit_lines_keeps_leading_lines():
+    lines = [f"- table_{i}: id, name, created_at" for i in range(100)]
+
+    kept = fit_lines(lines, 50, "tables")
+    assert kept[:-1] == lines[: len(kept) - 1]
+    assert kept[-1] == f"... and {100 - len(kept) + 1} more tables"
+    assert fit_lines(lines, 0) == lines
+
+
+def test_sample_rows_spreads_over_the_range():
+    rows = list(range(100))
+
+    assert sample_rows(rows, 5) == [0, 25, 50, 74, 99]
+    assert sample_rows(rows, 1) == [0]
+    assert sample_rows(rows, 200) == rows
+
+
+def test_fit_rows_samples_to_the_budget():
+    rows = [{"region": f"r{i}", "revenue": i * 1000} for i in range(500)]
+
+    kept, sampled = fit_rows(rows, 300)
+    assert sampled
+    assert count_tokens(json.dumps(kept)) <= 300
+    assert kept[0] == rows[0] and kept[-1] == rows[-1]
+    assert fit_rows(rows[:3], 300) == (rows[:3], False)
+
+
+def test_render_rows_notes_sampling():
+    rows = [[i, f"name {i}"] for i in range(1000)]
+
+    text = render_rows(rows, 200)
+    assert text.endswith("rows shown, sampled evenly]")
+    assert render_rows([[1, "a"]], 200) == '[[1, "a"]]'
+    assert render_rows("plain notes", 200) == "plain notes"
+
+
+def test_fit_field_records_total():
+    chart = {"type": "bar", "data": [{"label": str(i), "value": i} for i in range(1000)]}
+
+    fitted = fit_field(chart, "data", 200)
+    assert fitted["data_total"] == 1000
+    assert len(fitted["data"]) < 1000
+    assert chart["data"][0] == fitted["data"][0]
+    assert fit_field({"rows": [[1]]}, "rows", 200) == {"rows": [[1]]}
+
+
+def test_fit_columnar_keeps_leading_rows():
+    result = ColumnarResult.from_rows(["id", "name"], [(i, f"name {i}") for i in range(1000)])
+
+    text = fit_columnar(result, 200)
+    assert count_tokens(text) <= 200
+    header = json.loads(text.split("\n")[0])
+    assert header["truncated"] is True
+    assert text.split("\n")[1] == '[0,"name 0"]'
+
+
+def test_compact_tool_messages_shrinks_oldest_first():
+    messages = [{"role": "system", "content": "s"}] + [
+        {"role": "tool", "tool_call_id": str(i), "content": "row " * 500} for i in range(5)
+    ]
+
+    compact_tool_messages(messages, 2400, keep_tokens=50)
+    sizes = [count_tokens(m["content"]) for m in messages[1:]]
+    assert all(size < 100 for size in sizes[:3])
+    assert sizes[3] == sizes[4] == 500
+
+
+def test_compact_tool_messages_rewrites_in_batches():
+    messages = [{"role": "tool", "tool_call_id": str(i), "content": "row " * 500} for i in range(3)]
+
+    compact_tool_messages(messages, 1200, keep_tokens=50)
+    compacted = [m["content"] for m in messages]
+    assert all(count_tokens(c) < 100 for c in compacted[:2])
+    # Compacted well under the budget, so the next small result leaves the prefix alone
+    messages.append({"role": "tool", "tool_call_id": "3", "content": "row " * 100})
+    compact_tool_messages(messages, 1200, keep_tokens=50)
+    assert [m["content"] for m in messages[:3]] == compacted
+
+
+@pytest.mark.asyncio
+async def test_compact_history_keeps_recent_messages_and_summarizes_older():
+    history = []
+    for i in range(20):
+        history.append({"role": "user", "content": f"Question {i}: " + "detail " * 50})
+        history.append({"role": "assistant", "content": f"Answer {i}.\n" + "data " * 50})
+
+    compacted = await compact_history(history, 500)
+
+    assert compacted[-1] == history[-1]
+    assert compacted[0]["role"] == "user"
+    assert compacted[0]["content"].startswith("[Summary of the earlier conversation]")
+    assert "- user: Question 0:" in compacted[0]["content"]
+    roles = [m["role"] for m in compacted]
+    assert all(a != b for a, b in zip(roles, roles[1:]))
+    assert await compact_history(history[:2], 500) == history[:2]
+
+
+@pytest.mark.asyncio
+async def test_compact_history_uses_summarizer_hook():
+    history = [{"role": "user", "content": "x " * 400}, {"role": "assistant", "content": "y " * 400}]
+    seen = []
+
+    async def summarize(messages):
+        seen.extend(messages)
+        return "they asked about x"
+
+    compacted = await compact_history(history, 500, summarize)
+
+    assert seen == history[:1]
+    assert "they asked about x" in compacted[0]["content"]
+    # The latest message alone exceeds its share of the budget, so it is cut
+    assert compacted[-1]["role"] == "assistant"
+    assert "[truncated, about" in compacted[-1]["content"]
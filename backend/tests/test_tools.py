@@ -1,3 +1,5 @@
+import json
+from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -49,8 +51,19 @@ def test_sql_safety_rejects_empty():
 
 # --- Tool integration tests (mocked DB) ---
 
-def _mock_engine_connect(rows, columns=None):
-    """Create a mock for target_engine.connect() context manager."""
+def _explain_plan(cost=10.0, rows=1):
+    return json.dumps([{"Plan": {"Node Type": "Seq Scan", "Total Cost": cost, "Plan Rows": rows}}])
+
+
+def _mock_engine_connect(rows, columns=None, plan=None):
+    """Create a mock for target_engine.connect() context manager.
+
+    EXPLAIN statements get ``plan`` (a cheap plan by default); every other
+    statement gets a result holding ``rows``.
+    """
+    explain_result = MagicMock()
+    explain_result.scalar_one.return_value = plan or _explain_plan()
+
     result_mock = MagicMock()
     result_mock.fetchall.return_value = rows
     result_mock.fetchone.return_value = rows[0] if rows else None
@@ -58,8 +71,12 @@ def _mock_engine_connect(rows, columns=None):
     if columns:
         result_mock.keys.return_value = columns
 
+    def dispatch(statement, *args, **kwargs):
+        return explain_result if str(statement).startswith("EXPLAIN") else result_mock
+
     conn = AsyncMock()
-    conn.execute = AsyncMock(return_value=result_mock)
+    conn.execute = AsyncMock(side_effect=dispatch)
+    conn.stream = AsyncMock(return_value=_mock_stream_result(rows, columns))
 
     ctx = AsyncMock()
     ctx.__aenter__ = AsyncMock(return_value=conn)
@@ -67,13 +84,81 @@ def _mock_engine_connect(rows, columns=None):
     return ctx, conn
 
 
+def _mock_stream_result(rows, columns=None):
+    """Create a mock AsyncResult that hands out rows in fetchmany batches."""
+    remaining = list(rows)
+    stream_result = MagicMock()
+    if columns:
+        stream_result.keys.return_value = columns
+
+    async def fetchmany(size):
+        batch = remaining[:size]
+        del remaining[:size]
+        return batch
+
+    stream_result.fetchmany = AsyncMock(side_effect=fetchmany)
+    stream_result.close = AsyncMock()
+    return stream_result
+
+
+def _catalog_row(name, columns, primary_key=(), foreign_keys=(), row_estimate=0, kind="r"):
+    """Build a row shaped like the catalog snapshot query output."""
+    return (
+        name,
+        row_estimate,
+        json.dumps([{"name": c, "type": t, "nullable": n} for c, t, n in columns]),
+        json.dumps(list(primary_key)),
+        json.dumps(list(foreign_keys)),
+        kind,
+    )
+
+
+def _mock_catalog_connect(tables, fingerprint="fp-1"):
+    """Mock target_catalog_engine.connect() for a fingerprint check followed by a snapshot load."""
+    fingerprint_result = MagicMock()
+    fingerprint_result.scalar_one.return_value = fingerprint
+    snapshot_result = MagicMock()
+    snapshot_result.fetchall.return_value = tables
+
+    conn = AsyncMock()
+    conn.execute = AsyncMock(side_effect=[fingerprint_result, snapshot_result])
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, conn
+
+
+_COMPANIES = _catalog_row(
+    "companies",
+    [
+        ("company_name", "character varying(255)", False),
+        ("arr_thousands", "integer", True),
+        ("industry_vertical", "character varying(100)", True),
+    ],
+    primary_key=["company_name"],
+    row_estimate=500,
+)
+_ORDERS = _catalog_row(
+    "orders",
+    [("id", "integer", False), ("company_name", "character varying(255)", True)],
+    primary_key=["id"],
+    foreign_keys=[
+        {
+            "columns": ["company_name"],
+            "references_table": "companies",
+            "references_columns": ["company_name"],
+        }
+    ],
+)
+
+
 @pytest.mark.asyncio
 async def test_list_tables():
     from app.tools.list_tables import ListTablesTool
 
-    ctx, conn = _mock_engine_connect([("companies",), ("orders",)])
+    ctx, conn = _mock_catalog_connect([_COMPANIES, _ORDERS])
 
-    with patch("app.tools.list_tables.target_engine") as mock_engine:
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
         mock_engine.connect.return_value = ctx
         tool = ListTablesTool()
         result = await tool.execute({})
@@ -86,14 +171,9 @@ async def test_list_tables():
 async def test_show_schema():
     from app.tools.show_schema import ShowSchemaTool
 
-    rows = [
-        ("company_name", "character varying", "NO"),
-        ("arr_thousands", "integer", "YES"),
-        ("industry_vertical", "character varying", "YES"),
-    ]
-    ctx, conn = _mock_engine_connect(rows)
+    ctx, conn = _mock_catalog_connect([_COMPANIES, _ORDERS])
 
-    with patch("app.tools.show_schema.target_engine") as mock_engine:
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
         mock_engine.connect.return_value = ctx
         tool = ShowSchemaTool()
         result = await tool.execute({"table": "companies"})
@@ -102,39 +182,330 @@ async def test_show_schema():
     assert "company_name" in column_names
     assert "arr_thousands" in column_names
     assert "industry_vertical" in column_names
+    assert result["columns"][0]["is_nullable"] == "NO"
+    assert result["primary_key"] == ["company_name"]
 
 
 @pytest.mark.asyncio
-async def test_sample_data():
-    from app.tools.sample_data import SampleDataTool
+async def test_show_schema_includes_foreign_keys():
+    from app.tools.show_schema import ShowSchemaTool
 
-    # First call: table existence check; second call: actual data
-    check_result = MagicMock()
-    check_result.fetchone.return_value = ("companies",)
+    ctx, conn = _mock_catalog_connect([_COMPANIES, _ORDERS])
 
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        result = await ShowSchemaTool().execute({"table": "orders"})
+
+    assert result["foreign_keys"][0]["references_table"] == "companies"
+
+
+@pytest.mark.asyncio
+async def test_schema_tools_share_one_catalog_load():
+    from app.tools.list_tables import ListTablesTool
+    from app.tools.show_schema import ShowSchemaTool
+
+    ctx, conn = _mock_catalog_connect([_COMPANIES, _ORDERS])
+
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        await ListTablesTool().execute({})
+        await ShowSchemaTool().execute({"table": "companies"})
+        await ShowSchemaTool().execute({"table": "orders"})
+
+    assert mock_engine.connect.call_count == 1
+    assert conn.execute.await_count == 2
+
+
+def _mock_sample_connect(columns, rows):
     data_result = MagicMock()
-    data_result.keys.return_value = ["company_name", "arr_thousands"]
-    data_result.fetchall.return_value = [
-        ("Acme Corp", 1000),
-        ("Beta Inc", 2000),
-        ("Gamma LLC", 3000),
-    ]
+    data_result.keys.return_value = columns
+    data_result.fetchall.return_value = rows
 
     conn = AsyncMock()
-    conn.execute = AsyncMock(side_effect=[check_result, data_result])
+    conn.execute = AsyncMock(return_value=data_result)
 
     ctx = AsyncMock()
     ctx.__aenter__ = AsyncMock(return_value=conn)
     ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, conn
+
+
+@pytest.mark.asyncio
+async def test_sample_data():
+    from app.tools.sample_data import SampleDataTool
+
+    rows = [("Acme Corp", 1000), ("Beta Inc", 2000), ("Gamma LLC", 3000)]
+    ctx, conn = _mock_sample_connect(["company_name", "arr_thousands"], rows)
+    table_info = {"name": "companies", "row_estimate": 500}
 
-    with patch("app.tools.sample_data.target_engine") as mock_engine:
+    with (
+        patch("app.tools.sample_data.target_catalog_engine") as mock_engine,
+        patch("app.tools.sample_data.catalog.table", AsyncMock(return_value=table_info)),
+    ):
         mock_engine.connect.return_value = ctx
         tool = SampleDataTool()
         result = await tool.execute({"table": "companies", "limit": 3})
 
-    assert len(result["rows"]) == 3
-    assert "company_name" in result["columns"]
-    assert "arr_thousands" in result["columns"]
+    assert result.row_count == 3
+    assert result.table == "companies"
+    assert "company_name" in result.columns
+    assert "arr_thousands" in result.columns
+    # Existence is checked against the catalog, so only the guard and sample query hit the DB
+    assert conn.execute.await_count == 2
+    conn.execution_options.assert_awaited_with(postgresql_readonly=True)
+    assert "ORDER BY random()" in str(conn.execute.await_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_sample_data_unknown_table():
+    from app.tools.sample_data import SampleDataTool
+
+    with (
+        patch("app.tools.sample_data.target_catalog_engine") as mock_engine,
+        patch("app.tools.sample_data.catalog.table", AsyncMock(return_value=None)),
+    ):
+        with pytest.raises(ValueError, match="Table not found"):
+            await SampleDataTool().execute({"table": "nope"})
+
+    mock_engine.connect.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sample_data_uses_tablesample_on_large_tables():
+    from app.tools.sample_data import SampleDataTool
+
+    rows = [(i,) for i in range(50)]
+    ctx, conn = _mock_sample_connect(["id"], rows)
+    table_info = {"name": "events", "row_estimate": 2_000_000}
+
+    with (
+        patch("app.tools.sample_data.target_catalog_engine") as mock_engine,
+        patch("app.tools.sample_data.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.return_value = ctx
+        result = await SampleDataTool().execute({"table": "events", "limit": 5})
+
+    assert result.row_count == 5
+    statement, sql_params = conn.execute.await_args.args
+    assert "TABLESAMPLE SYSTEM (:percent)" in str(statement)
+    assert 0 < sql_params["percent"] < 1
+    assert sql_params["limit"] == 50
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("catalog_estimate", "fresh_estimate", "kind", "expected"),
+    [
+        (0, None, "r", "TABLESAMPLE"),  # never analyzed: treated as large
+        (500, 2_000_000, "r", "TABLESAMPLE"),  # grew since the catalog snapshot
+        (2_000_000, 500, "r", "ORDER BY random()"),
+        (0, None, "v", "ORDER BY random()"),  # views cannot use TABLESAMPLE
+    ],
+)
+async def test_sample_data_sizes_tables_from_fresh_estimates(
+    monkeypatch, catalog_estimate, fresh_estimate, kind, expected
+):
+    from app.tools.data_version import data_versions
+    from app.tools.sample_data import SampleDataTool
+
+    estimates = {} if fresh_estimate is None else {"events": fresh_estimate}
+    monkeypatch.setattr(data_versions, "row_estimates", estimates)
+    ctx, conn = _mock_sample_connect(["id"], [(i,) for i in range(50)])
+    table_info = {"name": "events", "row_estimate": catalog_estimate, "kind": kind}
+
+    with (
+        patch("app.tools.sample_data.target_catalog_engine") as mock_engine,
+        patch("app.tools.sample_data.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.return_value = ctx
+        await SampleDataTool().execute({"table": "events", "limit": 5})
+
+    assert expected in str(conn.execute.await_args_list[1].args[0])
+
+
+@pytest.mark.asyncio
+async def test_sample_data_served_from_reservoir():
+    from app.tools.sample_data import SampleDataTool
+
+    rows = [(f"Company {i}", i) for i in range(50)]
+    ctx, conn = _mock_sample_connect(["company_name", "arr_thousands"], rows)
+    table_info = {"name": "companies", "row_estimate": 500}
+
+    with (
+        patch("app.tools.sample_data.target_catalog_engine") as mock_engine,
+        patch("app.tools.sample_data.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.return_value = ctx
+        tool = SampleDataTool()
+        first = await tool.execute({"table": "companies", "limit": 5})
+        second = await tool.execute({"table": "companies", "limit": 10})
+
+    assert mock_engine.connect.call_count == 1
+    assert first.rows == second.rows[:5]
+    assert second.row_count == 10
+
+
+@pytest.mark.asyncio
+async def test_sample_reservoir_dropped_on_data_change():
+    from app.tools.data_version import data_versions
+    from app.tools.result_cache import sample_cache
+    from app.tools.sample_data import SampleDataTool
+
+    ctx, conn = _mock_sample_connect(["id"], [(1,), (2,)])
+    table_info = {"name": "companies", "row_estimate": 2}
+
+    with (
+        patch("app.tools.sample_data.target_catalog_engine") as mock_engine,
+        patch("app.tools.sample_data.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.return_value = ctx
+        await SampleDataTool().execute({"table": "companies", "limit": 2})
+        # The whole two-row table is in the reservoir, so a bigger ask needs no query
+        await SampleDataTool().execute({"table": "companies", "limit": 5})
+        assert mock_engine.connect.call_count == 1
+        for listener in data_versions._listeners:
+            listener({"orders"})
+        assert sample_cache.get("companies") is not None
+        for listener in data_versions._listeners:
+            listener({"companies"})
+        assert sample_cache.get("companies") is None
+
+
+def _mock_profile_connect(columns, rows):
+    conn = AsyncMock()
+    conn.stream = AsyncMock(return_value=_mock_stream_result(rows, columns))
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, conn
+
+
+_PROFILE_ROWS = [
+    (f"Company {i}", ["Fintech", "Fintech", "Healthcare", None][i % 4], Decimal(i) / 2)
+    for i in range(400)
+]
+
+
+@pytest.mark.asyncio
+async def test_profile_table():
+    from app.tools.profile_table import ProfileTableTool
+
+    ctx, conn = _mock_profile_connect(["company_name", "industry", "arr"], _PROFILE_ROWS)
+    table_info = {"name": "companies", "row_estimate": 400}
+
+    with (
+        patch("app.tools.profile_table.target_engine") as mock_engine,
+        patch("app.tools.profile_table.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.return_value = ctx
+        result = await ProfileTableTool().execute({"table": "companies"})
+
+    assert result["rows_scanned"] == 400
+    assert result["sampled"] is False
+    conn.execution_options.assert_awaited_with(postgresql_readonly=True)
+    assert "set_config('statement_timeout'" in str(conn.execute.await_args.args[0])
+    industry = result["columns"]["industry"]
+    assert industry["type"] == "text"
+    assert industry["null_fraction"] == 0.25
+    assert industry["distinct_estimate"] == 2
+    assert industry["top_values"] == [
+        {"value": "Fintech", "count": 200},
+        {"value": "Healthcare", "count": 100},
+    ]
+    arr = result["columns"]["arr"]
+    assert arr["min"] == 0 and arr["max"] == 199.5
+    assert abs(arr["quantiles"]["p50"] - 100) < 2
+    # Unique names have no frequent values worth reporting
+    assert "top_values" not in result["columns"]["company_name"]
+
+
+@pytest.mark.asyncio
+async def test_profile_table_array_and_json_columns():
+    from app.tools.profile_table import ProfileTableTool
+
+    rows = [(["saas", "b2b"][: i % 3], {"tier": i % 2}, ["saas", i][i % 2]) for i in range(10)]
+    ctx, conn = _mock_profile_connect(["tags", "metadata", "mixed"], rows)
+    table_info = {"name": "companies", "row_estimate": 10}
+
+    with (
+        patch("app.tools.profile_table.target_engine") as mock_engine,
+        patch("app.tools.profile_table.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.return_value = ctx
+        result = await ProfileTableTool().execute({"table": "companies"})
+
+    tags = result["columns"]["tags"]
+    assert tags["type"] == "text"
+    assert tags["distinct_estimate"] == 3
+    assert "top_values" not in tags
+    assert result["columns"]["metadata"]["distinct_estimate"] == 2
+    assert result["columns"]["mixed"]["top_values"] == [{"value": "saas", "count": 5}]
+
+
+@pytest.mark.asyncio
+async def test_profile_table_cached_per_data_version():
+    from app.tools.data_version import data_versions
+    from app.tools.profile_table import ProfileTableTool, _locks
+
+    table_info = {"name": "companies", "row_estimate": 400}
+
+    with (
+        patch("app.tools.profile_table.target_engine") as mock_engine,
+        patch("app.tools.profile_table.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.side_effect = lambda: _mock_profile_connect(
+            ["company_name", "industry", "arr"], _PROFILE_ROWS
+        )[0]
+        tool = ProfileTableTool()
+        await tool.execute({"table": "companies"})
+        subset = await tool.execute({"table": "companies", "columns": ["arr"]})
+        assert mock_engine.connect.call_count == 1
+        assert list(subset["columns"]) == ["arr"]
+
+        assert "companies" in _locks
+        for listener in data_versions._listeners:
+            listener({"companies"})
+        assert "companies" not in _locks
+        await tool.execute({"table": "companies"})
+        assert mock_engine.connect.call_count == 2
+
+        with pytest.raises(ValueError, match="Unknown columns: nope"):
+            await tool.execute({"table": "companies", "columns": ["nope"]})
+
+
+@pytest.mark.asyncio
+async def test_profile_table_samples_large_tables():
+    from app.tools.profile_table import ProfileTableTool
+
+    ctx, conn = _mock_profile_connect(["id"], [(i,) for i in range(10)])
+    table_info = {"name": "events", "row_estimate": 10_000_000}
+
+    with (
+        patch("app.tools.profile_table.target_engine") as mock_engine,
+        patch("app.tools.profile_table.catalog.table", AsyncMock(return_value=table_info)),
+    ):
+        mock_engine.connect.return_value = ctx
+        result = await ProfileTableTool().execute({"table": "events"})
+
+    assert result["sampled"] is True
+    statement, sql_params = conn.stream.await_args.args
+    assert "TABLESAMPLE SYSTEM (:percent)" in str(statement)
+    assert sql_params["percent"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_profiles_for_prompt_skips_failures():
+    from app.tools.profile_table import profiles_for_prompt
+
+    async def fake_profile(table):
+        if table == "broken":
+            raise ValueError("Table not found: broken")
+        return {"table": table}
+
+    with patch("app.tools.profile_table.get_profile", side_effect=fake_profile):
+        profiles = await profiles_for_prompt(["companies", "broken"])
+
+    assert profiles == {"companies": {"table": "companies"}}
 
 
 @pytest.mark.asyncio
@@ -148,8 +519,8 @@ async def test_query_select():
         tool = QueryTool()
         result = await tool.execute({"sql": "SELECT count(*) as cnt FROM companies"})
 
-    assert result["rows"][0][0] == 500
-    assert result["row_count"] == 1
+    assert result.rows[0][0] == 500
+    assert result.row_count == 1
 
 
 @pytest.mark.asyncio
@@ -186,3 +557,200 @@ async def test_query_rejects_multi_statement():
     tool = QueryTool()
     with pytest.raises(ValueError, match="Multiple statements"):
         await tool.execute({"sql": "SELECT 1; DROP TABLE companies"})
+
+
+@pytest.mark.asyncio
+async def test_query_served_from_cache():
+    from app.tools.query import QueryTool
+    from app.tools.result_cache import query_cache
+
+    ctx, conn = _mock_engine_connect([(500,)], columns=["cnt"])
+
+    with patch("app.tools.query.target_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        tool = QueryTool()
+        first = await tool.execute({"sql": "SELECT count(*) AS cnt FROM companies"})
+        second = await tool.execute({"sql": "select count(*) as cnt\n  from companies"})
+
+    assert first is second
+    assert mock_engine.connect.call_count == 1
+    assert query_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_query_cache_cleared_on_data_change():
+    from app.tools.data_version import data_versions
+    from app.tools.query import QueryTool
+    from app.tools.result_cache import query_cache
+
+    ctx, conn = _mock_engine_connect([(500,)], columns=["cnt"])
+
+    with patch("app.tools.query.target_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        tool = QueryTool()
+        await tool.execute({"sql": "SELECT count(*) AS cnt FROM companies"})
+        for listener in data_versions._listeners:
+            listener({"companies"})
+        await tool.execute({"sql": "SELECT count(*) AS cnt FROM companies"})
+
+    assert mock_engine.connect.call_count == 2
+    assert query_cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_query_streaming_stops_at_row_cap():
+    from app.tools import query as query_module
+    from app.tools.query import QueryTool
+
+    rows = [(i,) for i in range(25)]
+    ctx, conn = _mock_engine_connect(rows, columns=["id"])
+
+    with (
+        patch("app.tools.query.target_engine") as mock_engine,
+        patch.object(query_module, "MAX_ROWS", 10),
+        patch.object(query_module.settings, "QUERY_STREAM_BATCH_SIZE", 4),
+    ):
+        mock_engine.connect.return_value = ctx
+        result = await QueryTool().execute({"sql": "SELECT id FROM companies"})
+
+    assert result.row_count == 10
+    assert result.truncated is True
+    stream_result = conn.stream.return_value
+    # Batches of 4, 4, then 3 (cap + 1 to detect truncation) — never the full 25
+    assert [c.args[0] for c in stream_result.fetchmany.await_args_list] == [4, 4, 3]
+    stream_result.close.assert_awaited_once()
+    assert conn.stream.call_args.kwargs["execution_options"] == {"yield_per": 4}
+
+
+@pytest.mark.asyncio
+async def test_query_streaming_not_truncated_under_cap():
+    from app.tools.query import QueryTool
+
+    ctx, conn = _mock_engine_connect([(1,), (2,)], columns=["id"])
+
+    with patch("app.tools.query.target_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        result = await QueryTool().execute({"sql": "SELECT id FROM companies"})
+
+    assert result.rows == [[1], [2]]
+    assert result.truncated is False
+
+
+@pytest.mark.asyncio
+async def test_query_buffered_mode():
+    from app.tools import query as query_module
+    from app.tools.query import QueryTool
+
+    ctx, conn = _mock_engine_connect([(500,)], columns=["cnt"])
+
+    with (
+        patch("app.tools.query.target_engine") as mock_engine,
+        patch.object(query_module.settings, "QUERY_STREAMING", False),
+    ):
+        mock_engine.connect.return_value = ctx
+        result = await QueryTool().execute({"sql": "SELECT count(*) AS cnt FROM companies"})
+
+    assert result.rows == [[500]]
+    assert result.truncated is False
+    conn.stream.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_query_runs_in_read_only_transaction_with_timeout():
+    from app.tools import query as query_module
+    from app.tools.query import QueryTool
+
+    ctx, conn = _mock_engine_connect([(500,)], columns=["cnt"])
+
+    with (
+        patch("app.tools.query.target_engine") as mock_engine,
+        patch.object(query_module.settings, "QUERY_STATEMENT_TIMEOUT_MS", 2500),
+    ):
+        mock_engine.connect.return_value = ctx
+        await QueryTool().execute({"sql": "SELECT count(*) AS cnt FROM companies"})
+
+    conn.execution_options.assert_awaited_once_with(postgresql_readonly=True)
+    statements = [str(c.args[0]) for c in conn.execute.await_args_list]
+    assert "set_config('statement_timeout'" in statements[0]
+    assert conn.execute.await_args_list[0].args[1] == {"timeout": "2500"}
+    assert statements[1] == "EXPLAIN (FORMAT JSON) SELECT count(*) AS cnt FROM companies"
+
+
+@pytest.mark.asyncio
+async def test_query_rejects_expensive_plan():
+    from app.tools.query import QueryTool
+    from app.tools.result_cache import query_cache
+
+    plan = _explain_plan(cost=5e9, rows=250_000_000)
+    ctx, conn = _mock_engine_connect([(1,)], columns=["id"], plan=plan)
+
+    with patch("app.tools.query.target_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        result = await QueryTool().execute({"sql": "SELECT * FROM companies a, companies b, companies c"})
+
+    assert "too expensive" in result["error"]
+    assert result["estimated_cost"] == 5e9
+    assert result["estimated_rows"] == 250_000_000
+    assert "hint" in result
+    conn.stream.assert_not_called()
+    assert query_cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_query_reports_statement_timeout():
+    from sqlalchemy.exc import DBAPIError
+
+    from app.tools.query import QueryTool
+
+    ctx, conn = _mock_engine_connect([(1,)], columns=["id"])
+    orig = Exception("canceling statement due to statement timeout")
+    orig.pgcode = "57014"
+    conn.stream = AsyncMock(side_effect=DBAPIError("SELECT ...", None, orig))
+
+    with patch("app.tools.query.target_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        result = await QueryTool().execute({"sql": "SELECT * FROM companies"})
+
+    assert "statement timeout" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_describe_tables_single_round_trip():
+    from app.tools.describe_tables import DescribeTablesTool
+
+    ctx, conn = _mock_catalog_connect([_COMPANIES, _ORDERS])
+
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        result = await DescribeTablesTool().execute({"tables": ["companies", "orders"]})
+
+    assert mock_engine.connect.call_count == 1
+    assert [t["table"] for t in result["tables"]] == ["companies", "orders"]
+    assert result["tables"][0]["row_estimate"] == 500
+    assert result["tables"][0]["primary_key"] == ["company_name"]
+    assert result["relationships"] == [
+        {
+            "from_table": "orders",
+            "from_columns": ["company_name"],
+            "to_table": "companies",
+            "to_columns": ["company_name"],
+        }
+    ]
+    assert "missing" not in result
+
+
+@pytest.mark.asyncio
+async def test_describe_tables_reports_missing():
+    from app.tools.describe_tables import DescribeTablesTool
+
+    ctx, conn = _mock_catalog_connect([_COMPANIES])
+    fingerprint_again = MagicMock()
+    fingerprint_again.scalar_one.return_value = "fp-1"
+    conn.execute.side_effect = list(conn.execute.side_effect) + [fingerprint_again]
+
+    with patch("app.tools.catalog.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        result = await DescribeTablesTool().execute({"tables": ["companies", "invoices"]})
+
+    assert [t["table"] for t in result["tables"]] == ["companies"]
+    assert result["missing"] == ["invoices"]
@@ -0,0 +1,181 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.tools.value_dictionary import ValueDictionary, format_value_hints
+
+_COMPANIES = {
+    "name": "companies",
+    "row_estimate": 500,
+    "columns": [
+        {"name": "company_name", "type": "character varying(255)", "nullable": False},
+        {"name": "industry_vertical", "type": "character varying(100)", "nullable": False},
+        {"name": "founding_year", "type": "integer", "nullable": False},
+    ],
+    "primary_key": [],
+    "foreign_keys": [],
+}
+
+_VERTICALS = ["Fintech", "Healthcare", "E-commerce", "Cybersecurity"]
+
+
+def _result(rows):
+    result = MagicMock()
+    result.fetchall.return_value = rows
+    return result
+
+
+def _mock_connect(*results):
+    conn = AsyncMock()
+    # The first statement sets the statement timeout
+    conn.execute = AsyncMock(side_effect=[_result([]), *results])
+    ctx = AsyncMock()
+    ctx.__aenter__ = AsyncMock(return_value=conn)
+    ctx.__aexit__ = AsyncMock(return_value=False)
+    return ctx, conn
+
+
+def _dictionary(columns):
+    dictionary = ValueDictionary(max_distinct=100, scan_max_rows=100_000)
+    dictionary._tables["companies"] = (None, columns)
+    return dictionary
+
+
+@pytest.fixture
+def _catalog():
+    with patch("app.tools.value_dictionary.catalog") as mock_catalog:
+        mock_catalog.table = AsyncMock(return_value=_COMPANIES)
+        mock_catalog.fingerprint = None
+        yield mock_catalog
+
+
+@pytest.mark.asyncio
+async def test_lookup_matches_case_and_spacing(_catalog):
+    dictionary = _dictionary({"industry_vertical": _VERTICALS})
+
+    hints = await dictionary.lookup("What is churn in fintech vs health care?", ["companies"])
+
+    assert [(h["column"], h["value"]) for h in hints] == [
+        ("industry_vertical", "Fintech"),
+        ("industry_vertical", "Healthcare"),
+    ]
+    assert hints[0]["score"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_lookup_tolerates_typos_and_punctuation(_catalog):
+    dictionary = _dictionary({"industry_vertical": _VERTICALS})
+
+    hints = await dictionary.lookup("top ecommerce and cybersecruity firms", ["companies"])
+
+    assert {h["value"] for h in hints} == {"E-commerce", "Cybersecurity"}
+
+
+@pytest.mark.asyncio
+async def test_lookup_ignores_unrelated_words(_catalog):
+    dictionary = _dictionary({"industry_vertical": _VERTICALS})
+
+    assert await dictionary.lookup("How many companies were founded in 2015?", ["companies"]) == []
+
+
+@pytest.mark.asyncio
+async def test_load_uses_complete_stats_and_scans_otherwise(_catalog):
+    dictionary = ValueDictionary(max_distinct=100, scan_max_rows=100_000)
+    ctx, conn = _mock_connect(
+        _result(
+            [
+                ("company_name", -1.0, None),
+                ("industry_vertical", 4.0, _VERTICALS),
+                ("founding_year", 30.0, None),
+            ]
+        ),
+    )
+
+    with patch("app.tools.value_dictionary.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        columns = await dictionary.columns("companies")
+        again = await dictionary.columns("companies")
+
+    # company_name is unique per row and founding_year is not text
+    assert columns == {"industry_vertical": sorted(_VERTICALS)}
+    assert again is columns
+    assert conn.execute.await_count == 2
+    conn.execution_options.assert_awaited_with(postgresql_readonly=True)
+
+
+@pytest.mark.asyncio
+async def test_load_scans_small_tables_without_stats(_catalog):
+    dictionary = ValueDictionary(max_distinct=3, scan_max_rows=100_000)
+    ctx, conn = _mock_connect(
+        _result([]),
+        _result([(f"Company {i}",) for i in range(4)]),
+        _result([("Fintech",), ("Healthcare",)]),
+    )
+
+    with patch("app.tools.value_dictionary.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        columns = await dictionary.columns("companies")
+
+    assert columns == {"industry_vertical": ["Fintech", "Healthcare"]}
+    distinct_sql = str(conn.execute.await_args_list[3].args[0])
+    assert 'SELECT DISTINCT "industry_vertical" FROM "companies"' in distinct_sql
+
+
+@pytest.mark.asyncio
+async def test_values_dropped_on_data_change(_catalog):
+    from app.tools.data_version import data_versions
+    from app.tools.value_dictionary import value_dictionary
+
+    value_dictionary._tables["companies"] = (None, {"industry_vertical": _VERTICALS})
+    for listener in data_versions._listeners:
+        listener({"companies"})
+    assert "companies" not in value_dictionary._tables
+
+
+def test_format_value_hints_quotes_literals():
+    text = format_value_hints(
+        [
+            {"table": "companies", "column": "industry_vertical", "value": "Fintech", "score": 1.0},
+            {"table": "companies", "column": "company_name", "value": "O'Reilly", "score": 0.9},
+        ]
+    )
+    assert "- companies.industry_vertical: 'Fintech'" in text
+    assert "- companies.company_name: 'O''Reilly'" in text
+
+
+@pytest.mark.asyncio
+async def test_array_columns_are_not_categorical(_catalog):
+    _catalog.table = AsyncMock(
+        return_value={
+            **_COMPANIES,
+            "columns": [
+                {"name": "tags", "type": "text[]", "nullable": True},
+                {"name": "aliases", "type": "character varying(50)[]", "nullable": True},
+                {"name": "industry_vertical", "type": "character varying(100)", "nullable": False},
+            ],
+        }
+    )
+    dictionary = ValueDictionary(max_distinct=100, scan_max_rows=100_000)
+    ctx, conn = _mock_connect(_result([]), _result([("Fintech",), (["Fintech"],)]))
+
+    with patch("app.tools.value_dictionary.target_catalog_engine") as mock_engine:
+        mock_engine.connect.return_value = ctx
+        columns = await dictionary.columns("companies")
+        hints = await dictionary.lookup("fintech", ["companies"])
+
+    assert columns == {"industry_vertical": ["Fintech"]}
+    assert [h["value"] for h in hints] == ["Fintech"]
+
+
+@pytest.mark.asyncio
+async def test_value_hints_for_prompt_swallows_failures():
+    from app.tools.value_dictionary import value_hints_for_prompt
+
+    with (
+        patch("app.tools.value_dictionary.data_versions.check", AsyncMock()),
+        patch(
+            "app.tools.value_dictionary.value_dictionary.lookup",
+            AsyncMock(side_effect=AttributeError("'list' object has no attribute 'lower'")),
+        ),
+    ):
+        assert await value_hints_for_prompt("fintech churn", ["companies"]) == []
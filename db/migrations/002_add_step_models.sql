@@ -0,0 +1,4 @@
+-- Run against genesis_solution as neondb_owner (table owner)
+-- Adds models column recording which LLM models served each pipeline step
+
+ALTER TABLE pipeline_steps ADD COLUMN IF NOT EXISTS models JSONB;
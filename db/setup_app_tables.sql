@@ -35,6 +35,7 @@ CREATE TABLE IF NOT EXISTS pipeline_steps (
     status VARCHAR(20) DEFAULT 'pending',
     attempts INT DEFAULT 0,
     error TEXT,
+    models JSONB,
     created_at TIMESTAMP DEFAULT NOW(),
     completed_at TIMESTAMP
 );
@@ -71,10 +71,16 @@ function ChartRenderer({ chart }: { chart: ChartData }) {
 interface AssistantMessageProps {
   message: Message;
   streamingSteps?: StepState[];
+  streamingAnswer?: string;
   isStreaming?: boolean;
 }
 
-export default function AssistantMessage({ message, streamingSteps, isStreaming }: AssistantMessageProps) {
+export default function AssistantMessage({
+  message,
+  streamingSteps,
+  streamingAnswer,
+  isStreaming,
+}: AssistantMessageProps) {
   return (
     <div className="max-w-lg space-y-2 rounded-lg bg-gray-800 px-4 py-2 text-gray-100">
       {streamingSteps && streamingSteps.length > 0 && (
@@ -85,6 +91,12 @@ export default function AssistantMessage({ message, streamingSteps, isStreaming
         <ThinkingCollapsible pipelineData={message.pipeline_data} />
       )}
 
+      {!message.content && streamingAnswer && (
+        <div className="prose prose-sm prose-invert max-w-none">
+          <ReactMarkdown remarkPlugins={[remarkGfm]}>{streamingAnswer}</ReactMarkdown>
+        </div>
+      )}
+
       {message.content && (
         <div className="prose prose-sm prose-invert max-w-none">
           <ReactMarkdown remarkPlugins={[remarkGfm]}>{message.content}</ReactMarkdown>
@@ -11,7 +11,7 @@ export default function ChatPane({ conversationId }: { conversationId: string |
   const [streaming, setStreaming] = useState(false);
   const [sendError, setSendError] = useState<string | null>(null);
 
-  const { steps, isStreaming, isComplete, reset } = useSSE(conversationId, streaming);
+  const { steps, answerText, isStreaming, isComplete, reset } = useSSE(conversationId, streaming);
 
   // When SSE completes, only clear optimistic state once refetched data has the real response.
   // This prevents a flash of empty content between "done" and the refetch completing.
@@ -84,6 +84,7 @@ export default function ChatPane({ conversationId }: { conversationId: string |
         messages={conversation?.messages ?? []}
         pendingUserMessage={pendingMessage ?? undefined}
         streamingSteps={streaming ? steps : undefined}
+        streamingAnswer={streaming ? answerText : undefined}
         isStreaming={isStreaming}
       />
       <MessageInput onSend={handleSend} disabled={sendMessage.isPending || streaming} />
@@ -1,4 +1,6 @@
 import { useEffect, useRef } from 'react';
+import ReactMarkdown from 'react-markdown';
+import remarkGfm from 'remark-gfm';
 import type { Message } from '../types';
 import type { StepState } from '../hooks/useSSE';
 import AssistantMessage from './AssistantMessage';
@@ -8,6 +10,7 @@ interface MessageListProps {
   messages: Message[];
   pendingUserMessage?: string;
   streamingSteps?: StepState[];
+  streamingAnswer?: string;
   isStreaming?: boolean;
 }
 
@@ -15,6 +18,7 @@ export default function MessageList({
   messages,
   pendingUserMessage,
   streamingSteps,
+  streamingAnswer,
   isStreaming,
 }: MessageListProps) {
   const bottomRef = useRef<HTMLDivElement>(null);
@@ -22,7 +26,7 @@ export default function MessageList({
 
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [messages, pendingUserMessage, streamingSteps]);
+  }, [messages, pendingUserMessage, streamingSteps, streamingAnswer]);
 
   if (!hasContent) {
     return (
@@ -60,6 +64,7 @@ export default function MessageList({
             <AssistantMessage
               message={msg}
               streamingSteps={idx === streamingTargetIdx ? streamingSteps : undefined}
+              streamingAnswer={idx === streamingTargetIdx ? streamingAnswer : undefined}
               isStreaming={idx === streamingTargetIdx ? isStreaming : undefined}
             />
           </div>
@@ -81,6 +86,11 @@ export default function MessageList({
         <div className="flex justify-start">
           <div className="max-w-lg rounded-lg bg-gray-800 px-4 py-2 text-gray-100">
             <ThinkingCollapsible steps={streamingSteps} isStreaming={isStreaming ?? false} />
+            {streamingAnswer && (
+              <div className="prose prose-sm prose-invert mt-2 max-w-none">
+                <ReactMarkdown remarkPlugins={[remarkGfm]}>{streamingAnswer}</ReactMarkdown>
+              </div>
+            )}
           </div>
         </div>
       )}
@@ -12,6 +12,8 @@ interface SSEEvent {
   status?: string;
   summary?: string;
   error?: string;
+  text_delta?: string;
+  reset?: boolean;
 }
 
 export function useSSE(conversationId: string | null, enabled: boolean) {
@@ -19,6 +21,7 @@ export function useSSE(conversationId: string | null, enabled: boolean) {
   const [isComplete, setIsComplete] = useState(false);
   const [isStreaming, setIsStreaming] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [answerText, setAnswerText] = useState('');
   const abortRef = useRef<AbortController | null>(null);
   const queryClient = useQueryClient();
 
@@ -27,6 +30,7 @@ export function useSSE(conversationId: string | null, enabled: boolean) {
     setIsComplete(false);
     setIsStreaming(false);
     setError(null);
+    setAnswerText('');
   }, []);
 
   useEffect(() => {
@@ -93,6 +97,21 @@ export function useSSE(conversationId: string | null, enabled: boolean) {
               setError(event.error ?? 'An error occurred');
             }
 
+            if (event.reset) {
+              setAnswerText('');
+            }
+
+            if (event.text_delta) {
+              const delta = event.text_delta;
+              setAnswerText((prev) => prev + delta);
+            }
+
+            // Streamed answer chunks carry content, not step progress; the
+            // answer step stays running until its completed event arrives
+            if (event.status === 'streaming') {
+              continue;
+            }
+
             if (event.step === 'done') {
               setIsComplete(true);
               setIsStreaming(false);
@@ -136,5 +155,5 @@ export function useSSE(conversationId: string | null, enabled: boolean) {
     };
   }, [conversationId, enabled, queryClient, reset]);
 
-  return { steps, isComplete, isStreaming, error, reset };
+  return { steps, answerText, isComplete, isStreaming, error, reset };
 }
@@ -12,6 +12,7 @@ export interface PipelineStepData {
   query_strategy?: string;
   queries?: string[];
   exploration_notes?: string;
+  models?: Record<string, number>;
 }
 
 export interface PipelineData {